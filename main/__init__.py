@@ -14,32 +14,47 @@ Privacy Query Engine - 差分隐私与去标识化查询引擎
 
 __version__ = "2.0.0"
 
-from .core import QueryDriver, QueryContext
-from .analyzer import SQLAnalyzer, AnalysisResult
-from .policy import PolicyEngine, PolicyDecision, ConfigManager
-from .executor import QueryExecutor
-from .data import CSVPrivacyProcessor, DataFrameProcessor, SchemaDetector
-from .evaluation import PrivacyUtilityEvaluator, EvaluationReport, EvaluationConfig
-
-__all__ = [
+import importlib
+from typing import Any
+
+# 子模块按需导入 (PEP 562), `python -m main --version` 等命令无需加载
+# numpy/sqlmodel 等重量级依赖
+_LAZY_IMPORTS = {
     # Core
-    "QueryDriver",
-    "QueryContext",
+    "QueryDriver": ".core",
+    "QueryContext": ".core",
+    "QueryDriverResult": ".core",
     # Analyzer
-    "SQLAnalyzer",
-    "AnalysisResult",
+    "SQLAnalyzer": ".analyzer",
+    "AnalysisResult": ".analyzer",
     # Policy
-    "PolicyEngine",
-    "PolicyDecision",
-    "ConfigManager",
+    "PolicyEngine": ".policy",
+    "PolicyDecision": ".policy",
+    "ConfigManager": ".policy",
     # Executor
-    "QueryExecutor",
+    "QueryExecutor": ".executor",
     # Data Processing
-    "CSVPrivacyProcessor",
-    "DataFrameProcessor",
-    "SchemaDetector",
+    "CSVPrivacyProcessor": ".data",
+    "DataFrameProcessor": ".data",
+    "SchemaDetector": ".data",
     # Evaluation
-    "PrivacyUtilityEvaluator",
-    "EvaluationReport",
-    "EvaluationConfig",
-]
+    "PrivacyUtilityEvaluator": ".evaluation",
+    "EvaluationReport": ".evaluation",
+    "EvaluationConfig": ".evaluation",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # 之后的访问不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
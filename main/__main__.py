@@ -39,7 +39,7 @@ def query(
     result = driver.process_query(sql)
     
     console.print("[green]查询结果:[/]")
-    console.print(result)
+    console.print(result.to_dict())
 
 
 @app.command()
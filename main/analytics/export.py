@@ -9,10 +9,52 @@ import io
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import numpy as np
 
-from ..privacy.dp.mechanisms import LaplaceMechanism
+from ..privacy.dp.mechanisms import add_laplace_noise_batch
+from ..utils.compat import DATACLASS_SLOTS, orjson
+
+
+# 列式处理时标记某行缺失该键
+_MISSING = object()
+
+# orjson输出格式与 json.dumps(indent=2, default=_json_default) 保持一致: datetime 和数据类
+# 交给 default, datetime 输出 "2024-01-02 03:04:05" 而不是 ISO 格式 (NaN/Infinity 例外, orjson 输出 null)
+_ORJSON_OPTIONS = (
+    (orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+     | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+    if orjson is not None
+    else 0
+)
+
+
+def _json_default(value: Any) -> Any:
+    """JSON导出的默认转换: 枚举和numpy值与orjson的原生输出一致, 其余按str()输出"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    return str(value)
+
+
+class _DrainableBuffer(io.BytesIO):
+    """可分段取出已写入内容的缓冲区, tell() 返回累计写入的字节数"""
+    
+    def __init__(self):
+        super().__init__()
+        self._drained = 0
+    
+    def tell(self) -> int:
+        return self._drained + super().tell()
+    
+    def drain(self) -> bytes:
+        """取出并清空当前缓冲的内容"""
+        data = self.getvalue()
+        self._drained += len(data)
+        self.seek(0)
+        self.truncate()
+        return data
 
 
 class ExportFormat(Enum):
@@ -23,7 +65,7 @@ class ExportFormat(Enum):
     NUMPY = "numpy"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ExportConfig:
     """导出配置"""
     format: ExportFormat = ExportFormat.CSV
@@ -34,7 +76,7 @@ class ExportConfig:
     max_rows: Optional[int] = None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class StatisticalSummary:
     """统计摘要"""
     column_name: str
@@ -76,22 +118,23 @@ class PrivacyPreservingExporter:
     - 数值噪声添加
     """
     
-    def __init__(self, default_epsilon: float = 1.0):
+    def __init__(self, default_epsilon: float = 1.0, seed: Optional[int] = None):
         """
         初始化导出器
         
         Args:
             default_epsilon: 默认epsilon值
+            seed: 噪声随机数种子
         """
         self.default_epsilon = default_epsilon
-        self._laplace = LaplaceMechanism(epsilon=default_epsilon)
+        self._rng = np.random.default_rng(seed)
     
     def export_data(
         self,
         data: List[Dict[str, Any]],
         config: ExportConfig = None,
         identifier_columns: List[str] = None,
-    ) -> str:
+    ) -> Union[str, bytes]:
         """
         导出数据
         
@@ -101,7 +144,7 @@ class PrivacyPreservingExporter:
             identifier_columns: 标识符列
             
         Returns:
-            导出的数据字符串
+            导出的数据字符串 (Parquet格式返回bytes)
         """
         config = config or ExportConfig()
         identifier_columns = identifier_columns or []
@@ -110,16 +153,18 @@ class PrivacyPreservingExporter:
         if config.max_rows and len(data) > config.max_rows:
             data = data[:config.max_rows]
         
-        # 处理数据
-        processed_data = self._process_data(data, config, identifier_columns)
-        
         # 根据格式导出
         if config.format == ExportFormat.CSV:
-            return self._export_csv(processed_data)
-        elif config.format == ExportFormat.JSON:
-            return self._export_json(processed_data)
-        else:
-            return self._export_json(processed_data)
+            # CSV直接写出列式数据, 缺失值写为空串 (与DictWriter一致)
+            columns = self._process_columns(data, config, identifier_columns, missing="")
+            return self._export_csv(columns)
+        
+        if config.format == ExportFormat.PARQUET:
+            columns = self._process_columns(data, config, identifier_columns, missing=None)
+            return self._export_parquet(columns)
+        
+        processed_data = self._process_data(data, config, identifier_columns)
+        return self._export_json(processed_data)
     
     def _process_data(
         self,
@@ -128,22 +173,85 @@ class PrivacyPreservingExporter:
         identifier_columns: List[str],
     ) -> List[Dict[str, Any]]:
         """处理数据"""
-        processed = []
+        if not data:
+            return []
+        
+        columns = self._process_columns(data, config, identifier_columns)
+        return self._to_rows(columns, len(data))
+    
+    def _process_columns(
+        self,
+        data: List[Dict[str, Any]],
+        config: ExportConfig,
+        identifier_columns: List[str],
+        missing: Any = _MISSING,
+    ) -> Dict[str, List[Any]]:
+        """按列处理数据 (行 -> 列), 数值噪声按列一次性生成"""
+        if not data:
+            return {}
+        
+        columns = self._to_columns(data, missing)
+        identifier_set = frozenset(c.lower() for c in identifier_columns)
         
+        for key, values in columns.items():
+            # 脱敏标识符
+            if config.mask_identifiers and key.lower() in identifier_set:
+                columns[key] = self._mask_column(values, missing)
+            # 添加噪声到数值
+            elif config.add_noise_to_numeric:
+                columns[key] = self._add_column_noise(values, config.epsilon)
+        
+        return columns
+    
+    def _to_columns(
+        self,
+        data: List[Dict[str, Any]],
+        missing: Any = _MISSING,
+    ) -> Dict[str, List[Any]]:
+        """行式数据转为列式数据, 缺失的键以 missing 占位"""
+        keys = list(data[0].keys())
+        seen = set(keys)
         for row in data:
-            new_row = {}
-            for key, value in row.items():
-                # 脱敏标识符
-                if config.mask_identifiers and key.lower() in [c.lower() for c in identifier_columns]:
-                    new_row[key] = self._mask_identifier(value)
-                # 添加噪声到数值
-                elif config.add_noise_to_numeric and isinstance(value, (int, float)):
-                    new_row[key] = self._add_noise(value, config.epsilon)
-                else:
-                    new_row[key] = value
-            processed.append(new_row)
-        
-        return processed
+            for key in row:
+                if key not in seen:
+                    seen.add(key)
+                    keys.append(key)
+        
+        return {key: [row.get(key, missing) for row in data] for key in keys}
+    
+    def _to_rows(self, columns: Dict[str, List[Any]], num_rows: int) -> List[Dict[str, Any]]:
+        """列式数据还原为行式数据"""
+        keys = list(columns.keys())
+        if not keys:
+            return [{} for _ in range(num_rows)]
+        
+        return [
+            {k: v for k, v in zip(keys, values) if v is not _MISSING}
+            for values in zip(*columns.values())
+        ]
+    
+    def _mask_column(self, values: List[Any], missing: Any) -> List[Any]:
+        """脱敏一列标识符, 重复值只计算一次"""
+        cache: Dict[Any, Any] = {}
+        masked = []
+        
+        for value in values:
+            if value is missing:
+                masked.append(value)
+                continue
+            
+            # 1, 1.0, True 哈希相等但字符串不同, 非str值按类型区分
+            key = value if type(value) is str else (type(value), value)
+            try:
+                result = cache[key]
+            except KeyError:
+                result = cache[key] = self._mask_identifier(value)
+            except TypeError:
+                # 不可哈希的值直接计算
+                result = self._mask_identifier(value)
+            masked.append(result)
+        
+        return masked
     
     def _mask_identifier(self, value: Any) -> str:
         """脱敏标识符"""
@@ -156,25 +264,247 @@ class PrivacyPreservingExporter:
         
         return str_value[0] + "*" * (len(str_value) - 2) + str_value[-1]
     
-    def _add_noise(self, value: float, epsilon: float) -> float:
-        """添加噪声"""
-        laplace = LaplaceMechanism(epsilon=epsilon, sensitivity=1.0)
-        return laplace.add_noise(value)
+    def _add_column_noise(self, values: List[Any], epsilon: float) -> List[Any]:
+        """为一列中的数值添加噪声 (单次向量化采样)"""
+        numeric_idx = [i for i, v in enumerate(values) if isinstance(v, (int, float))]
+        if not numeric_idx:
+            return values
+        
+        numeric = np.fromiter(
+            (values[i] for i in numeric_idx), dtype=np.float64, count=len(numeric_idx)
+        )
+        noisy = add_laplace_noise_batch(numeric, epsilon, rng=self._rng).tolist()
+        
+        if len(numeric_idx) == len(values):
+            return noisy
+        
+        result = list(values)
+        for i, value in zip(numeric_idx, noisy):
+            result[i] = value
+        return result
     
-    def _export_csv(self, data: List[Dict[str, Any]]) -> str:
+    def _export_csv(self, columns: Dict[str, List[Any]]) -> str:
         """导出为CSV"""
-        if not data:
+        if not columns:
             return ""
         
         output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
+        writer = csv.writer(output)
+        writer.writerow(columns.keys())
+        writer.writerows(zip(*columns.values()))
         return output.getvalue()
     
     def _export_json(self, data: List[Dict[str, Any]]) -> str:
-        """导出为JSON"""
-        return json.dumps(data, indent=2, ensure_ascii=False, default=str)
+        """导出为JSON (优先使用orjson)"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(data, default=_json_default, option=_ORJSON_OPTIONS).decode("utf-8")
+            except TypeError:
+                # orjson不支持的值 (如超过64位的整数) 交给标准库处理
+                pass
+        return json.dumps(data, indent=2, ensure_ascii=False, default=_json_default)
+    
+    def _export_parquet(self, columns: Dict[str, List[Any]]) -> bytes:
+        """导出为Parquet (列式存储, zstd压缩)"""
+        pa, pq = self._import_pyarrow()
+        
+        output = io.BytesIO()
+        pq.write_table(
+            self._to_arrow_table(pa, columns),
+            output,
+            compression="zstd",
+            compression_level=3,
+        )
+        return output.getvalue()
+    
+    def _import_pyarrow(self) -> Tuple[Any, Any]:
+        """导入pyarrow (仅Parquet导出需要)"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet export")
+        return pa, pq
+    
+    def _to_arrow_table(self, pa: Any, columns: Dict[str, List[Any]]) -> Any:
+        """列式数据转为Arrow表"""
+        arrays = {}
+        for name, values in columns.items():
+            try:
+                arrays[name] = pa.array(values)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # 混合类型列按字符串存储
+                arrays[name] = self._to_string_array(pa, values)
+        return pa.table(arrays)
+    
+    def _to_string_array(self, pa: Any, values: List[Any]) -> Any:
+        """按str()转为字符串列, None保持为空"""
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    
+    def _unify_column_type(self, pa: Any, types: List[Any]) -> Any:
+        """
+        合并各批次中同一列的类型
+        
+        全空批次 (null类型) 不参与合并; 整数与浮点数混合时提升为float64,
+        其余不一致的类型按字符串存储 (与一次性导出时混合类型列的处理一致)。
+        """
+        types = [t for t in types if not pa.types.is_null(t)]
+        if not types:
+            return pa.null()
+        if all(t == types[0] for t in types):
+            return types[0]
+        if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+            return pa.float64()
+        return pa.string()
+    
+    def _cast_arrow_table(self, pa: Any, table: Any, schema: Any) -> Any:
+        """按schema转换Arrow表的列类型"""
+        arrays = []
+        for f in schema:
+            column = table.column(f.name)
+            if column.type == f.type:
+                arrays.append(column)
+            elif pa.types.is_string(f.type) and not pa.types.is_null(column.type):
+                arrays.append(self._to_string_array(pa, column.to_pylist()))
+            else:
+                arrays.append(column.cast(f.type))
+        return pa.table(arrays, schema=schema)
+    
+    def export_data_streaming(
+        self,
+        batches: Iterable[List[Dict[str, Any]]],
+        config: ExportConfig = None,
+        identifier_columns: List[str] = None,
+    ) -> Iterator[Union[str, bytes]]:
+        """
+        分批流式导出数据
+        
+        每批数据单独处理并立即序列化, 内存占用取决于批大小而非数据总量。
+        CSV和Parquet的列以第一批数据为准; Parquet的列类型由全部批次合并得到,
+        需在读完所有批次后才开始输出。
+        
+        Args:
+            batches: 数据批次 (每批为行字典列表)
+            config: 导出配置
+            identifier_columns: 标识符列
+            
+        Yields:
+            导出数据片段, 按顺序拼接即为完整的导出结果
+        """
+        config = config or ExportConfig()
+        identifier_columns = identifier_columns or []
+        batches = self._limit_batches(batches, config.max_rows)
+        
+        if config.format == ExportFormat.CSV:
+            yield from self._stream_csv(batches, config, identifier_columns)
+        elif config.format == ExportFormat.PARQUET:
+            yield from self._stream_parquet(batches, config, identifier_columns)
+        else:
+            yield from self._stream_json(batches, config, identifier_columns)
+    
+    def _limit_batches(
+        self,
+        batches: Iterable[List[Dict[str, Any]]],
+        max_rows: Optional[int],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """跳过空批次并按max_rows截断"""
+        remaining = max_rows
+        for batch in batches:
+            if remaining is not None:
+                if remaining <= 0:
+                    return
+                batch = batch[:remaining]
+                remaining -= len(batch)
+            if batch:
+                yield batch
+    
+    def _stream_csv(
+        self,
+        batches: Iterator[List[Dict[str, Any]]],
+        config: ExportConfig,
+        identifier_columns: List[str],
+    ) -> Iterator[str]:
+        """流式导出CSV"""
+        header = None
+        
+        for batch in batches:
+            columns = self._process_columns(batch, config, identifier_columns, missing="")
+            output = io.StringIO()
+            writer = csv.writer(output)
+            
+            if header is None:
+                header = list(columns.keys())
+                writer.writerow(header)
+            
+            empty = [""] * len(batch)
+            writer.writerows(zip(*(columns.get(k, empty) for k in header)))
+            yield output.getvalue()
+    
+    def _stream_json(
+        self,
+        batches: Iterator[List[Dict[str, Any]]],
+        config: ExportConfig,
+        identifier_columns: List[str],
+    ) -> Iterator[str]:
+        """流式导出JSON数组"""
+        yield "["
+        separator = ""
+        
+        for batch in batches:
+            processed = self._process_data(batch, config, identifier_columns)
+            # 去掉每批的外层方括号, 拼接为同一个数组
+            yield separator + self._export_json(processed)[1:-1]
+            separator = ","
+        
+        yield "]"
+    
+    def _stream_parquet(
+        self,
+        batches: Iterator[List[Dict[str, Any]]],
+        config: ExportConfig,
+        identifier_columns: List[str],
+    ) -> Iterator[bytes]:
+        """
+        流式导出Parquet, 每批写为一个row group
+        
+        Parquet文件只有一个schema, 写入后无法再改变列类型, 而各批推断出的类型可能不同
+        (全空列、整数列出现浮点数、字符串列出现整数)。因此各批先单独转为Arrow表,
+        全部读完后合并列类型, 再逐批转换并写出。缓存的是列式的Arrow表而非行字典。
+        """
+        pa, pq = self._import_pyarrow()
+        names = None
+        tables = []
+        
+        for batch in batches:
+            columns = self._process_columns(batch, config, identifier_columns, missing=None)
+            
+            if names is None:
+                names = list(columns.keys())
+            else:
+                empty = [None] * len(batch)
+                columns = {name: columns.get(name, empty) for name in names}
+            
+            tables.append(self._to_arrow_table(pa, columns))
+        
+        if not tables:
+            yield self._export_parquet({})
+            return
+        
+        schema = pa.schema([
+            (name, self._unify_column_type(pa, [t.schema.field(name).type for t in tables]))
+            for name in names
+        ])
+        
+        output = _DrainableBuffer()
+        writer = pq.ParquetWriter(output, schema, compression="zstd", compression_level=3)
+        for i, table in enumerate(tables):
+            # 写出后释放该批的Arrow表
+            tables[i] = None
+            writer.write_table(self._cast_arrow_table(pa, table, schema))
+            yield output.drain()
+        
+        writer.close()
+        yield output.drain()
     
     def compute_statistics(
         self,
@@ -202,57 +532,98 @@ class PrivacyPreservingExporter:
         if columns is None:
             columns = list(data[0].keys())
         
+        # 一次性转为列式数据, 所有数值列的噪声一次性生成
+        table = self._to_columns(data, missing=None)
+        all_null = [None] * len(data)
+        
         summaries = []
+        numeric_columns = []
         
         for col in columns:
-            values = [row.get(col) for row in data]
-            summary = self._compute_column_statistics(col, values, epsilon)
+            summary, numeric_values = self._summarize_column(col, table.get(col, all_null))
             summaries.append(summary)
+            if numeric_values is not None:
+                numeric_columns.append((summary, numeric_values))
+        
+        if numeric_columns:
+            stats = np.array([
+                [a.mean(), a.std(), a.min(), a.max()] for _, a in numeric_columns
+            ])
+            # epsilon平均分配给4个统计量
+            stats = add_laplace_noise_batch(stats, epsilon / 4, rng=self._rng)
+            
+            for (summary, _), (mean, std, min_value, max_value) in zip(
+                numeric_columns, stats.tolist()
+            ):
+                summary.mean = mean
+                summary.std = max(0, std)
+                summary.min_value = min_value
+                summary.max_value = max_value
+                summary.is_noisy = True
+                summary.epsilon_used = epsilon
         
         return summaries
     
-    def _compute_column_statistics(
+    def _summarize_column(
         self,
         column_name: str,
         values: List[Any],
-        epsilon: float,
-    ) -> StatisticalSummary:
-        """计算单列统计"""
-        # 基本统计
-        count = len(values)
-        null_count = sum(1 for v in values if v is None)
+    ) -> Tuple[StatisticalSummary, Optional[np.ndarray]]:
+        """计算单列基本统计, 数值列同时返回其数值数组 (待加噪)"""
         non_null_values = [v for v in values if v is not None]
-        
-        # 确定数据类型
-        numeric_values = []
-        for v in non_null_values:
-            if isinstance(v, (int, float)):
-                numeric_values.append(float(v))
+        numeric_values, numeric_mask = self._numeric_column(non_null_values)
+        numeric_values = numeric_values[numeric_mask]
         
         is_numeric = len(numeric_values) > len(non_null_values) * 0.5
         
         summary = StatisticalSummary(
             column_name=column_name,
             data_type="numeric" if is_numeric else "categorical",
-            count=count,
-            null_count=null_count,
+            count=len(values),
+            null_count=len(values) - len(non_null_values),
         )
         
-        if is_numeric and numeric_values:
-            # 计算带噪声的统计量
-            laplace = LaplaceMechanism(epsilon=epsilon / 4, sensitivity=1.0)  # 分配epsilon
+        if is_numeric and len(numeric_values):
+            return summary, numeric_values
+        
+        # 分类数据
+        summary.unique_count = len(set(non_null_values))
+        return summary, None
+    
+    def export_with_statistics(
+        self,
+        data: List[Dict[str, Any]],
+        config: ExportConfig = None,
+        identifier_columns: List[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        导出数据并附带差分隐私统计摘要
+        
+        统计摘要基于原始数据计算, 仅当 config.include_statistics 为True时生成。
+        
+        Args:
+            data: 数据列表
+            config: 导出配置
+            identifier_columns: 标识符列
             
-            summary.mean = laplace.add_noise(np.mean(numeric_values))
-            summary.std = max(0, laplace.add_noise(np.std(numeric_values)))
-            summary.min_value = laplace.add_noise(min(numeric_values))
-            summary.max_value = laplace.add_noise(max(numeric_values))
-            summary.is_noisy = True
-            summary.epsilon_used = epsilon
-        else:
-            # 分类数据
-            summary.unique_count = len(set(non_null_values))
+        Returns:
+            包含data (导出结果) 和statistics (统计摘要字典列表) 的字典
+        """
+        config = config or ExportConfig()
+        
+        if config.max_rows and len(data) > config.max_rows:
+            data = data[:config.max_rows]
         
-        return summary
+        statistics = []
+        if config.include_statistics:
+            statistics = [
+                s.to_dict() for s in self.compute_statistics(data, config.epsilon)
+            ]
+        
+        return {
+            "data": self.export_data(data, config, identifier_columns),
+            "statistics": statistics,
+        }
     
     def export_for_ml(
         self,
@@ -271,40 +642,40 @@ class PrivacyPreservingExporter:
             epsilon: epsilon值
             
         Returns:
-            包含features和target的字典
+            包含features (N×D ndarray) 和target (长度N ndarray) 的字典
         """
         epsilon = epsilon or self.default_epsilon
         
         if not data:
-            return {"features": [], "target": [], "feature_names": []}
+            return {
+                "features": np.empty((0, len(feature_columns or []))),
+                "target": np.empty(0),
+                "feature_names": feature_columns or [],
+            }
         
         if feature_columns is None:
             feature_columns = [k for k in data[0].keys() if k != target_column]
         
-        features = []
-        target = []
-        
-        laplace = LaplaceMechanism(epsilon=epsilon, sensitivity=1.0)
+        # 提取特征 (非数值转为0, 不加噪声)
+        features = np.zeros((len(data), len(feature_columns)), dtype=np.float64)
+        numeric_mask = np.zeros(features.shape, dtype=bool)
+        for j, col in enumerate(feature_columns):
+            features[:, j], numeric_mask[:, j] = self._numeric_column(
+                [row.get(col, 0) for row in data]
+            )
+        features = np.where(
+            numeric_mask, add_laplace_noise_batch(features, epsilon, rng=self._rng), 0.0
+        )
         
-        for row in data:
-            # 提取特征
-            feature_row = []
-            for col in feature_columns:
-                value = row.get(col, 0)
-                if isinstance(value, (int, float)):
-                    # 添加噪声
-                    value = laplace.add_noise(float(value))
-                else:
-                    value = 0  # 非数值转为0
-                feature_row.append(value)
-            
-            features.append(feature_row)
-            
-            # 提取目标
-            target_value = row.get(target_column, 0)
-            if isinstance(target_value, (int, float)):
-                target_value = laplace.add_noise(float(target_value))
-            target.append(target_value)
+        # 提取目标 (非数值目标保持原值)
+        target_values = [row.get(target_column, 0) for row in data]
+        target, target_mask = self._numeric_column(target_values)
+        target = add_laplace_noise_batch(target, epsilon, rng=self._rng)
+        if not target_mask.all():
+            target = np.array(
+                [t if m else v for t, m, v in zip(target.tolist(), target_mask, target_values)],
+                dtype=object,
+            )
         
         return {
             "features": features,
@@ -312,3 +683,12 @@ class PrivacyPreservingExporter:
             "feature_names": feature_columns,
             "epsilon_used": epsilon,
         }
+    
+    def _numeric_column(self, values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """将一列转为float数组 (非数值位置为0) 及数值掩码"""
+        mask = np.fromiter(
+            (isinstance(v, (int, float)) for v in values), dtype=bool, count=len(values)
+        )
+        array = np.zeros(len(values), dtype=np.float64)
+        array[mask] = [v for v, m in zip(values, mask) if m]
+        return array, mask
@@ -8,20 +8,78 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 import numpy as np
 
-from ..privacy.dp.mechanisms import LaplaceMechanism
+from ..privacy.dp.mechanisms import add_laplace_noise_batch
+from ..utils.compat import DATACLASS_SLOTS
 
 
-@dataclass
+# numba编译的加权求和内核 (首次使用时编译, numba不可用时为None)
+_weighted_sum_kernel = None
+_weighted_sum_kernel_loaded = False
+
+
+def _get_weighted_sum_kernel():
+    """获取numba加权求和内核, numba未安装时返回None"""
+    global _weighted_sum_kernel, _weighted_sum_kernel_loaded
+    
+    if not _weighted_sum_kernel_loaded:
+        _weighted_sum_kernel_loaded = True
+        try:
+            from numba import njit, prange
+        except ImportError:
+            return None
+        
+        @njit(parallel=True, fastmath=True)
+        def kernel(flat, offsets, lengths, sample_weights, out):
+            for i in prange(out.shape[0]):
+                total = 0.0
+                for j in range(lengths.shape[0]):
+                    if i < lengths[j]:
+                        total += flat[offsets[j] + i] * sample_weights[j]
+                out[i] = total
+        
+        _weighted_sum_kernel = kernel
+    
+    return _weighted_sum_kernel
+
+
+def _ragged_weighted_sum(
+    updates: List[np.ndarray],
+    sample_weights: np.ndarray,
+) -> np.ndarray:
+    """
+    长度不一的更新逐位置加权求和
+    
+    结果长度为最长更新的长度, 较短更新缺失的位置按0计。
+    """
+    lengths = np.fromiter((len(u) for u in updates), dtype=np.int64, count=len(updates))
+    out = np.zeros(int(lengths.max()), dtype=np.float64)
+    
+    kernel = _get_weighted_sum_kernel()
+    if kernel is not None:
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+        kernel(np.concatenate(updates), offsets, lengths, sample_weights, out)
+    else:
+        for update, weight in zip(updates, sample_weights):
+            out[:len(update)] += weight * update
+    
+    return out
+
+
+@dataclass(**DATACLASS_SLOTS)
 class ModelUpdate:
     """模型更新"""
     client_id: str
-    weights: List[float]
+    weights: np.ndarray
     num_samples: int
     timestamp: datetime = field(default_factory=datetime.now)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        # 接受列表输入, 统一转为float64数组
+        self.weights = np.asarray(self.weights, dtype=np.float64)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class AggregatedModel:
     """聚合后的模型"""
     weights: List[float]
@@ -50,17 +108,23 @@ class FederatedLearningAggregator:
     - 隐私保护模型评估
     """
     
-    def __init__(self, epsilon: float = 1.0, clip_norm: float = 1.0):
+    def __init__(
+        self,
+        epsilon: float = 1.0,
+        clip_norm: float = 1.0,
+        seed: Optional[int] = None,
+    ):
         """
         初始化聚合器
         
         Args:
             epsilon: 差分隐私epsilon
             clip_norm: 梯度裁剪范数
+            seed: 噪声随机数种子
         """
         self.epsilon = epsilon
         self.clip_norm = clip_norm
-        self._laplace = LaplaceMechanism(epsilon=epsilon)
+        self._rng = np.random.default_rng(seed)
     
     def aggregate_updates(
         self,
@@ -85,9 +149,6 @@ class FederatedLearningAggregator:
                 epsilon_used=0,
             )
         
-        # 裁剪权重
-        clipped_updates = [self._clip_weights(u.weights) for u in updates]
-        
         # 计算加权平均
         total_samples = sum(u.num_samples for u in updates)
         
@@ -96,43 +157,49 @@ class FederatedLearningAggregator:
             sample_weights = [1.0 / len(updates)] * len(updates)
         else:
             sample_weights = [u.num_samples / total_samples for u in updates]
+        sample_weights = np.asarray(sample_weights, dtype=np.float64)
         
-        # 聚合
-        num_weights = len(clipped_updates[0])
-        aggregated_weights = []
+        # 裁剪并聚合: (C,) @ (C, W) -> (W,); 长度不一时逐位置加权求和
+        if len({len(u.weights) for u in updates}) == 1:
+            stacked = np.stack([u.weights for u in updates])
+            self._clip_rows(stacked)
+            aggregated_weights = sample_weights @ stacked
+        else:
+            clipped_updates = [self._clip_weights(u.weights) for u in updates]
+            aggregated_weights = _ragged_weighted_sum(clipped_updates, sample_weights)
         
-        for i in range(num_weights):
-            weighted_sum = sum(
-                clipped_updates[j][i] * sample_weights[j]
-                for j in range(len(updates))
+        # 添加噪声
+        if add_noise:
+            aggregated_weights = add_laplace_noise_batch(
+                aggregated_weights,
+                self.epsilon,
+                sensitivity=self.clip_norm / total_samples,
+                rng=self._rng,
             )
-            
-            # 添加噪声
-            if add_noise:
-                noise_laplace = LaplaceMechanism(
-                    epsilon=self.epsilon,
-                    sensitivity=self.clip_norm / total_samples,
-                )
-                weighted_sum = noise_laplace.add_noise(weighted_sum)
-            
-            aggregated_weights.append(weighted_sum)
         
         return AggregatedModel(
-            weights=aggregated_weights,
+            weights=aggregated_weights.tolist(),
             num_clients=len(updates),
             total_samples=total_samples,
             epsilon_used=self.epsilon if add_noise else 0,
         )
     
-    def _clip_weights(self, weights: List[float]) -> List[float]:
-        """裁剪权重"""
-        weights_array = np.array(weights)
+    def _clip_weights(self, weights: List[float]) -> np.ndarray:
+        """裁剪权重 (未超过clip_norm时不复制)"""
+        weights_array = np.asarray(weights, dtype=np.float64)
         norm = np.linalg.norm(weights_array)
         
         if norm > self.clip_norm:
             weights_array = weights_array * (self.clip_norm / norm)
         
-        return weights_array.tolist()
+        return weights_array
+    
+    def _clip_rows(self, matrix: np.ndarray) -> None:
+        """按行原地裁剪到clip_norm"""
+        norms = np.linalg.norm(matrix, axis=1)
+        over = norms > self.clip_norm
+        if over.any():
+            matrix[over] *= (self.clip_norm / norms[over])[:, None]
     
     def secure_average(
         self,
@@ -153,10 +220,8 @@ class FederatedLearningAggregator:
             return 0.0
         
         epsilon = epsilon or self.epsilon
-        laplace = LaplaceMechanism(epsilon=epsilon, sensitivity=1.0 / len(values))
-        
         avg = sum(values) / len(values)
-        return laplace.add_noise(avg)
+        return float(add_laplace_noise_batch(avg, epsilon, sensitivity=1.0 / len(values), rng=self._rng))
     
     def evaluate_model_private(
         self,
@@ -180,19 +245,23 @@ class FederatedLearningAggregator:
         
         epsilon = epsilon or self.epsilon
         n = len(predictions)
-        laplace = LaplaceMechanism(epsilon=epsilon / 3, sensitivity=1.0 / n)  # 分配给3个指标
-        
-        # 计算MSE
-        mse = sum((p - l) ** 2 for p, l in zip(predictions, labels)) / n
-        noisy_mse = max(0, laplace.add_noise(mse))
         
-        # 计算MAE
-        mae = sum(abs(p - l) for p, l in zip(predictions, labels)) / n
-        noisy_mae = max(0, laplace.add_noise(mae))
+        p = np.asarray(predictions, dtype=np.float64)
+        l = np.asarray(labels, dtype=np.float64)
+        diff = p - l
         
-        # 计算准确率 (用于分类)
-        accuracy = sum(1 for p, l in zip(predictions, labels) if round(p) == round(l)) / n
-        noisy_accuracy = min(1.0, max(0, laplace.add_noise(accuracy)))
+        # MSE, MAE, 准确率 (用于分类); epsilon平均分配给3个指标
+        metrics = np.array([
+            np.mean(diff * diff),
+            np.mean(np.abs(diff)),
+            np.mean(np.round(p) == np.round(l)),
+        ])
+        noisy_mse, noisy_mae, noisy_accuracy = add_laplace_noise_batch(
+            metrics, epsilon / 3, sensitivity=1.0 / n, rng=self._rng
+        ).tolist()
+        noisy_mse = max(0, noisy_mse)
+        noisy_mae = max(0, noisy_mae)
+        noisy_accuracy = min(1.0, max(0, noisy_accuracy))
         
         return {
             "mse": noisy_mse,
@@ -223,17 +292,11 @@ class FederatedLearningAggregator:
         epsilon = epsilon or self.epsilon
         
         # 裁剪梯度
-        clipped = [self._clip_weights(g) for g in gradients]
-        
-        laplace = LaplaceMechanism(epsilon=epsilon, sensitivity=self.clip_norm / len(clipped))
+        clipped = np.array(gradients, dtype=np.float64)
+        self._clip_rows(clipped)
         
         # 聚合
-        num_dims = len(clipped[0])
-        aggregated = []
-        
-        for i in range(num_dims):
-            avg = sum(g[i] for g in clipped) / len(clipped)
-            noisy_avg = laplace.add_noise(avg)
-            aggregated.append(noisy_avg)
-        
-        return aggregated
+        aggregated = clipped.mean(axis=0)
+        return add_laplace_noise_batch(
+            aggregated, epsilon, sensitivity=self.clip_norm / len(clipped), rng=self._rng
+        ).tolist()
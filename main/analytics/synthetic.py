@@ -6,12 +6,12 @@ Synthetic Data Generation (v3.0)
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
-import random
 
-from ..privacy.dp.mechanisms import LaplaceMechanism
+from ..privacy.dp.mechanisms import add_laplace_noise_batch
+from ..utils.compat import DATACLASS_SLOTS
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ColumnSchema:
     """列模式"""
     name: str
@@ -23,7 +23,7 @@ class ColumnSchema:
     std: Optional[float] = None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class SyntheticDataConfig:
     """合成数据配置"""
     num_rows: int = 1000
@@ -42,15 +42,16 @@ class SyntheticDataGenerator:
     - 多种数据类型支持
     """
     
-    def __init__(self, epsilon: float = 1.0):
+    def __init__(self, epsilon: float = 1.0, seed: Optional[int] = None):
         """
         初始化生成器
         
         Args:
             epsilon: 差分隐私epsilon
+            seed: 随机数种子 (SyntheticDataConfig.seed 优先用于生成数据)
         """
         self.epsilon = epsilon
-        self._laplace = LaplaceMechanism(epsilon=epsilon)
+        self._rng = np.random.default_rng(seed)
     
     def learn_schema(
         self,
@@ -71,35 +72,46 @@ class SyntheticDataGenerator:
             return []
         
         epsilon = epsilon or self.epsilon
-        laplace = LaplaceMechanism(epsilon=epsilon / len(data[0]), sensitivity=1.0)
+        column_epsilon = epsilon / len(data[0])  # epsilon平均分配到各列, 敏感度为1
         
         schemas = []
         
         for col in data[0].keys():
-            values = [row.get(col) for row in data if row.get(col) is not None]
+            values = [v for v in (row.get(col) for row in data) if v is not None]
             
             if not values:
                 continue
             
             # 判断数据类型
-            numeric_values = []
-            for v in values:
-                if isinstance(v, (int, float)):
-                    numeric_values.append(float(v))
+            numeric_mask = np.fromiter(
+                (isinstance(v, (int, float)) for v in values), dtype=bool, count=len(values)
+            )
             
-            if len(numeric_values) > len(values) * 0.5:
-                # 数值类型
+            if numeric_mask.sum() > len(values) * 0.5:
+                # 数值类型: min/max/mean/std 一次性加噪
+                numeric_values = np.array(
+                    [v for v, m in zip(values, numeric_mask) if m], dtype=np.float64
+                )
+                stats = np.array([
+                    numeric_values.min(),
+                    numeric_values.max(),
+                    numeric_values.mean(),
+                    numeric_values.std(),
+                ])
+                min_value, max_value, mean, std = add_laplace_noise_batch(
+                    stats, column_epsilon, rng=self._rng
+                ).tolist()
                 schema = ColumnSchema(
                     name=col,
                     data_type="numeric",
-                    min_value=laplace.add_noise(min(numeric_values)),
-                    max_value=laplace.add_noise(max(numeric_values)),
-                    mean=laplace.add_noise(np.mean(numeric_values)),
-                    std=max(0.1, laplace.add_noise(np.std(numeric_values))),
+                    min_value=min_value,
+                    max_value=max_value,
+                    mean=mean,
+                    std=max(0.1, std),
                 )
             else:
                 # 分类类型
-                categories = list(set(str(v) for v in values))
+                categories = self._unique_strings(values).tolist()
                 schema = ColumnSchema(
                     name=col,
                     data_type="categorical",
@@ -126,54 +138,86 @@ class SyntheticDataGenerator:
             合成数据列表
         """
         config = config or SyntheticDataConfig()
+        columns = self.generate_columns(schemas, config)
         
-        if config.seed is not None:
-            np.random.seed(config.seed)
-            random.seed(config.seed)
+        if not columns:
+            return [{} for _ in range(config.num_rows)]
         
-        synthetic_data = []
+        names = list(columns.keys())
+        return [
+            dict(zip(names, values))
+            for values in zip(*(column.tolist() for column in columns.values()))
+        ]
+    
+    def generate_columns(
+        self,
+        schemas: List[ColumnSchema],
+        config: SyntheticDataConfig = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        按列生成合成数据 (每列一次性采样)
         
-        for _ in range(config.num_rows):
-            row = {}
-            for schema in schemas:
-                row[schema.name] = self._generate_value(schema, config.epsilon)
-            synthetic_data.append(row)
+        Args:
+            schemas: 列模式
+            config: 生成配置
+            
+        Returns:
+            列名到长度为num_rows的数组的映射
+        """
+        config = config or SyntheticDataConfig()
+        rng = self._rng if config.seed is None else np.random.default_rng(config.seed)
         
-        return synthetic_data
+        return {
+            schema.name: self._generate_column(schema, config.num_rows, rng)
+            for schema in schemas
+        }
     
-    def _generate_value(self, schema: ColumnSchema, epsilon: float) -> Any:
-        """生成单个值"""
+    def _generate_column(
+        self,
+        schema: ColumnSchema,
+        num_rows: int,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """生成一整列"""
         if schema.data_type == "numeric":
-            return self._generate_numeric(schema, epsilon)
+            return self._generate_numeric(schema, num_rows, rng)
         elif schema.data_type == "categorical":
-            return self._generate_categorical(schema)
+            return self._generate_categorical(schema, num_rows, rng)
         else:
-            return None
+            return np.full(num_rows, None, dtype=object)
     
-    def _generate_numeric(self, schema: ColumnSchema, epsilon: float) -> float:
-        """生成数值"""
+    def _generate_numeric(
+        self,
+        schema: ColumnSchema,
+        num_rows: int,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """生成数值列"""
         if schema.mean is not None and schema.std is not None:
             # 使用正态分布
-            value = np.random.normal(schema.mean, schema.std)
+            values = rng.normal(schema.mean, schema.std, num_rows)
         else:
             # 使用均匀分布
             min_val = schema.min_value or 0
             max_val = schema.max_value or 100
-            value = np.random.uniform(min_val, max_val)
+            values = rng.uniform(min_val, max_val, num_rows)
         
-        # 裁剪到范围内
-        if schema.min_value is not None:
-            value = max(schema.min_value, value)
-        if schema.max_value is not None:
-            value = min(schema.max_value, value)
+        # 裁剪到范围内 (原地操作, 不再分配新数组)
+        if schema.min_value is not None or schema.max_value is not None:
+            np.clip(values, schema.min_value, schema.max_value, out=values)
         
-        return round(value, 2)
+        return np.round(values, 2, out=values)
     
-    def _generate_categorical(self, schema: ColumnSchema) -> str:
-        """生成分类值"""
+    def _generate_categorical(
+        self,
+        schema: ColumnSchema,
+        num_rows: int,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """生成分类列"""
         if not schema.categories:
-            return "unknown"
-        return random.choice(schema.categories)
+            return np.full(num_rows, "unknown", dtype=object)
+        return rng.choice(np.asarray(schema.categories, dtype=object), size=num_rows)
     
     def generate_from_data(
         self,
@@ -248,8 +292,8 @@ class SyntheticDataGenerator:
                 }
             else:
                 # 分类列
-                orig_unique = set(str(v) for v in orig_values)
-                synth_unique = set(str(v) for v in synth_values)
+                orig_unique = frozenset(self._unique_strings(orig_values).tolist())
+                synth_unique = frozenset(self._unique_strings(synth_values).tolist())
                 
                 metrics["column_metrics"][col] = {
                     "type": "categorical",
@@ -259,3 +303,7 @@ class SyntheticDataGenerator:
                 }
         
         return metrics
+    
+    def _unique_strings(self, values: List[Any]) -> np.ndarray:
+        """取值的字符串形式去重 (已排序)"""
+        return np.unique(np.asarray(values, dtype=str))
@@ -2,10 +2,12 @@
 AnalysisResult - SQL分析结果数据结构
 """
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, FrozenSet, Union
 
+from ..utils.compat import DATACLASS_SLOTS
 
-@dataclass
+
+@dataclass(**DATACLASS_SLOTS)
 class JoinInfo:
     """JOIN操作信息"""
     join_type: str  # INNER, LEFT, RIGHT, FULL
@@ -14,7 +16,7 @@ class JoinInfo:
     estimated_cardinality: int = 1
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class SubqueryInfo:
     """子查询信息"""
     subquery_type: str  # SCALAR, EXISTS, IN, FROM, CORRELATED
@@ -25,7 +27,7 @@ class SubqueryInfo:
     correlation_columns: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class CTEInfo:
     """CTE (Common Table Expression) 信息"""
     name: str  # CTE名称
@@ -35,7 +37,7 @@ class CTEInfo:
     references: List[str] = field(default_factory=list)  # 引用的其他CTE或表
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class WindowFunction:
     """窗口函数信息"""
     function_name: str  # 函数名 (ROW_NUMBER, RANK, SUM, etc.)
@@ -46,62 +48,182 @@ class WindowFunction:
     arguments: List[str] = field(default_factory=list)  # 函数参数
 
 
-@dataclass
-class AnalysisResult:
-    """SQL分析结果"""
+# 按需提取的字段: 未赋值时首次访问才计算
+_LAZY_FIELDS = frozenset({
+    "tables", "select_columns", "aggregations", "has_where", "where_conditions",
+    "is_aggregate_query", "group_by_columns", "joins", "subqueries", "ctes",
+    "window_functions",
+})
+
+
+class _LazyFieldSupport:
+    """
+    分析结果的按需字段支持
+    
+    按需字段在实例中未赋值时属性查找失败, 由__getattr__从结果绑定的分析源计算并写回。
+    值存放在槽中, 实例不带__dict__。另有两个槽缓存列名/聚合函数的查找集合。
+    """
+    __slots__ = ("_source", "_columns_lower_cache", "_aggregations_upper_cache")
+    
+    def __getattr__(self, name: str) -> Any:
+        if name not in _LAZY_FIELDS:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        value = self._resolve_field(name)
+        object.__setattr__(self, name, value)
+        return value
+
+
+@dataclass(init=False, **DATACLASS_SLOTS)
+class AnalysisResult(_LazyFieldSupport):
+    """
+    SQL分析结果
+    
+    由SQLAnalyzer返回时各提取字段按需计算: 首次访问时才从词法单元中提取。
+    直接构造时未传入的字段取空值。
+    """
     
     # 涉及的表名
-    tables: List[str] = field(default_factory=list)
+    tables: List[str]
     
     # SELECT子句中的列名
-    select_columns: List[str] = field(default_factory=list)
+    select_columns: List[str]
     
     # 聚合函数列表 (e.g., ["COUNT", "SUM", "AVG"])
-    aggregations: List[str] = field(default_factory=list)
+    aggregations: List[str]
     
     # 是否包含WHERE子句
-    has_where: bool = False
+    has_where: bool
     
     # WHERE子句条件(简化表示)
-    where_conditions: List[str] = field(default_factory=list)
+    where_conditions: List[str]
     
-    # 是否为聚合查询
-    is_aggregate_query: bool = False
+    # 是否为聚合查询 (未指定时由aggregations推出)
+    is_aggregate_query: bool
     
     # GROUP BY字段
-    group_by_columns: List[str] = field(default_factory=list)
+    group_by_columns: List[str]
     
     # JOIN操作信息
-    joins: List[JoinInfo] = field(default_factory=list)
+    joins: List[JoinInfo]
     
     # 子查询信息
-    subqueries: List[SubqueryInfo] = field(default_factory=list)
+    subqueries: List[SubqueryInfo]
     
     # CTE信息
-    ctes: List[CTEInfo] = field(default_factory=list)
+    ctes: List[CTEInfo]
     
     # 窗口函数信息
-    window_functions: List[WindowFunction] = field(default_factory=list)
+    window_functions: List[WindowFunction]
     
     # 原始SQL
-    original_sql: str = ""
+    original_sql: str
     
     # 解析是否成功
-    is_valid: bool = True
+    is_valid: bool
     
     # 错误信息
-    error_message: Optional[str] = None
+    error_message: Optional[str]
     
     # 扩展元数据
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    metadata: Dict[str, Any]
+    
+    def __init__(
+        self,
+        tables: Optional[List[str]] = None,
+        select_columns: Optional[List[str]] = None,
+        aggregations: Optional[List[str]] = None,
+        has_where: Optional[bool] = None,
+        where_conditions: Optional[List[str]] = None,
+        is_aggregate_query: Optional[bool] = None,
+        group_by_columns: Optional[List[str]] = None,
+        joins: Optional[List[JoinInfo]] = None,
+        subqueries: Optional[List[SubqueryInfo]] = None,
+        ctes: Optional[List[CTEInfo]] = None,
+        window_functions: Optional[List[WindowFunction]] = None,
+        original_sql: str = "",
+        is_valid: bool = True,
+        error_message: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        # 按需提取字段的来源 (由SQLAnalyzer设置)
+        self._source = None
+        # 查找集合缓存: (来源列表, 集合), 字段重新赋值后按需重建
+        self._columns_lower_cache = None
+        self._aggregations_upper_cache = None
+        self.original_sql = original_sql
+        self.is_valid = is_valid
+        self.error_message = error_message
+        self.metadata = {} if metadata is None else metadata
+        
+        # 按需字段为None时保持未赋值, 首次访问时计算
+        for name, value in (
+            ("tables", tables),
+            ("select_columns", select_columns),
+            ("aggregations", aggregations),
+            ("has_where", has_where),
+            ("where_conditions", where_conditions),
+            ("is_aggregate_query", is_aggregate_query),
+            ("group_by_columns", group_by_columns),
+            ("joins", joins),
+            ("subqueries", subqueries),
+            ("ctes", ctes),
+            ("window_functions", window_functions),
+        ):
+            if value is not None:
+                object.__setattr__(self, name, value)
+    
+    def _resolve_field(self, name: str) -> Any:
+        """计算尚未提取的字段"""
+        if name == "is_aggregate_query":
+            return len(self.aggregations) > 0
+        
+        if self._source is not None:
+            try:
+                return self._source.extract(name)
+            except Exception as e:
+                self.is_valid = False
+                self.error_message = str(e)
+        
+        return False if name == "has_where" else []
+    
+    @property
+    def _select_columns_lower(self) -> FrozenSet[str]:
+        """小写列名集合 (缓存)"""
+        columns = self.select_columns
+        cache = self._columns_lower_cache
+        if cache is None or cache[0] is not columns:
+            cache = (columns, frozenset(col.lower() for col in columns))
+            self._columns_lower_cache = cache
+        return cache[1]
+    
+    @property
+    def _aggregations_upper(self) -> FrozenSet[str]:
+        """大写聚合函数集合 (缓存)"""
+        aggregations = self.aggregations
+        cache = self._aggregations_upper_cache
+        if cache is None or cache[0] is not aggregations:
+            cache = (aggregations, frozenset(agg.upper() for agg in aggregations))
+            self._aggregations_upper_cache = cache
+        return cache[1]
     
     def has_aggregation(self, *funcs: str) -> bool:
         """检查是否包含指定的聚合函数"""
-        upper_funcs = {f.upper() for f in funcs}
-        return any(agg.upper() in upper_funcs for agg in self.aggregations)
-    
-    def has_sensitive_columns(self, sensitive_list: List[str]) -> bool:
-        """检查是否包含敏感列"""
-        lower_sensitive = {s.lower() for s in sensitive_list}
-        return any(col.lower() in lower_sensitive for col in self.select_columns)
-
+        present = self._aggregations_upper
+        return any(func.upper() in present for func in funcs)
+    
+    def has_sensitive_columns(
+        self,
+        sensitive_list: Union[List[str], FrozenSet[str]],
+    ) -> bool:
+        """
+        检查是否包含敏感列
+        
+        Args:
+            sensitive_list: 敏感列名; 传入frozenset时视为已转为小写,
+                可在多次检查间复用, 不再逐次转换
+        """
+        if not isinstance(sensitive_list, frozenset):
+            sensitive_list = {s.lower() for s in sensitive_list}
+        return not self._select_columns_lower.isdisjoint(sensitive_list)
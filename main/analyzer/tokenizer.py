@@ -0,0 +1,266 @@
+"""
+SQL词法分析
+职责: 单次扫描SQL, 生成供各提取器共用的词法单元序列
+"""
+from typing import List, NamedTuple
+import re
+
+
+# 词法单元类型
+KW = "KW"
+IDENT = "IDENT"
+LPAREN = "LPAREN"
+RPAREN = "RPAREN"
+COMMA = "COMMA"
+OP = "OP"
+STRING = "STRING"
+NUMBER = "NUMBER"
+
+# 识别为关键字的单词 (大写)
+KEYWORDS = frozenset({
+    "SELECT", "DISTINCT", "FROM", "WHERE", "AS", "AND", "OR", "NOT", "IN", "EXISTS",
+    "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS", "ON", "USING",
+    "GROUP", "ORDER", "BY", "HAVING", "LIMIT", "OFFSET", "UNION", "ALL",
+    "WITH", "RECURSIVE", "OVER", "PARTITION", "ROWS", "RANGE", "GROUPS",
+})
+
+
+class Token(NamedTuple):
+    """词法单元"""
+    kind: str  # KW, IDENT, LPAREN, RPAREN, COMMA, OP, STRING, NUMBER
+    value: str  # 关键字为大写形式, 引号标识符去掉引号, 其余为原文
+    start: int  # 在SQL中的起始偏移
+    end: int  # 在SQL中的结束偏移 (不含)
+
+
+# 词法规则: 前导空白与词法单元在同一次匹配中消耗, 逐字符的状态机由re在C层执行
+# (分支按出现频率排列)。末尾空白由END分支吸收: 否则\s*吞下空白后无分支可匹配,
+# finditer会在每个起点重试整段空白, 耗时随空白长度平方增长。
+_TOKEN_RE = re.compile(r"""
+    \s*
+    (?:
+        (?P<WORD>[^\W\d]\w*)
+      | (?P<COMMA>,)
+      | (?P<LPAREN>\()
+      | (?P<RPAREN>\))
+      | (?P<NUMBER>\d+(?:\.\d*)?)
+      | (?P<STRING>'(?:[^']|'')*'?)
+      | (?P<QUOTED>"[^"]*"?|`[^`]*`?)
+      | (?P<COMMENT>--[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+      | (?P<OP>[=<>!]+|\|\||::|\S)
+      | (?P<END>\Z)
+    )
+""", re.VERBOSE)
+
+# 绕过NamedTuple.__new__的参数处理, 直接构造Token
+_new_token = tuple.__new__
+
+
+# numba编译的ASCII词法扫描内核 (首次使用时编译, numba不可用时为None)
+_scan_kernel = None
+_scan_kernel_loaded = False
+
+# 使用扫描内核的最小SQL长度: 内核首次使用需约1秒编译, 短SQL上节省的时间不足以抵消
+_SCAN_KERNEL_MIN_LENGTH = 2048
+
+# 内核输出的类型编码 -> 词法单元类型 (WORD/QUOTED在组装时再区分)
+_SCAN_KINDS = (None, "WORD", COMMA, LPAREN, RPAREN, NUMBER, STRING, "QUOTED", OP)
+
+
+def _get_scan_kernel():
+    """
+    获取numba词法扫描函数, numba未安装时返回None
+
+    扫描函数接受纯ASCII的SQL, 返回 (类型编码, 起始偏移, 结束偏移) 三个列表,
+    切分规则与_TOKEN_RE一致, 注释不输出。
+    """
+    global _scan_kernel, _scan_kernel_loaded
+
+    if not _scan_kernel_loaded:
+        _scan_kernel_loaded = True
+        try:
+            import numpy as np
+            from numba import njit
+        except ImportError:
+            return None
+
+        @njit
+        def kernel(buf, kinds, starts, ends):
+            n = buf.shape[0]
+            count = 0
+            i = 0
+            while i < n:
+                c = buf[i]
+                # 空白: 与re的\s在ASCII范围内一致 (\t-\r, \x1c-空格)
+                if (9 <= c <= 13) or (28 <= c <= 32):
+                    i += 1
+                    continue
+                start = i
+                i += 1
+                if (65 <= c <= 90) or (97 <= c <= 122) or c == 95:
+                    while i < n and ((65 <= buf[i] <= 90) or (97 <= buf[i] <= 122)
+                                     or (48 <= buf[i] <= 57) or buf[i] == 95):
+                        i += 1
+                    kind = 1
+                elif c == 44:
+                    kind = 2
+                elif c == 40:
+                    kind = 3
+                elif c == 41:
+                    kind = 4
+                elif 48 <= c <= 57:
+                    while i < n and 48 <= buf[i] <= 57:
+                        i += 1
+                    if i < n and buf[i] == 46:
+                        i += 1
+                        while i < n and 48 <= buf[i] <= 57:
+                            i += 1
+                    kind = 5
+                elif c == 39:
+                    # 字符串字面量, ''为转义的引号, 未闭合时到结尾
+                    while i < n:
+                        if buf[i] == 39:
+                            if i + 1 < n and buf[i + 1] == 39:
+                                i += 2
+                                continue
+                            i += 1
+                            break
+                        i += 1
+                    kind = 6
+                elif c == 34 or c == 96:
+                    while i < n and buf[i] != c:
+                        i += 1
+                    if i < n:
+                        i += 1
+                    kind = 7
+                elif c == 45 and i < n and buf[i] == 45:
+                    while i < n and buf[i] != 10:
+                        i += 1
+                    continue
+                elif c == 47 and i < n and buf[i] == 42:
+                    i += 1
+                    while i < n and not (buf[i] == 42 and i + 1 < n and buf[i + 1] == 47):
+                        i += 1
+                    i = min(i + 2, n)
+                    continue
+                else:
+                    if c == 61 or c == 60 or c == 62 or c == 33:
+                        while i < n and (buf[i] == 61 or buf[i] == 60 or buf[i] == 62 or buf[i] == 33):
+                            i += 1
+                    elif (c == 124 or c == 58) and i < n and buf[i] == c:
+                        i += 1
+                    kind = 8
+                kinds[count] = kind
+                starts[count] = start
+                ends[count] = i
+                count += 1
+            return count
+
+        def scan(sql):
+            buf = np.frombuffer(sql.encode("ascii"), dtype=np.uint8)
+            n = buf.shape[0]
+            kinds = np.empty(n, dtype=np.uint8)
+            starts = np.empty(n, dtype=np.int64)
+            ends = np.empty(n, dtype=np.int64)
+            count = kernel(buf, kinds, starts, ends)
+            return kinds[:count].tolist(), starts[:count].tolist(), ends[:count].tolist()
+
+        _scan_kernel = scan
+
+    return _scan_kernel
+
+
+def tokenize(sql: str) -> List[Token]:
+    """
+    将SQL切分为词法单元
+
+    字符串字面量和注释内的内容不会被识别为关键字或标识符。
+    较长的纯ASCII SQL在numba可用时由编译的扫描内核切分, 其余使用正则。
+
+    Args:
+        sql: SQL语句
+
+    Returns:
+        词法单元列表
+    """
+    if len(sql) >= _SCAN_KERNEL_MIN_LENGTH and sql.isascii():
+        scan = _get_scan_kernel()
+        if scan is not None:
+            return _build_tokens(sql, *scan(sql))
+
+    tokens = []
+    append = tokens.append
+
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        start, end = match.span(kind)
+
+        if kind == "WORD":
+            text = sql[start:end]
+            upper = text.upper()
+            if upper in KEYWORDS:
+                append(_new_token(Token, (KW, upper, start, end)))
+            else:
+                append(_new_token(Token, (IDENT, text, start, end)))
+        elif kind == "QUOTED":
+            # 去掉引号 (未闭合时只去掉开头的引号)
+            closed = end - start > 1 and sql[end - 1] == sql[start]
+            append(_new_token(Token, (IDENT, sql[start + 1:end - 1 if closed else end], start, end)))
+        elif kind != "COMMENT" and kind != "END":
+            append(_new_token(Token, (kind, sql[start:end], start, end)))
+
+    return tokens
+
+
+def strip_comments(sql: str) -> str:
+    """
+    将SQL中的注释替换为空格
+
+    字符串字面量和引号标识符中的"--"、"/*"不视为注释。
+    在合并空白之前调用: 否则多行SQL合并为一行后, 行注释会吞掉其后的全部内容。
+
+    Args:
+        sql: SQL语句
+
+    Returns:
+        去掉注释的SQL, 不含注释时原样返回
+    """
+    if "--" not in sql and "/*" not in sql:
+        return sql
+
+    parts = []
+    pos = 0
+    for match in _TOKEN_RE.finditer(sql):
+        if match.lastgroup == "COMMENT":
+            start, end = match.span("COMMENT")
+            parts.append(sql[pos:start])
+            parts.append(" ")
+            pos = end
+
+    if not parts:
+        return sql
+    parts.append(sql[pos:])
+    return "".join(parts)
+
+
+def _build_tokens(sql: str, kinds: List[int], starts: List[int], ends: List[int]) -> List[Token]:
+    """由扫描内核的输出组装词法单元"""
+    tokens = []
+    append = tokens.append
+
+    for code, start, end in zip(kinds, starts, ends):
+        kind = _SCAN_KINDS[code]
+        if kind == "WORD":
+            text = sql[start:end]
+            upper = text.upper()
+            if upper in KEYWORDS:
+                append(_new_token(Token, (KW, upper, start, end)))
+            else:
+                append(_new_token(Token, (IDENT, text, start, end)))
+        elif kind == "QUOTED":
+            closed = end - start > 1 and sql[end - 1] == sql[start]
+            append(_new_token(Token, (IDENT, sql[start + 1:end - 1 if closed else end], start, end)))
+        else:
+            append(_new_token(Token, (kind, sql[start:end], start, end)))
+
+    return tokens
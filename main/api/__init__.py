@@ -1,21 +1,39 @@
 # API module - 能力域5: API与服务暴露
-from .server import create_app
-from .schemas import (
-    QueryRequest, QueryResponse, ErrorResponse,
-    BudgetStatus, BudgetStatusResponse, BudgetHistoryResponse,
-    AuditLog, AuditLogResponse,
-    PerformanceMetric, PerformanceMetricResponse
-)
-from .openapi_config import OpenAPIConfig
-from .export import OpenAPIExporter, export_openapi_spec, OpenAPIExportError
+import importlib
+from typing import Any
 
-__all__ = [
-    "create_app",
-    "QueryRequest", "QueryResponse", "ErrorResponse",
-    "BudgetStatus", "BudgetStatusResponse", "BudgetHistoryResponse",
-    "AuditLog", "AuditLogResponse",
-    "PerformanceMetric", "PerformanceMetricResponse",
-    "OpenAPIConfig",
-    "OpenAPIExporter", "export_openapi_spec", "OpenAPIExportError"
-]
+# 导出的符号按需导入 (PEP 562), 只用导出工具时无需加载 FastAPI 应用
+_LAZY_IMPORTS = {
+    "create_app": ".server",
+    "QueryRequest": ".schemas",
+    "RequestContext": ".schemas",
+    "QueryResponse": ".schemas",
+    "ErrorResponse": ".schemas",
+    "BudgetStatus": ".schemas",
+    "BudgetStatusResponse": ".schemas",
+    "BudgetHistoryResponse": ".schemas",
+    "AuditLog": ".schemas",
+    "AuditLogResponse": ".schemas",
+    "PerformanceMetric": ".schemas",
+    "PerformanceMetricResponse": ".schemas",
+    "OpenAPIConfig": ".openapi_config",
+    "OpenAPIExporter": ".export",
+    "export_openapi_spec": ".export",
+    "OpenAPIExportError": ".export",
+}
 
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # 之后的访问不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
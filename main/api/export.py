@@ -4,12 +4,195 @@ OpenAPI 导出工具
 提供将 OpenAPI 规范导出为 JSON 和 YAML 格式的功能
 """
 import json
+import logging
+import os
+import sys
+import warnings
 import yaml
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Union
 from pathlib import Path
 
 from fastapi import FastAPI
 
+from ..utils.compat import orjson
+
+# YAML 由 libyaml 的C实现输出; PyYAML 未编译 libyaml 时退化为纯Python实现
+try:
+    from yaml import CSafeDumper as _YamlDumper
+    _YAML_C_ACCELERATED = True
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper
+    _YAML_C_ACCELERATED = False
+
+logger = logging.getLogger(__name__)
+
+
+# 构建时预生成的紧凑 JSON 规范 (scripts/build_openapi.py 生成, 对应 main.api.server 的应用);
+# 设置 OPENAPI_USE_PREBUILT=1 且构建条件与当前一致时, 紧凑 JSON 导出直接使用该文件, 不再构建 schema
+PREBUILT_JSON_PATH = Path(__file__).with_name("_openapi_prebuilt.json")
+# 预生成文件的构建条件 (应用标题、版本及影响规范的环境变量)
+PREBUILT_META_PATH = Path(__file__).with_name("_openapi_prebuilt.meta.json")
+
+# 影响路由或规范内容的环境变量
+_PREBUILT_ENV_FLAGS = ("USE_MOCK_DB", "ENABLE_BUDGET_MANAGEMENT", "PRODUCTION_URL", "STAGING_URL")
+
+# 导出文件的写缓冲大小: 常见规模的规范在关闭时一次写出, 不按8KB分段
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# 缩进 -> orjson选项; 输出与标准库 json.dumps(ensure_ascii=False) 保持一致:
+# 0 为紧凑输出 (separators=(',', ':')), 2 为 indent=2
+_ORJSON_OPTIONS = (
+    {0: orjson.OPT_NON_STR_KEYS, 2: orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS}
+    if orjson is not None
+    else {}
+)
+
+
+def _orjson_dumps(schema: Dict[str, Any], indent: int) -> Optional[bytes]:
+    """用orjson序列化schema; orjson不可用、缩进不是0或2或含不支持的值时返回None"""
+    option = _ORJSON_OPTIONS.get(indent)
+    if option is None:
+        return None
+    try:
+        return orjson.dumps(schema, option=option)
+    except TypeError:
+        # orjson不支持的值 (如超过64位的整数) 交给标准库处理
+        return None
+
+
+def _prebuilt_metadata(app: FastAPI) -> Dict[str, Any]:
+    """应用当前的构建条件: 标题、版本及影响规范的环境变量"""
+    return {
+        "title": app.title,
+        "version": app.version,
+        "env": {name: os.getenv(name) for name in _PREBUILT_ENV_FLAGS},
+    }
+
+
+def _is_server_app(app: FastAPI) -> bool:
+    """判断是否为 main.api.server 的应用 (服务模块未加载时不是)"""
+    server = sys.modules.get(f"{__package__}.server")
+    return server is not None and getattr(server, "app", None) is app
+
+
+def build_prebuilt(app: FastAPI) -> int:
+    """
+    生成预生成的 JSON 规范及其构建条件 (scripts/build_openapi.py 调用)
+    
+    直接序列化 schema, 不经过 export_json (避免读取旧的预生成文件)。
+    
+    Returns:
+        规范的字节数
+    """
+    data = OpenAPIExporter(app).get_schema_json_bytes()
+    PREBUILT_JSON_PATH.write_bytes(data)
+    PREBUILT_META_PATH.write_text(json.dumps(_prebuilt_metadata(app)), encoding="utf-8")
+    return len(data)
+
+
+def _read_prebuilt_json(app: FastAPI) -> Optional[bytes]:
+    """
+    读取预生成的 JSON 规范
+    
+    未启用、文件不存在、导出的不是服务应用, 或构建条件与当前不一致 (文件已过期) 时返回None。
+    """
+    if os.getenv("OPENAPI_USE_PREBUILT") != "1" or not _is_server_app(app):
+        return None
+    try:
+        metadata = json.loads(PREBUILT_META_PATH.read_bytes())
+        data = PREBUILT_JSON_PATH.read_bytes()
+    except (FileNotFoundError, ValueError):
+        return None
+    if metadata != _prebuilt_metadata(app):
+        logger.warning("预生成的 OpenAPI 规范与当前应用或配置不一致, 改为重新生成")
+        return None
+    return data
+
+
+def _json_kwargs(indent: int) -> Dict[str, Any]:
+    """标准库 json 的输出参数: indent为0时紧凑输出"""
+    if indent == 0:
+        return {"separators": (",", ":"), "ensure_ascii": False}
+    return {"indent": indent, "ensure_ascii": False}
+
+
+def _json_bytes(schema: Dict[str, Any], indent: int) -> bytes:
+    """按导出格式序列化为 JSON 字节, 优先使用orjson"""
+    data = _orjson_dumps(schema, indent)
+    if data is None:
+        data = json.dumps(schema, **_json_kwargs(indent)).encode('utf-8')
+    return data
+
+
+def _to_json_types(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    经 orjson 往返转换为纯 JSON 类型
+    
+    元组等非 JSON 类型转为列表, 共享的子对象拆为独立副本, YAML 因此不会输出
+    锚点/别名, 内容与 JSON 导出一致。orjson 不可用或遇到不支持的值时原样返回。
+    """
+    if orjson is None:
+        return schema
+    try:
+        return orjson.loads(orjson.dumps(schema, option=orjson.OPT_NON_STR_KEYS))
+    except TypeError:
+        return schema
+
+
+def _yaml_dump(schema: Dict[str, Any], stream=None):
+    """按导出格式输出 YAML; stream为None时返回字符串"""
+    if not _YAML_C_ACCELERATED:
+        warnings.warn(
+            "PyYAML 未启用 libyaml, YAML 导出使用纯Python实现, 速度较慢",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+    return yaml.dump(
+        _to_json_types(schema),
+        stream,
+        Dumper=_YamlDumper,
+        default_flow_style=False,
+        allow_unicode=True,
+        sort_keys=False
+    )
+
+
+# 以覆盖写方式打开导出文件 (Windows 下需二进制模式, 避免换行转换)
+_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def _open_fast(path: Path) -> int:
+    """
+    打开导出文件并返回文件描述符
+    
+    先直接打开, 目录不存在时才创建目录后重试; 重复导出到同一目录时只需一次系统调用。
+    权限与 open() 相同 (0o666 经 umask 过滤)。
+    """
+    try:
+        return os.open(path, _OPEN_FLAGS, 0o666)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return os.open(path, _OPEN_FLAGS, 0o666)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """将字节完整写入文件描述符 (os.write 可能只写出一部分)"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _sync_and_drop_cache(fd: int) -> None:
+    """
+    将文件刷到磁盘并从页缓存中释放
+    
+    导出文件写完即不再读取, 释放后不占用服务进程所需的页缓存。DONTNEED 只能
+    丢弃已落盘的页, 因此在 fsync 之后调用; 无 posix_fadvise 的平台只做 fsync。
+    """
+    os.fsync(fd)
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
 
 class OpenAPIExportError(Exception):
     """OpenAPI 导出错误"""
@@ -31,121 +214,216 @@ class OpenAPIExporter:
             app: FastAPI 应用实例
         """
         self.app = app
+        self._schema_cache: Optional[Dict[str, Any]] = None
+        self._schema_bytes_cache: Optional[bytes] = None
     
     def get_schema(self) -> Dict[str, Any]:
         """
         获取 OpenAPI schema 字典
         
+        首次调用时构建, 之后的导出复用同一份 schema。
+        
         Returns:
             OpenAPI schema 字典
         """
-        return self.app.openapi()
+        if self._schema_cache is None:
+            self._schema_cache = self.app.openapi()
+        return self._schema_cache
     
-    def export_json(self, output_path: str, indent: int = 2) -> None:
+    def get_schema_json_bytes(self) -> bytes:
+        """
+        获取 schema 的紧凑 JSON 字节 (UTF-8, 无缩进和多余空白)
+        
+        与 export_json 默认输出逐字节一致, 首次调用时序列化并缓存, 需要字节的
+        调用方 (写文件、HTTP 响应、比较差异) 无需重复序列化。
+        
+        Returns:
+            JSON 字节串
+        """
+        if self._schema_bytes_cache is None:
+            self._schema_bytes_cache = _json_bytes(self.get_schema(), 0)
+        return self._schema_bytes_cache
+    
+    def invalidate(self) -> None:
+        """丢弃缓存的 schema, 下次导出时重新构建 (路由变化后调用)"""
+        self._schema_cache = None
+        self._schema_bytes_cache = None
+    
+    def export_json(self, output_path: Union[str, Path], indent: int = 0, fsync: bool = False) -> None:
         """
         导出为 JSON 格式
         
+        默认输出紧凑 JSON (供工具读取), 需要人工阅读时指定 indent=2。
+        设置环境变量 OPENAPI_USE_PREBUILT=1 且存在预生成文件时, 紧凑输出直接复制
+        该文件 (由 scripts/build_openapi.py 在构建时生成); 仅用于 main.api.server 的应用,
+        且应用标题、版本及相关环境变量须与构建时一致, 否则照常构建 schema。
+        
         Args:
-            output_path: 输出文件路径
-            indent: JSON 缩进空格数（默认 2）
+            output_path: 输出文件路径 (str 或 Path)
+            indent: JSON 缩进空格数（默认 0, 即紧凑输出）
+            fsync: 写入后是否刷到磁盘并释放页缓存 (临时导出无需)
         
         Raises:
             OpenAPIExportError: 导出失败时抛出
         """
         try:
-            schema = self.get_schema()
-            output_file = Path(output_path)
-            
-            # 确保目录存在
-            output_file.parent.mkdir(parents=True, exist_ok=True)
+            # 紧凑输出优先使用预生成的规范, 其次是缓存的字节;
+            # orjson支持的缩进一次序列化, 其他缩进由标准库输出
+            data = _read_prebuilt_json(self.app) if indent == 0 else None
+            if data is None:
+                schema = self.get_schema()
+                data = self.get_schema_json_bytes() if indent == 0 else _orjson_dumps(schema, indent)
+            fd = _open_fast(Path(output_path))
             
             # 写入 JSON 文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(schema, f, indent=indent, ensure_ascii=False)
+            if data is not None:
+                try:
+                    _write_all(fd, data)
+                    if fsync:
+                        _sync_and_drop_cache(fd)
+                finally:
+                    os.close(fd)
+            else:
+                # 标准库逐段输出, 由大缓冲合并写入
+                with open(fd, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                    json.dump(schema, f, **_json_kwargs(indent))
+                    if fsync:
+                        f.flush()
+                        _sync_and_drop_cache(fd)
             
-            print(f"✅ OpenAPI 规范已导出到: {output_path}")
+            logger.info("✅ OpenAPI 规范已导出到: %s", output_path)
             
         except PermissionError as e:
             raise OpenAPIExportError(f"无法写入文件 {output_path}: 权限不足") from e
         except Exception as e:
             raise OpenAPIExportError(f"导出 JSON 失败: {str(e)}") from e
     
-    def export_yaml(self, output_path: str) -> None:
+    def export_yaml(self, output_path: Union[str, Path], fsync: bool = False) -> None:
         """
         导出为 YAML 格式
         
         Args:
-            output_path: 输出文件路径
+            output_path: 输出文件路径 (str 或 Path)
+            fsync: 写入后是否刷到磁盘并释放页缓存 (临时导出无需)
         
         Raises:
             OpenAPIExportError: 导出失败时抛出
         """
         try:
             schema = self.get_schema()
-            output_file = Path(output_path)
-            
-            # 确保目录存在
-            output_file.parent.mkdir(parents=True, exist_ok=True)
+            fd = _open_fast(Path(output_path))
             
             # 写入 YAML 文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                yaml.dump(
-                    schema,
-                    f,
-                    default_flow_style=False,
-                    allow_unicode=True,
-                    sort_keys=False
-                )
+            with open(fd, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                _yaml_dump(schema, f)
+                if fsync:
+                    f.flush()
+                    _sync_and_drop_cache(fd)
             
-            print(f"✅ OpenAPI 规范已导出到: {output_path}")
+            logger.info("✅ OpenAPI 规范已导出到: %s", output_path)
             
         except PermissionError as e:
             raise OpenAPIExportError(f"无法写入文件 {output_path}: 权限不足") from e
         except Exception as e:
             raise OpenAPIExportError(f"导出 YAML 失败: {str(e)}") from e
     
-    def export_both(self, base_path: str = "openapi") -> None:
+    def export_both(
+        self,
+        base_path: Union[str, Path] = "openapi",
+        fsync: bool = False,
+        indent: int = 0,
+    ) -> None:
         """
         同时导出 JSON 和 YAML 格式
         
+        两种格式共用同一份 schema, 先在内存中序列化, 都成功后再写入文件,
+        序列化失败时不会只留下其中一个文件。
+        
         Args:
-            base_path: 基础文件路径（不含扩展名）
+            base_path: 基础文件路径（不含扩展名）, str 或 Path
+            fsync: 写入后是否将两个文件刷到磁盘并释放页缓存 (临时导出无需)
+            indent: JSON 缩进空格数（默认 0, 即紧凑输出）
+        
+        Raises:
+            OpenAPIExportError: 导出失败时抛出
         """
-        self.export_json(f"{base_path}.json")
-        self.export_yaml(f"{base_path}.yaml")
+        # 直接追加扩展名 (不用 with_suffix, 以免替换 base_path 中已有的后缀)
+        base = Path(base_path)
+        json_path = base.with_name(f"{base.name}.json")
+        yaml_path = base.with_name(f"{base.name}.yaml")
+        
+        # 两种格式在当前线程依次序列化: orjson 输出耗时可忽略, YAML 虽由 libyaml
+        # 输出, 但各节点的表示仍在持有GIL的Python代码中完成, 放入线程池并行不能缩短总耗时
+        try:
+            outputs = (
+                (json_path, self.get_schema_json_bytes() if indent == 0
+                 else _json_bytes(self.get_schema(), indent)),
+                (yaml_path, _yaml_dump(self.get_schema()).encode('utf-8')),
+            )
+        except Exception as e:
+            raise OpenAPIExportError(f"导出 OpenAPI 规范失败: {str(e)}") from e
+        
+        output_path = base_path
+        fds = []
+        try:
+            for output_path, data in outputs:
+                fd = _open_fast(output_path)
+                fds.append(fd)
+                _write_all(fd, data)
+            
+            # 两个文件都写完后再统一刷盘
+            if fsync:
+                for fd in fds:
+                    _sync_and_drop_cache(fd)
+        except PermissionError as e:
+            raise OpenAPIExportError(f"无法写入文件 {output_path}: 权限不足") from e
+        except Exception as e:
+            raise OpenAPIExportError(f"写入 {output_path} 失败: {str(e)}") from e
+        finally:
+            for fd in fds:
+                os.close(fd)
+        
+        for output_path, _ in outputs:
+            logger.info("✅ OpenAPI 规范已导出到: %s", output_path)
+
+
+# 导出格式 -> 导出方法名
+_EXPORT_METHODS = {
+    "json": "export_json",
+    "yaml": "export_yaml",
+    "yml": "export_yaml",
+}
 
 
 def export_openapi_spec(
     app: FastAPI,
     format: str = "json",
-    output_path: str = "openapi.json"
+    output_path: Union[str, Path] = "openapi.json"
 ) -> None:
     """
     便捷函数：导出 OpenAPI 规范
     
     Args:
         app: FastAPI 应用实例
-        format: 导出格式 ("json" 或 "yaml")
+        format: 导出格式 ("json"、"yaml" 或 "yml")
         output_path: 输出文件路径
     
     Raises:
         ValueError: 格式不支持时抛出
         OpenAPIExportError: 导出失败时抛出
     """
-    exporter = OpenAPIExporter(app)
-    
-    if format.lower() == "json":
-        exporter.export_json(output_path)
-    elif format.lower() == "yaml":
-        exporter.export_yaml(output_path)
-    else:
+    method_name = _EXPORT_METHODS.get(format.lower())
+    if method_name is None:
         raise ValueError(f"不支持的格式: {format}。请使用 'json' 或 'yaml'")
+    
+    getattr(OpenAPIExporter(app), method_name)(output_path)
 
 
 if __name__ == "__main__":
     # 示例用法
     from .server import app
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("导出 OpenAPI 规范...")
     exporter = OpenAPIExporter(app)
     exporter.export_both("openapi")
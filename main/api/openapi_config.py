@@ -3,25 +3,45 @@ OpenAPI 配置模块
 
 提供 OpenAPI 规范的元数据、服务器信息和标签定义
 """
+import functools
 import os
-from typing import Dict, Any, List
+import textwrap
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple
 
 
-class OpenAPIConfig:
-    """OpenAPI 配置管理器"""
-    
-    @staticmethod
-    def get_metadata() -> Dict[str, Any]:
-        """
-        获取 API 元数据
-        
-        Returns:
-            包含 title, version, description, contact, license 的字典
-        """
-        return {
-            "title": "Privacy Query Engine API",
-            "version": "3.0.0",
-            "description": """
+def _freeze(value: Any) -> Any:
+    """递归冻结: 字典转为只读映射, 列表转为元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """
+    将冻结的配置还原为可修改的普通字典/列表
+
+    嵌入 OpenAPI schema 前使用: json/orjson/yaml 均不能直接序列化只读映射。
+
+    Args:
+        value: OpenAPIConfig 返回的配置
+
+    Returns:
+        深拷贝得到的 dict/list 结构
+    """
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (tuple, list)):
+        return [thaw(v) for v in value]
+    return value
+
+
+# 静态配置在模块加载时构建一次并冻结为只读映射, 各方法直接返回同一对象
+
+# API 描述 (Markdown), 加载时去除公共缩进
+_DESCRIPTION = textwrap.dedent("""
 ## 差分隐私与去标识化查询引擎 API
 
 Privacy Query Engine 是一个强大的隐私保护查询系统，自动为 SQL 查询应用差分隐私或去标识化保护。
@@ -83,64 +103,31 @@ Privacy Query Engine 是一个强大的隐私保护查询系统，自动为 SQL
 - [GitHub 仓库](https://github.com/curleaf/privacy-query-engine)
 - [完整文档](https://github.com/curleaf/privacy-query-engine/blob/main/README.md)
 - [问题反馈](https://github.com/curleaf/privacy-query-engine/issues)
-            """,
-            "contact": {
-                "name": "Privacy Query Engine Team",
-                "email": "qbt2587496@gmail.com",
-                "url": "https://github.com/curleaf/privacy-query-engine"
-            },
-            "license": {
-                "name": "MIT License",
-                "url": "https://opensource.org/licenses/MIT"
-            }
-        }
-    
-    @staticmethod
-    def get_servers() -> List[Dict[str, str]]:
-        """
-        获取服务器列表
-        
-        Returns:
-            服务器配置列表，每个服务器包含 url 和 description
-        """
-        # 从环境变量获取服务器配置，或使用默认值
-        servers = [
-            {
-                "url": "http://localhost:8000",
-                "description": "本地开发服务器"
-            }
-        ]
-        
-        # 如果配置了生产环境 URL，添加到列表
-        prod_url = os.getenv("PRODUCTION_URL")
-        if prod_url:
-            servers.append({
-                "url": prod_url,
-                "description": "生产环境"
-            })
-        
-        # 如果配置了测试环境 URL，添加到列表
-        staging_url = os.getenv("STAGING_URL")
-        if staging_url:
-            servers.append({
-                "url": staging_url,
-                "description": "测试环境"
-            })
-        
-        return servers
-    
-    @staticmethod
-    def get_tags_metadata() -> List[Dict[str, Any]]:
-        """
-        获取标签元数据
-        
-        Returns:
-            标签配置列表，每个标签包含 name, description 和可选的 externalDocs
-        """
-        return [
-            {
-                "name": "Query",
-                "description": """
+            """).strip()
+
+# API 元数据
+_METADATA = _freeze({
+    "title": "Privacy Query Engine API",
+    "version": "3.0.0",
+    "description": _DESCRIPTION,
+
+    "contact": {
+        "name": "Privacy Query Engine Team",
+        "email": "qbt2587496@gmail.com",
+        "url": "https://github.com/curleaf/privacy-query-engine"
+    },
+    "license": {
+        "name": "MIT License",
+        "url": "https://opensource.org/licenses/MIT"
+    }
+})
+
+
+# 标签元数据
+_TAGS_METADATA = _freeze([
+    {
+        "name": "Query",
+        "description": textwrap.dedent("""
                     **隐私查询接口**
                     
                     核心查询处理接口，自动应用隐私保护机制。支持：
@@ -148,11 +135,11 @@ Privacy Query Engine 是一个强大的隐私保护查询系统，自动为 SQL
                     - 差分隐私保护
                     - 去标识化处理
                     - 查询结果返回
-                """
-            },
-            {
-                "name": "Budget",
-                "description": """
+                """).strip()
+    },
+    {
+        "name": "Budget",
+        "description": textwrap.dedent("""
                     **隐私预算管理接口**
                     
                     管理用户的隐私预算消耗。功能包括：
@@ -160,11 +147,11 @@ Privacy Query Engine 是一个强大的隐私保护查询系统，自动为 SQL
                     - 重置用户预算
                     - 查看预算历史
                     - 预算消耗追踪
-                """
-            },
-            {
-                "name": "Audit",
-                "description": """
+                """).strip()
+    },
+    {
+        "name": "Audit",
+        "description": textwrap.dedent("""
                     **审计日志接口**
                     
                     提供完整的操作审计和日志查询。支持：
@@ -172,11 +159,11 @@ Privacy Query Engine 是一个强大的隐私保护查询系统，自动为 SQL
                     - 审计统计信息
                     - 日志导出（JSON/CSV）
                     - 日志完整性验证
-                """
-            },
-            {
-                "name": "Performance",
-                "description": """
+                """).strip()
+    },
+    {
+        "name": "Performance",
+        "description": textwrap.dedent("""
                     **性能监控接口**
                     
                     实时监控系统性能和查询效率。包括：
@@ -184,61 +171,149 @@ Privacy Query Engine 是一个强大的隐私保护查询系统，自动为 SQL
                     - 慢查询分析
                     - 缓存统计
                     - 速率限制状态
-                """
-            },
-            {
-                "name": "Privacy",
-                "description": """
+                """).strip()
+    },
+    {
+        "name": "Privacy",
+        "description": textwrap.dedent("""
                     **隐私保护机制**
                     
                     与隐私保护相关的接口和功能
-                """
-            },
-            {
-                "name": "Root",
-                "description": """
+                """).strip()
+    },
+    {
+        "name": "Root",
+        "description": textwrap.dedent("""
                     **根路径和健康检查**
                     
                     基础接口，包括：
                     - 服务信息
                     - 健康检查
                     - 状态查询
-                """
-            }
-        ]
+                """).strip()
+    }
+])
+
+
+# 外部文档链接
+_EXTERNAL_DOCS = _freeze({
+    "description": "完整的项目文档和使用指南",
+    "url": "https://github.com/curleaf/privacy-query-engine/blob/main/README.md"
+})
+
+
+# 安全方案定义
+_SECURITY_SCHEMES = _freeze({
+    "ApiKeyAuth": {
+        "type": "apiKey",
+        "in": "header",
+        "name": "X-API-Key",
+        "description": "API 密钥认证（可选）。在请求头中添加 X-API-Key 字段"
+    },
+    "BearerAuth": {
+        "type": "http",
+        "scheme": "bearer",
+        "bearerFormat": "JWT",
+        "description": "JWT Bearer Token 认证（可选）"
+    }
+})
+
+
+# 默认服务器列表 (未配置环境变量时)
+_DEFAULT_SERVERS = _freeze([
+    {
+        "url": "http://localhost:8000",
+        "description": "本地开发服务器"
+    }
+])
+
+
+@functools.lru_cache(maxsize=4)
+def _compute_servers(prod_url: Optional[str], staging_url: Optional[str]) -> Tuple[Mapping[str, str], ...]:
+    """
+    构建服务器列表 (按环境变量取值缓存)
+
+    Args:
+        prod_url: 生产环境 URL (PRODUCTION_URL)
+        staging_url: 测试环境 URL (STAGING_URL)
+
+    Returns:
+        服务器配置元组 (只读映射)
+    """
+    if not prod_url and not staging_url:
+        return _DEFAULT_SERVERS
+    
+    servers = list(_DEFAULT_SERVERS)
+    
+    # 如果配置了生产环境 URL，添加到列表
+    if prod_url:
+        servers.append({
+            "url": prod_url,
+            "description": "生产环境"
+        })
+    
+    # 如果配置了测试环境 URL，添加到列表
+    if staging_url:
+        servers.append({
+            "url": staging_url,
+            "description": "测试环境"
+        })
+    
+    return _freeze(servers)
+
+
+class OpenAPIConfig:
+    """OpenAPI 配置管理器"""
+    
+    @staticmethod
+    def get_metadata() -> Mapping[str, Any]:
+        """
+        获取 API 元数据
+        
+        Returns:
+            包含 title, version, description, contact, license 的字典
+        """
+        return _METADATA
+    
+    @staticmethod
+    def get_servers() -> List[Dict[str, str]]:
+        """
+        获取服务器列表
+        
+        Returns:
+            服务器配置列表，每个服务器包含 url 和 description
+        """
+        # 从环境变量获取服务器配置，或使用默认值 (按环境变量取值缓存)
+        servers = _compute_servers(os.getenv("PRODUCTION_URL"), os.getenv("STAGING_URL"))
+        # 返回副本, 调用方可修改而不影响缓存
+        return [dict(server) for server in servers]
+    
+    @staticmethod
+    def get_tags_metadata() -> Sequence[Mapping[str, Any]]:
+        """
+        获取标签元数据
+        
+        Returns:
+            标签配置列表，每个标签包含 name, description 和可选的 externalDocs
+        """
+        return _TAGS_METADATA
     
     @staticmethod
-    def get_external_docs() -> Dict[str, str]:
+    def get_external_docs() -> Mapping[str, str]:
         """
         获取外部文档链接
         
         Returns:
             包含 description 和 url 的字典
         """
-        return {
-            "description": "完整的项目文档和使用指南",
-            "url": "https://github.com/curleaf/privacy-query-engine/blob/main/README.md"
-        }
+        return _EXTERNAL_DOCS
     
     @staticmethod
-    def get_security_schemes() -> Dict[str, Any]:
+    def get_security_schemes() -> Mapping[str, Any]:
         """
         获取安全方案定义（可选）
         
         Returns:
             安全方案配置字典
         """
-        return {
-            "ApiKeyAuth": {
-                "type": "apiKey",
-                "in": "header",
-                "name": "X-API-Key",
-                "description": "API 密钥认证（可选）。在请求头中添加 X-API-Key 字段"
-            },
-            "BearerAuth": {
-                "type": "http",
-                "scheme": "bearer",
-                "bearerFormat": "JWT",
-                "description": "JWT Bearer Token 认证（可选）"
-            }
-        }
+        return _SECURITY_SCHEMES
@@ -25,286 +25,337 @@ v3.0 新增功能:
     PG_USER: 用户名
     PG_PASSWORD: 密码
 """
+import asyncio
+import functools
+import json
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Callable, Optional, List, TypeVar
 from fastapi import APIRouter, HTTPException, Query
-
-from .schemas import QueryRequest, QueryResponse, QueryResponseData, ErrorResponse
-from ..core import QueryDriver, QueryContext
+from fastapi.responses import Response, StreamingResponse
+
+from .schemas import QueryRequest, QueryResponse, QueryResponseData
+from .route_docs import (
+    PROTECT_QUERY_DESCRIPTION,
+    PROTECT_QUERY_RESPONSES,
+    HEALTH_CHECK_RESPONSES,
+    SERVICE_STATUS_DESCRIPTION,
+    SERVICE_STATUS_RESPONSES,
+    GET_BUDGET_STATUS_DESCRIPTION,
+    GET_BUDGET_STATUS_RESPONSES,
+    RESET_BUDGET_DESCRIPTION,
+    RESET_BUDGET_RESPONSES,
+    GET_BUDGET_HISTORY_DESCRIPTION,
+    GET_BUDGET_HISTORY_RESPONSES,
+)
+from ..core import QueryDriver, QueryContext, QueryDriverResult
 from ..budget import PrivacyBudgetManager
-from ..audit import AuditLogger, AuditFilter, EventType
+from ..audit import AuditLogger, AuditFileSink, AuditFilter, EventType
 from ..performance import PerformanceMonitor, QueryCache, RateLimiter
+from ..utils.compat import orjson
 
 router = APIRouter(prefix="/api/v1", tags=["Query"])
 
-# 全局实例
-_query_driver: QueryDriver = None
-_audit_logger: AuditLogger = None
-_performance_monitor: PerformanceMonitor = None
-_query_cache: QueryCache = None
-_rate_limiter: RateLimiter = None
+T = TypeVar("T")
+
+
+def _singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    将无参构造函数包装为全局实例的获取函数
+    
+    首次调用时在锁内创建实例, 并发的首次调用也只创建一次; 之后不加锁直接返回。
+    获取函数带有 reset(), 清除并返回当前实例 (未创建时返回None)。
+    """
+    lock = threading.Lock()
+    instance = None
+    
+    @functools.wraps(factory)
+    def get() -> T:
+        nonlocal instance
+        current = instance
+        if current is None:
+            with lock:
+                if instance is None:
+                    instance = factory()
+                current = instance
+        return current
+    
+    def reset() -> Optional[T]:
+        nonlocal instance
+        with lock:
+            previous, instance = instance, None
+        return previous
+    
+    get.reset = reset
+    return get
+
+
+def _json_response(content: Any) -> Any:
+    """
+    直接序列化响应内容
+    
+    orjson 可直接序列化其中的数据类、datetime 和枚举 (结果同各自的 to_dict),
+    不经过 to_dict 和 FastAPI 的 jsonable_encoder。orjson 不可用, 或内容含 orjson
+    不支持的值 (如审计元数据中超过64位的整数、Decimal、set) 时原样返回, 由 FastAPI 编码。
+    """
+    if orjson is None:
+        return content
+    try:
+        body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return content
+    return Response(body, media_type="application/json")
 
 
+# 以下配置由环境变量决定, 运行期间不变: 首次读取后缓存, reset_query_driver 时重新读取
+@functools.lru_cache(maxsize=1)
 def _use_mock_mode() -> bool:
     """判断是否使用 Mock 模式"""
     use_mock = os.getenv("USE_MOCK_DB", "true").lower()
     return use_mock in ("true", "1", "yes")
 
 
+@functools.lru_cache(maxsize=1)
 def _enable_budget_management() -> bool:
     """判断是否启用预算管理"""
     enable = os.getenv("ENABLE_BUDGET_MANAGEMENT", "false").lower()
     return enable in ("true", "1", "yes")
 
 
+@functools.lru_cache(maxsize=1)
 def _get_default_budget() -> float:
     """获取默认预算值"""
     return float(os.getenv("DEFAULT_BUDGET", "1.0"))
 
 
+@_singleton
 def get_query_driver() -> QueryDriver:
     """
     获取 QueryDriver 实例
     
     根据环境变量 USE_MOCK_DB 决定使用 Mock 还是真实数据库
     """
-    global _query_driver
-    
-    if _query_driver is None:
-        enable_budget = _enable_budget_management()
-        default_budget = _get_default_budget()
-        
-        if _use_mock_mode():
-            # Mock 模式
-            _query_driver = QueryDriver(
-                use_mock=True,
-                enable_budget_management=enable_budget
-            )
-            if enable_budget:
-                _query_driver.budget_manager = PrivacyBudgetManager(default_budget=default_budget)
-            print(f"[API] 使用 Mock 模式启动 (预算管理: {enable_budget})")
-        else:
-            # 真实数据库模式
-            _query_driver = QueryDriver.from_env(
-                enable_budget_management=enable_budget
-            )
-            if enable_budget:
-                _query_driver.budget_manager = PrivacyBudgetManager(default_budget=default_budget)
-            print(f"[API] 连接数据库: {os.getenv('PG_HOST', 'localhost')}:{os.getenv('PG_PORT', '5432')}/{os.getenv('PG_DATABASE', 'postgres')} (预算管理: {enable_budget})")
+    enable_budget = _enable_budget_management()
+    default_budget = _get_default_budget()
+    
+    if _use_mock_mode():
+        # Mock 模式
+        driver = QueryDriver(
+            use_mock=True,
+            enable_budget_management=enable_budget
+        )
+        if enable_budget:
+            driver.budget_manager = PrivacyBudgetManager(default_budget=default_budget)
+        print(f"[API] 使用 Mock 模式启动 (预算管理: {enable_budget})")
+    else:
+        # 真实数据库模式
+        driver = QueryDriver.from_env(
+            enable_budget_management=enable_budget
+        )
+        if enable_budget:
+            driver.budget_manager = PrivacyBudgetManager(default_budget=default_budget)
+        print(f"[API] 连接数据库: {os.getenv('PG_HOST', 'localhost')}:{os.getenv('PG_PORT', '5432')}/{os.getenv('PG_DATABASE', 'postgres')} (预算管理: {enable_budget})")
     
-    return _query_driver
+    return driver
 
 
+@_singleton
 def get_audit_logger() -> AuditLogger:
-    """获取审计日志记录器 (v3.0)"""
-    global _audit_logger
-    if _audit_logger is None:
-        _audit_logger = AuditLogger()
-    return _audit_logger
+    """
+    获取审计日志记录器 (v3.0)
+    
+    设置环境变量 AUDIT_LOG_PATH 时, 条目同时由后台线程批量追加到该文件:
+    攒满 AUDIT_TRAIL_BUFFER_MAX_SIZE 条 (默认500) 或等待 AUDIT_TRAIL_BUFFER_FLUSH_INTERVAL 秒 (默认30) 后写入一次。
+    """
+    path = os.getenv("AUDIT_LOG_PATH")
+    if not path:
+        return AuditLogger()
+    
+    sink = AuditFileSink(
+        path,
+        max_batch=int(os.getenv("AUDIT_TRAIL_BUFFER_MAX_SIZE", "500")),
+        flush_interval=float(os.getenv("AUDIT_TRAIL_BUFFER_FLUSH_INTERVAL", "30")),
+    )
+    return AuditLogger(sink=sink)
 
 
+@_singleton
 def get_performance_monitor() -> PerformanceMonitor:
     """获取性能监控器 (v3.0)"""
-    global _performance_monitor
-    if _performance_monitor is None:
-        _performance_monitor = PerformanceMonitor()
-    return _performance_monitor
+    return PerformanceMonitor()
 
 
+@_singleton
 def get_query_cache() -> QueryCache:
-    """获取查询缓存 (v3.0)"""
-    global _query_cache
-    if _query_cache is None:
-        _query_cache = QueryCache()
-    return _query_cache
+    """获取查询缓存 (v3.0), 缓存时间由 QUERY_CACHE_TTL_SECONDS 设置 (默认 300 秒)"""
+    return QueryCache(default_ttl_seconds=float(os.getenv("QUERY_CACHE_TTL_SECONDS", "300")))
 
 
+@_singleton
 def get_rate_limiter() -> RateLimiter:
     """获取速率限制器 (v3.0)"""
-    global _rate_limiter
-    if _rate_limiter is None:
-        _rate_limiter = RateLimiter()
-    return _rate_limiter
+    return RateLimiter()
 
 
-def reset_query_driver():
-    """重置 QueryDriver 实例（用于测试）"""
-    global _query_driver
-    if _query_driver is not None:
-        _query_driver.close()
-        _query_driver = None
+# /health 的响应内容固定, 导入时编码一次
+_HEALTH_JSON = json.dumps({"status": "healthy", "service": "privacy-query-engine"}).encode()
 
 
-@router.post(
-    "/protect-query",
-    response_model=QueryResponse,
-    status_code=200,
-    summary="执行隐私保护查询",
-    description="""
-对 SQL 查询应用差分隐私或去标识化保护。
+def _status_payload() -> dict:
+    """构建 /status 中由配置决定的部分 (不含数据库连接状态)"""
+    return {
+        "status": "running",
+        "mode": "mock" if _use_mock_mode() else "database",
+        "service": "privacy-query-engine",
+        "version": "2.0.0",
+        "features": {
+            "budget_management": _enable_budget_management(),
+            "enhanced_sql_analysis": True,
+            "advanced_privacy_mechanisms": True,
+            "multi_database_support": True,
+        }
+    }
 
-系统会自动分析查询类型，并根据策略配置选择合适的隐私保护机制：
 
-- **差分隐私 (DP)**: 对聚合查询（COUNT, SUM, AVG 等）添加校准噪声，提供数学上的隐私保证
-- **去标识化 (DeID)**: 对包含敏感列（姓名、邮箱、电话等）的查询进行脱敏处理
-- **直接通过 (PASS)**: 对不涉及隐私的查询直接执行
+@functools.lru_cache(maxsize=1)
+def _mock_status_json() -> bytes:
+    """Mock 模式下 /status 的完整响应内容, reset_query_driver 时重新生成"""
+    return json.dumps(_status_payload(), ensure_ascii=False).encode()
+
+
+# /status/v3 中固定的功能列表 (budget_management 由配置决定, 单独填入)
+_V3_STATIC_FEATURES = {
+    # v2.0 features
+    "enhanced_sql_analysis": True,
+    "advanced_privacy_mechanisms": True,
+    "multi_database_support": True,
+    # v3.0 features
+    "audit_logging": True,
+    "performance_monitoring": True,
+    "query_caching": True,
+    "rate_limiting": True,
+    "distributed_support": True,
+    "analytics_integration": True,
+}
 
-## 使用示例
+# /status/v3 组件统计的缓存时间 (秒), 高频探活请求在此期间复用同一份统计
+_COMPONENT_STATS_TTL_SECONDS = 1.0
+_component_stats_cache = (0.0, None)
 
-### 聚合查询（应用差分隐私）
-```json
-{
-  "sql": "SELECT COUNT(*) FROM users WHERE age > 18;",
-  "context": {"user_id": "user_001"}
-}
-```
-
-响应示例：
-```json
-{
-  "status": "success",
-  "data": {
-    "type": "DP",
-    "original_query": "SELECT COUNT(*) FROM users WHERE age > 18;",
-    "protected_result": 1023,
-    "privacy_info": {
-      "epsilon": 1.0,
-      "method": "Laplace",
-      "sensitivity": 1,
-      "noise_added": 3
-    }
-  }
-}
-```
 
-### 包含敏感列的查询（应用去标识化）
-```json
-{
-  "sql": "SELECT name, email FROM users LIMIT 10;",
-  "context": {"user_id": "user_001"}
-}
-```
-
-响应示例：
-```json
-{
-  "status": "success",
-  "data": {
-    "type": "DeID",
-    "original_query": "SELECT name, email FROM users LIMIT 10;",
-    "protected_result": [
-      {"name": "User_***", "email": "***@example.com"},
-      {"name": "User_***", "email": "***@example.com"}
-    ],
-    "privacy_info": {
-      "method": "Masking",
-      "columns_processed": ["name", "email"]
-    }
-  }
-}
-```
-
-## 注意事项
-
-- 仅支持 SELECT 查询
-- 启用预算管理时，会检查用户的隐私预算是否充足
-- 查询上下文中的 user_id 用于预算管理和审计
-    """,
-    responses={
-        200: {
-            "description": "成功返回隐私保护后的结果",
-            "content": {
-                "application/json": {
-                    "examples": {
-                        "dp_query": {
-                            "summary": "差分隐私查询示例",
-                            "value": {
-                                "status": "success",
-                                "data": {
-                                    "type": "DP",
-                                    "original_query": "SELECT COUNT(*) FROM users;",
-                                    "protected_result": 1023,
-                                    "privacy_info": {
-                                        "epsilon": 1.0,
-                                        "method": "Laplace",
-                                        "sensitivity": 1,
-                                        "noise_added": 3
-                                    }
-                                }
-                            }
-                        },
-                        "deid_query": {
-                            "summary": "去标识化查询示例",
-                            "value": {
-                                "status": "success",
-                                "data": {
-                                    "type": "DeID",
-                                    "original_query": "SELECT name, email FROM users LIMIT 5;",
-                                    "protected_result": [
-                                        {"name": "User_***", "email": "***@example.com"},
-                                        {"name": "User_***", "email": "***@example.com"}
-                                    ],
-                                    "privacy_info": {
-                                        "method": "Masking",
-                                        "columns_processed": ["name", "email"]
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
+def _component_stats() -> dict:
+    """
+    获取 /status/v3 的组件统计, 缓存 _COMPONENT_STATS_TTL_SECONDS 秒
+    
+    只在事件循环中调用且中间没有 await, 读取和更新缓存无需加锁。
+    """
+    global _component_stats_cache
+    expires_at, stats = _component_stats_cache
+    now = time.monotonic()
+    if stats is not None and now < expires_at:
+        return stats
+    
+    # 获取各组件统计: 均为各自一次加锁读取计数器; 审计日志只取条目数, 不做完整统计
+    audit_entries = get_audit_logger().get_entry_count()
+    perf_stats = get_performance_monitor().get_statistics()
+    cache_stats = get_query_cache().get_statistics()
+    rate_stats = get_rate_limiter().get_statistics()
+    
+    stats = {
+        "audit": {
+            "total_entries": audit_entries,
         },
-        400: {
-            "description": "请求参数错误",
-            "model": ErrorResponse,
-            "content": {
-                "application/json": {
-                    "example": {
-                        "status": "error",
-                        "error_code": "INVALID_REQUEST",
-                        "message": "SQL 查询不能为空",
-                        "detail": "The 'sql' field is required and cannot be empty",
-                        "timestamp": "2024-12-24T10:30:00Z"
-                    }
-                }
-            }
+        "performance": {
+            "total_queries": perf_stats.get("total_queries", 0),
+            "average_time_ms": perf_stats.get("average_time_ms", 0),
         },
-        422: {
-            "description": "不支持的查询类型",
-            "model": ErrorResponse,
-            "content": {
-                "application/json": {
-                    "example": {
-                        "status": "error",
-                        "error_code": "UNSUPPORTED_QUERY",
-                        "message": "不支持 UPDATE 操作",
-                        "detail": "Only SELECT queries are supported. UPDATE, INSERT, DELETE operations are not allowed.",
-                        "timestamp": "2024-12-24T10:30:00Z"
-                    }
-                }
-            }
+        "cache": {
+            "entries": cache_stats.get("entries", 0),
+            "hit_rate": cache_stats.get("hit_rate", 0),
         },
-        500: {
-            "description": "服务器内部错误",
-            "model": ErrorResponse,
-            "content": {
-                "application/json": {
-                    "example": {
-                        "status": "error",
-                        "error_code": "INTERNAL_ERROR",
-                        "message": "服务器内部错误",
-                        "detail": "An unexpected error occurred while processing the query",
-                        "timestamp": "2024-12-24T10:30:00Z"
-                    }
-                }
-            }
-        }
-    },
+        "rate_limiter": {
+            "total_requests": rate_stats.get("total_requests", 0),
+            "rejection_rate": rate_stats.get("rejection_rate", 0),
+        },
+    }
+    _component_stats_cache = (now + _COMPONENT_STATS_TTL_SECONDS, stats)
+    return stats
+
+
+def _is_read_only(sql: str) -> bool:
+    """
+    判断语句是否只读
+    
+    与执行器的判断一致: 只有以 SELECT 开头的语句按查询执行, 其余 (含 WITH) 均经 db.execute 执行,
+    可能修改数据。
+    """
+    return sql.lstrip()[:6].upper() == "SELECT"
+
+
+def _is_cacheable(driver: QueryDriver, result: QueryDriverResult) -> bool:
+    """
+    判断只读查询的结果是否可缓存
+    
+    差分隐私结果每次重新采样噪声, 启用预算管理时每次查询都要扣减预算, 均不缓存;
+    只缓存未启用预算管理时成功的去标识化和直通结果。写语句由调用方排除, 每次都要执行。
+    """
+    if driver.enable_budget_management and driver.budget_manager:
+        return False
+    return result.type in ("DeID", "PASS") and not result.error
+
+
+def init_components() -> QueryDriver:
+    """服务启动时创建全部全局组件, 首个请求不再承担初始化开销; 返回 QueryDriver"""
+    for get in (get_audit_logger, get_performance_monitor, get_query_cache, get_rate_limiter):
+        get()
+    return get_query_driver()
+
+
+def _model_response(model: QueryResponse) -> Response:
+    """
+    由 pydantic-core 直接将响应模型编码为JSON
+    
+    返回 Response 时 FastAPI 不再按 response_model 转为字典、重新校验和编码, 结果与之相同;
+    response_model 仍用于生成 OpenAPI 文档。
+    """
+    return Response(model.model_dump_json(), media_type="application/json")
+
+
+def close_audit_logger():
+    """关闭审计日志记录器, 等待缓冲的条目写入文件 (服务关闭时调用)"""
+    logger = get_audit_logger.reset()
+    if logger is not None:
+        logger.close()
+
+
+def reset_query_driver():
+    """重置 QueryDriver 实例（用于测试）并清空查询缓存, 下次获取时重新读取环境变量配置"""
+    driver = get_query_driver.reset()
+    if driver is not None:
+        driver.close()
+    get_query_cache().invalidate_all()
+    
+    _use_mock_mode.cache_clear()
+    _enable_budget_management.cache_clear()
+    _get_default_budget.cache_clear()
+    _mock_status_json.cache_clear()
+    
+    global _component_stats_cache
+    _component_stats_cache = (0.0, None)
+
+
+@router.post(
+    "/protect-query",
+    response_model=QueryResponse,
+    status_code=200,
+    summary="执行隐私保护查询",
+    description=PROTECT_QUERY_DESCRIPTION,
+    responses=PROTECT_QUERY_RESPONSES,
     tags=["Query", "Privacy"]
 )
-async def protect_query(request: QueryRequest) -> QueryResponse:
+async def protect_query(request: QueryRequest) -> Response:
     """
     执行隐私保护查询
     
@@ -314,59 +365,77 @@ async def protect_query(request: QueryRequest) -> QueryResponse:
         request: 查询请求，包含 SQL 语句和可选的上下文信息
     
     Returns:
-        QueryResponse: 包含处理结果和隐私信息的响应
+        Response: QueryResponse 的JSON编码, 包含处理结果和隐私信息
     
     Raises:
         HTTPException: 当请求无效或处理失败时
     """
     try:
+        # 客户端提交的上下文字段 (含额外字段, 不含未提交的默认值)
+        context_data = request.context.model_dump(exclude_unset=True) if request.context else None
+        
+        # 相同 SQL 和上下文的可缓存查询直接返回缓存的响应内容 (写语句不查缓存)
+        read_only = _is_read_only(request.sql)
+        cache = get_query_cache()
+        cache_key = cache.make_key(request.sql, context_data)
+        if read_only:
+            cached = cache.get_by_key(cache_key)
+            if cached is not None:
+                return Response(cached, media_type="application/json")
+        
         driver = get_query_driver()
         
         # 构建查询上下文
         context = None
         if request.context:
             context = QueryContext(
-                user_id=request.context.get("user_id"),
-                extra=request.context,
+                user_id=request.context.user_id,
+                extra=context_data,
             )
         
-        # 处理查询
-        result = driver.process_query(request.sql, context)
+        # 处理查询 (在线程中执行, 数据库往返和噪声采样不阻塞事件循环)
+        result = await asyncio.to_thread(driver.process_query, request.sql, context)
+        
+        # 写语句可能改变数据, 已缓存的查询结果随之失效
+        if not read_only:
+            cache.invalidate_all()
         
         # 检查预算不足的情况
-        if result.get("error") == "insufficient_budget":
-            return QueryResponse(
+        if result.error == "insufficient_budget":
+            return _model_response(QueryResponse(
                 status="error",
                 data=QueryResponseData(
                     type="BUDGET_ERROR",
                     original_query=request.sql,
-                    error=result.get("message"),
+                    error=result.message,
                     privacy_info={
-                        "remaining_budget": result.get("remaining_budget"),
-                        "requested_budget": result.get("requested_budget"),
+                        "remaining_budget": result.remaining_budget,
+                        "requested_budget": result.requested_budget,
                     }
                 ),
-            )
+            ))
+        
+        # 添加预算状态到响应 (复制隐私信息, 响应模型不校验也不复制该字段)
+        privacy_info = result.privacy_info
+        if result.budget_status:
+            privacy_info = {**(privacy_info or {}), "budget_status": result.budget_status}
         
         # 构建响应
         response_data = QueryResponseData(
-            type=result.get("type", "UNKNOWN"),
-            original_query=result.get("original_query", request.sql),
-            protected_result=result.get("protected_result"),
-            privacy_info=result.get("privacy_info"),
-            error=result.get("error"),
+            type=result.type,
+            original_query=result.original_query or request.sql,
+            protected_result=result.protected_result,
+            privacy_info=privacy_info,
+            error=result.error,
         )
         
-        # 添加预算状态到响应
-        if result.get("budget_status"):
-            if response_data.privacy_info is None:
-                response_data.privacy_info = {}
-            response_data.privacy_info["budget_status"] = result.get("budget_status")
-        
-        return QueryResponse(
+        response = _model_response(QueryResponse(
             status="success",
             data=response_data,
-        )
+        ))
+        if read_only and _is_cacheable(driver, result):
+            cache.set_by_key(cache_key, response.body)
+        return response
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -378,85 +447,19 @@ async def protect_query(request: QueryRequest) -> QueryResponse:
     "/health",
     summary="健康检查",
     description="检查服务是否正常运行。用于负载均衡器和监控系统的健康检查。",
-    responses={
-        200: {
-            "description": "服务正常运行",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "status": "healthy",
-                        "service": "privacy-query-engine"
-                    }
-                }
-            }
-        }
-    },
+    responses=HEALTH_CHECK_RESPONSES,
     tags=["Root"]
 )
 async def health_check():
     """健康检查接口"""
-    return {"status": "healthy", "service": "privacy-query-engine"}
+    return Response(_HEALTH_JSON, media_type="application/json")
 
 
 @router.get(
     "/status",
     summary="服务状态",
-    description="""
-获取服务的详细状态信息。
-
-返回信息包括：
-- 运行模式（Mock/Database）
-- 数据库连接状态（如果使用数据库模式）
-- 启用的功能列表
-- 服务版本信息
-    """,
-    responses={
-        200: {
-            "description": "服务状态信息",
-            "content": {
-                "application/json": {
-                    "examples": {
-                        "mock_mode": {
-                            "summary": "Mock 模式状态",
-                            "value": {
-                                "status": "running",
-                                "mode": "mock",
-                                "service": "privacy-query-engine",
-                                "version": "2.0.0",
-                                "features": {
-                                    "budget_management": False,
-                                    "enhanced_sql_analysis": True,
-                                    "advanced_privacy_mechanisms": True,
-                                    "multi_database_support": True
-                                }
-                            }
-                        },
-                        "database_mode": {
-                            "summary": "数据库模式状态",
-                            "value": {
-                                "status": "running",
-                                "mode": "database",
-                                "service": "privacy-query-engine",
-                                "version": "2.0.0",
-                                "features": {
-                                    "budget_management": True,
-                                    "enhanced_sql_analysis": True,
-                                    "advanced_privacy_mechanisms": True,
-                                    "multi_database_support": True
-                                },
-                                "database": {
-                                    "status": "connected",
-                                    "host": "localhost",
-                                    "port": "5432",
-                                    "database": "privacy"
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-    },
+    description=SERVICE_STATUS_DESCRIPTION,
+    responses=SERVICE_STATUS_RESPONSES,
     tags=["Root"]
 )
 async def service_status():
@@ -468,38 +471,27 @@ async def service_status():
     - database: 数据库连接状态 (仅数据库模式)
     - budget_management: 预算管理状态 (v2.0)
     """
-    mode = "mock" if _use_mock_mode() else "database"
-    budget_enabled = _enable_budget_management()
+    # Mock 模式下状态只取决于配置, 直接返回预先编码的内容
+    if _use_mock_mode():
+        return Response(_mock_status_json(), media_type="application/json")
     
-    status = {
-        "status": "running",
-        "mode": mode,
-        "service": "privacy-query-engine",
-        "version": "2.0.0",
-        "features": {
-            "budget_management": budget_enabled,
-            "enhanced_sql_analysis": True,
-            "advanced_privacy_mechanisms": True,
-            "multi_database_support": True,
-        }
-    }
+    status = _status_payload()
     
-    # 如果是数据库模式，检查连接状态
-    if not _use_mock_mode():
-        try:
-            driver = get_query_driver()
-            db_status = driver.test_connection()
-            status["database"] = {
-                "status": db_status.get("status", "unknown"),
-                "host": db_status.get("host"),
-                "port": db_status.get("port"),
-                "database": db_status.get("database"),
-            }
-        except Exception as e:
-            status["database"] = {
-                "status": "error",
-                "error": str(e),
-            }
+    # 数据库模式，检查连接状态
+    try:
+        driver = get_query_driver()
+        db_status = await asyncio.to_thread(driver.test_connection)
+        status["database"] = {
+            "status": db_status.get("status", "unknown"),
+            "host": db_status.get("host"),
+            "port": db_status.get("port"),
+            "database": db_status.get("database"),
+        }
+    except Exception as e:
+        status["database"] = {
+            "status": "error",
+            "error": str(e),
+        }
     
     return status
 
@@ -509,49 +501,8 @@ async def service_status():
 @router.get(
     "/budget/{user_id}",
     summary="获取用户预算状态",
-    description="""
-获取指定用户的隐私预算状态。
-
-隐私预算（Privacy Budget）是差分隐私中的核心概念，用 epsilon (ε) 值表示。
-较小的 epsilon 值提供更强的隐私保护，但可能降低数据可用性。
-
-返回信息包括：
-- 总预算：用户的总隐私预算
-- 已消耗预算：已经使用的预算
-- 剩余预算：还可以使用的预算
-- 最后更新时间
-
-**注意**: 此功能需要启用预算管理（设置环境变量 ENABLE_BUDGET_MANAGEMENT=true）
-    """,
-    responses={
-        200: {
-            "description": "成功返回预算状态",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "status": "success",
-                        "data": {
-                            "user_id": "user_001",
-                            "total_budget": 10.0,
-                            "consumed_budget": 3.5,
-                            "remaining_budget": 6.5,
-                            "last_updated": "2024-12-24T10:30:00Z"
-                        }
-                    }
-                }
-            }
-        },
-        400: {
-            "description": "预算管理未启用",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "detail": "Budget management is not enabled. Set ENABLE_BUDGET_MANAGEMENT=true"
-                    }
-                }
-            }
-        }
-    },
+    description=GET_BUDGET_STATUS_DESCRIPTION,
+    responses=GET_BUDGET_STATUS_RESPONSES,
     tags=["Budget"]
 )
 async def get_budget_status(user_id: str):
@@ -580,50 +531,8 @@ async def get_budget_status(user_id: str):
 @router.post(
     "/budget/{user_id}/reset",
     summary="重置用户预算",
-    description="""
-重置指定用户的隐私预算，将已消耗预算清零。
-
-**警告**: 此操作会清除用户的预算消耗历史，应谨慎使用。
-通常用于：
-- 新的时间周期开始（如每月重置）
-- 测试和开发环境
-- 用户请求重置
-
-**注意**: 此功能需要启用预算管理（设置环境变量 ENABLE_BUDGET_MANAGEMENT=true）
-    """,
-    responses={
-        200: {
-            "description": "成功重置预算",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "status": "success",
-                        "message": "Budget reset for user user_001"
-                    }
-                }
-            }
-        },
-        400: {
-            "description": "预算管理未启用",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "detail": "Budget management is not enabled. Set ENABLE_BUDGET_MANAGEMENT=true"
-                    }
-                }
-            }
-        },
-        500: {
-            "description": "重置失败",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "detail": "Failed to reset budget"
-                    }
-                }
-            }
-        }
-    },
+    description=RESET_BUDGET_DESCRIPTION,
+    responses=RESET_BUDGET_RESPONSES,
     tags=["Budget"]
 )
 async def reset_budget(user_id: str):
@@ -656,66 +565,8 @@ async def reset_budget(user_id: str):
 @router.get(
     "/budget/{user_id}/history",
     summary="获取用户预算历史",
-    description="""
-获取指定用户的预算消耗历史记录。
-
-返回用户的所有预算交易记录，包括：
-- 交易ID
-- 执行的查询
-- 消耗的 epsilon 值
-- 时间戳
-
-可用于：
-- 审计用户的隐私预算使用情况
-- 分析查询模式
-- 预算消耗趋势分析
-
-**注意**: 此功能需要启用预算管理（设置环境变量 ENABLE_BUDGET_MANAGEMENT=true）
-    """,
-    responses={
-        200: {
-            "description": "成功返回预算历史",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "status": "success",
-                        "data": {
-                            "user_id": "user_001",
-                            "transactions": [
-                                {
-                                    "transaction_id": "txn_abc123",
-                                    "user_id": "user_001",
-                                    "query": "SELECT COUNT(*) FROM users;",
-                                    "epsilon_consumed": 1.0,
-                                    "timestamp": "2024-12-24T10:30:00Z",
-                                    "query_type": "DP"
-                                },
-                                {
-                                    "transaction_id": "txn_def456",
-                                    "user_id": "user_001",
-                                    "query": "SELECT AVG(salary) FROM employees;",
-                                    "epsilon_consumed": 1.5,
-                                    "timestamp": "2024-12-24T10:35:00Z",
-                                    "query_type": "DP"
-                                }
-                            ],
-                            "count": 2
-                        }
-                    }
-                }
-            }
-        },
-        400: {
-            "description": "预算管理未启用",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "detail": "Budget management is not enabled. Set ENABLE_BUDGET_MANAGEMENT=true"
-                    }
-                }
-            }
-        }
-    },
+    description=GET_BUDGET_HISTORY_DESCRIPTION,
+    responses=GET_BUDGET_HISTORY_RESPONSES,
     tags=["Budget"]
 )
 async def get_budget_history(
@@ -740,14 +591,14 @@ async def get_budget_history(
     
     history = driver.budget_manager.get_budget_history(user_id, limit=limit)
     
-    return {
+    return _json_response({
         "status": "success",
         "data": {
             "user_id": user_id,
-            "transactions": [t.to_dict() for t in history],
+            "transactions": history,
             "count": len(history)
         }
-    }
+    })
 
 
 # ==================== v3.0 Audit APIs ====================
@@ -772,15 +623,15 @@ async def get_audit_logs(
         offset=offset,
     )
     
-    logs = logger.filter_logs(filter_criteria)
+    logs = await asyncio.to_thread(logger.filter_logs, filter_criteria)
     
-    return {
+    return _json_response({
         "status": "success",
         "data": {
-            "logs": [log.to_dict() for log in logs],
+            "logs": logs,
             "count": len(logs),
         }
-    }
+    })
 
 
 @router.get(
@@ -809,18 +660,30 @@ async def get_audit_statistics():
 async def export_audit_logs(
     format: str = Query(default="json", description="导出格式 (json/csv)"),
     user_id: Optional[str] = Query(default=None, description="按用户ID过滤"),
+    limit: Optional[int] = Query(default=None, ge=1, description="导出记录数量限制 (默认全部)"),
+    offset: int = Query(default=0, ge=0, description="偏移量"),
 ):
-    """导出审计日志"""
+    """
+    导出审计日志
+    
+    以流式响应逐条输出, 不在内存中拼接整个导出文件。
+    """
     logger = get_audit_logger()
     
-    filter_criteria = AuditFilter(user_id=user_id, limit=100000)
+    filter_criteria = AuditFilter(user_id=user_id, limit=limit, offset=offset)
     
     if format == "csv":
-        content = logger.export_csv(filter_criteria)
-        return {"status": "success", "format": "csv", "data": content}
+        return StreamingResponse(
+            logger.iter_export_csv(filter_criteria),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="audit_logs.csv"'},
+        )
     else:
-        content = logger.export_json(filter_criteria)
-        return {"status": "success", "format": "json", "data": content}
+        return StreamingResponse(
+            logger.iter_export_json(filter_criteria),
+            media_type="application/json",
+            headers={"Content-Disposition": 'attachment; filename="audit_logs.json"'},
+        )
 
 
 @router.get(
@@ -829,10 +692,12 @@ async def export_audit_logs(
     description="验证审计日志链的完整性 (v3.0)",
     tags=["Audit"]
 )
-async def verify_audit_integrity():
+async def verify_audit_integrity(
+    incremental: bool = Query(default=False, description="只验证上次验证之后新增的条目"),
+):
     """验证审计日志完整性"""
     logger = get_audit_logger()
-    is_valid = logger.verify_chain_integrity()
+    is_valid = await asyncio.to_thread(logger.verify_chain_integrity, incremental)
     
     return {
         "status": "success",
@@ -858,13 +723,13 @@ async def get_performance_metrics(
     monitor = get_performance_monitor()
     metrics = monitor.get_metrics(limit=limit)
     
-    return {
+    return _json_response({
         "status": "success",
         "data": {
-            "metrics": [m.to_dict() for m in metrics],
+            "metrics": metrics,
             "count": len(metrics),
         }
-    }
+    })
 
 
 @router.get(
@@ -901,14 +766,14 @@ async def get_slow_queries(
     monitor = get_performance_monitor()
     slow_queries = monitor.get_slow_queries(limit=limit)
     
-    return {
+    return _json_response({
         "status": "success",
         "data": {
-            "slow_queries": [q.to_dict() for q in slow_queries],
+            "slow_queries": slow_queries,
             "count": len(slow_queries),
             "threshold_ms": monitor.slow_query_threshold_ms,
         }
-    }
+    })
 
 
 @router.get(
@@ -969,53 +834,16 @@ async def service_status_v3():
     """
     获取服务详细状态 (v3.0)
     
-    返回所有v3.0功能的状态信息
+    返回所有v3.0功能的状态信息, 组件统计最多缓存1秒
     """
-    mode = "mock" if _use_mock_mode() else "database"
-    budget_enabled = _enable_budget_management()
-    
-    # 获取各组件统计
-    audit_stats = get_audit_logger().get_statistics()
-    perf_stats = get_performance_monitor().get_statistics()
-    cache_stats = get_query_cache().get_statistics()
-    rate_stats = get_rate_limiter().get_statistics()
-    
-    status = {
+    return {
         "status": "running",
-        "mode": mode,
+        "mode": "mock" if _use_mock_mode() else "database",
         "service": "privacy-query-engine",
         "version": "3.0.0",
         "features": {
-            # v2.0 features
-            "budget_management": budget_enabled,
-            "enhanced_sql_analysis": True,
-            "advanced_privacy_mechanisms": True,
-            "multi_database_support": True,
-            # v3.0 features
-            "audit_logging": True,
-            "performance_monitoring": True,
-            "query_caching": True,
-            "rate_limiting": True,
-            "distributed_support": True,
-            "analytics_integration": True,
+            "budget_management": _enable_budget_management(),
+            **_V3_STATIC_FEATURES,
         },
-        "components": {
-            "audit": {
-                "total_entries": audit_stats.get("total_entries", 0),
-            },
-            "performance": {
-                "total_queries": perf_stats.get("total_queries", 0),
-                "average_time_ms": perf_stats.get("average_time_ms", 0),
-            },
-            "cache": {
-                "entries": cache_stats.get("entries", 0),
-                "hit_rate": cache_stats.get("hit_rate", 0),
-            },
-            "rate_limiter": {
-                "total_requests": rate_stats.get("total_requests", 0),
-                "rejection_rate": rate_stats.get("rejection_rate", 0),
-            },
-        }
+        "components": _component_stats(),
     }
-    
-    return status
@@ -4,7 +4,22 @@ API Schemas - 请求/响应模型
 """
 from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, SkipValidation
+
+
+class RequestContext(BaseModel):
+    """
+    查询上下文模型
+    
+    user_id 为声明字段 (数字ID转为字符串); 会话ID、查询目的等其他元数据原样保留为额外字段
+    """
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+    
+    user_id: Optional[str] = Field(
+        default=None,
+        description="发起查询的用户ID，用于审计和预算管理",
+        examples=["user_001"]
+    )
 
 
 class QueryRequest(BaseModel):
@@ -47,7 +62,7 @@ class QueryRequest(BaseModel):
         examples=["SELECT COUNT(*) FROM users;", "SELECT AVG(salary) FROM employees;"]
     )
     
-    context: Optional[Dict[str, Any]] = Field(
+    context: Optional[RequestContext] = Field(
         default=None,
         description="查询上下文信息。可包含用户ID、会话ID、查询目的等元数据，用于审计和预算管理。",
         examples=[
@@ -155,13 +170,14 @@ class QueryResponseData(BaseModel):
         examples=["SELECT COUNT(*) FROM users;"]
     )
     
-    protected_result: Optional[Any] = Field(
+    # 结果和隐私信息由 QueryDriver 生成, 不逐项校验 (大结果集不再被遍历和复制)
+    protected_result: SkipValidation[Optional[Any]] = Field(
         default=None,
         description="隐私保护后的查询结果。可以是数值、列表、字典等类型，取决于查询类型。",
         examples=[1023, [{"name": "User_***", "email": "***@example.com"}]]
     )
     
-    privacy_info: Optional[Dict[str, Any]] = Field(
+    privacy_info: SkipValidation[Optional[Dict[str, Any]]] = Field(
         default=None,
         description="隐私保护信息，包括使用的方法、参数等详细信息。",
         examples=[
@@ -11,22 +11,39 @@ FastAPI Server - HTTP服务入口
     # Windows PowerShell
     $env:USE_MOCK_DB="false"; $env:PG_HOST="localhost"; $env:PG_DATABASE="privacy"; $env:PG_USER="postgres"; $env:PG_PASSWORD="123456"; uvicorn main.api.server:app --reload --port 8000
 """
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 
-from .routes import router, get_query_driver, reset_query_driver
-from .openapi_config import OpenAPIConfig
+from .routes import router, init_components, reset_query_driver, close_audit_logger, _use_mock_mode
+from .openapi_config import OpenAPIConfig, thaw
 
 
 def _get_run_mode() -> str:
-    """获取运行模式"""
-    use_mock = os.getenv("USE_MOCK_DB", "true").lower()
-    return "mock" if use_mock in ("true", "1", "yes") else "database"
+    """获取运行模式 (复用 routes 中缓存的环境变量配置)"""
+    return "mock" if _use_mock_mode() else "database"
+
+
+def _configure_worker_threads() -> int:
+    """
+    按 WORKER_THREADS 设置工作线程数 (默认 64)
+    
+    查询处理经 asyncio.to_thread 在事件循环的默认线程池中执行, 流式响应等由 anyio 线程池执行,
+    两者使用同一上限。
+    """
+    worker_threads = int(os.getenv("WORKER_THREADS", "64"))
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="query-worker")
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = worker_threads
+    return worker_threads
 
 
 @asynccontextmanager
@@ -37,15 +54,16 @@ async def lifespan(app: FastAPI):
     print("=" * 50)
     print("🚀 Privacy Query Engine 启动中...")
     print(f"📋 运行模式: {mode.upper()}")
+    print(f"🧵 工作线程: {_configure_worker_threads()}")
     
     if mode == "database":
         print(f"🔌 数据库: {os.getenv('PG_HOST', 'localhost')}:{os.getenv('PG_PORT', '5432')}/{os.getenv('PG_DATABASE', 'postgres')}")
     
     print("=" * 50)
     
-    # 预初始化 QueryDriver
+    # 预初始化 QueryDriver 及审计、监控、缓存、限流组件
     try:
-        driver = get_query_driver()
+        driver = init_components()
         if mode == "database":
             status = driver.test_connection()
             if status.get("status") == "connected":
@@ -60,6 +78,7 @@ async def lifespan(app: FastAPI):
     # 关闭时
     print("🛑 Privacy Query Engine 关闭中...")
     reset_query_driver()
+    close_audit_logger()
     print("✅ 资源已释放")
 
 
@@ -72,12 +91,12 @@ def create_app() -> FastAPI:
         title=metadata["title"],
         version=metadata["version"],
         description=metadata["description"],
-        contact=metadata["contact"],
-        license_info=metadata["license"],
+        contact=thaw(metadata["contact"]),
+        license_info=thaw(metadata["license"]),
         docs_url="/docs",
         redoc_url="/redoc",
         lifespan=lifespan,
-        openapi_tags=OpenAPIConfig.get_tags_metadata(),
+        openapi_tags=thaw(OpenAPIConfig.get_tags_metadata()),
     )
     
     # 配置CORS
@@ -121,24 +140,24 @@ def create_app() -> FastAPI:
             version=metadata["version"],
             description=metadata["description"],
             routes=app.routes,
-            tags=OpenAPIConfig.get_tags_metadata(),
+            tags=thaw(OpenAPIConfig.get_tags_metadata()),
         )
         
-        # 添加联系信息和许可证
-        openapi_schema["info"]["contact"] = metadata["contact"]
-        openapi_schema["info"]["license"] = metadata["license"]
+        # 添加联系信息和许可证 (配置为只读映射, 转为普通字典后嵌入)
+        openapi_schema["info"]["contact"] = thaw(metadata["contact"])
+        openapi_schema["info"]["license"] = thaw(metadata["license"])
         
         # 添加服务器列表
         openapi_schema["servers"] = OpenAPIConfig.get_servers()
         
         # 添加外部文档链接
-        openapi_schema["externalDocs"] = OpenAPIConfig.get_external_docs()
+        openapi_schema["externalDocs"] = thaw(OpenAPIConfig.get_external_docs())
         
         # 添加安全方案（可选）
         if "components" not in openapi_schema:
             openapi_schema["components"] = {}
         
-        openapi_schema["components"]["securitySchemes"] = OpenAPIConfig.get_security_schemes()
+        openapi_schema["components"]["securitySchemes"] = thaw(OpenAPIConfig.get_security_schemes())
         
         # 缓存 schema
         app.openapi_schema = openapi_schema
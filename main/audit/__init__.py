@@ -12,6 +12,7 @@ from .models import (
     PrivacyMethod,
 )
 from .logger import AuditLogger
+from .sink import AuditFileSink
 
 __all__ = [
     "QueryEvent",
@@ -19,6 +20,7 @@ __all__ = [
     "AuditLogEntry",
     "AuditFilter",
     "AuditLogger",
+    "AuditFileSink",
     "EventType",
     "PrivacyMethod",
 ]
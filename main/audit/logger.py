@@ -5,8 +5,10 @@ Audit Logger (v3.0)
 """
 import json
 import uuid
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
 from threading import Lock
 
 from .models import (
@@ -17,6 +19,53 @@ from .models import (
     PrivacyEvent,
     PrivacyMethod,
 )
+from .sink import AuditFileSink
+
+
+# CSV 导出的列
+_CSV_HEADER = "entry_id,event_type,timestamp,user_id,query_id,privacy_method,epsilon,rejection_reason"
+
+
+def _csv_row(entry: AuditLogEntry) -> str:
+    """将日志条目格式化为一行CSV (不含换行)"""
+    query_id = ""
+    privacy_method = ""
+    epsilon = ""
+    
+    if entry.query_event:
+        query_id = entry.query_event.query_id
+    if entry.privacy_event:
+        query_id = entry.privacy_event.query_id
+        privacy_method = entry.privacy_event.privacy_method.value
+        epsilon = str(entry.privacy_event.epsilon) if entry.privacy_event.epsilon else ""
+    
+    rejection = entry.rejection_reason or ""
+    # 转义CSV特殊字符
+    rejection = rejection.replace('"', '""')
+    if ',' in rejection or '"' in rejection:
+        rejection = f'"{rejection}"'
+    
+    return (
+        f"{entry.entry_id},{entry.event_type.value},{entry.timestamp.isoformat()},"
+        f"{entry.user_id},{query_id},{privacy_method},{epsilon},{rejection}"
+    )
+
+
+# 流式导出时每段包含的条目数: 成批产出, 减少逐行产出带来的响应发送次数
+_EXPORT_CHUNK_ENTRIES = 256
+
+
+def _chunks(entries: Iterator[AuditLogEntry]) -> Iterator[List[AuditLogEntry]]:
+    """将条目按 _EXPORT_CHUNK_ENTRIES 条一段分组"""
+    while True:
+        chunk = list(islice(entries, _EXPORT_CHUNK_ENTRIES))
+        if not chunk:
+            return
+        yield chunk
+
+
+# 日志记录器创建的条目先不计算哈希, 由 _add_entry 接入日志链时计算 (避免计算两次)
+_HASH_PENDING = ""
 
 
 class AuditLogger:
@@ -30,17 +79,25 @@ class AuditLogger:
     - 合规性导出格式
     """
     
-    def __init__(self, max_entries: int = 10000):
+    def __init__(self, max_entries: int = 10000, sink: Optional[AuditFileSink] = None):
         """
         初始化审计日志记录器
         
         Args:
             max_entries: 内存中保留的最大条目数
+            sink: 持久化输出 (可选), 每个新条目按顺序交给它异步写入
         """
-        self._entries: List[AuditLogEntry] = []
+        self._entries: Deque[AuditLogEntry] = deque()
         self._max_entries = max_entries
+        # 按用户ID索引的条目 (与 _entries 同序), 按用户过滤时只扫描该用户的条目
+        self._by_user: Dict[str, Deque[AuditLogEntry]] = {}
         self._lock = Lock()
         self._last_hash: Optional[str] = None
+        self._sink = sink
+        
+        # 增量验证的进度: 因超出上限被移除的条目数, 以及已验证过的条目总数 (均从第一条日志起计)
+        self._dropped = 0
+        self._verified_upto = 0
     
     def _generate_entry_id(self) -> str:
         """生成唯一的条目ID"""
@@ -55,10 +112,21 @@ class AuditLogger:
             self._last_hash = entry.entry_hash
             
             self._entries.append(entry)
+            user_entries = self._by_user.get(entry.user_id)
+            if user_entries is None:
+                user_entries = self._by_user[entry.user_id] = deque()
+            user_entries.append(entry)
+            if self._sink is not None:
+                self._sink.append(entry)
             
-            # 如果超过最大条目数，移除最旧的
-            if len(self._entries) > self._max_entries:
-                self._entries = self._entries[-self._max_entries:]
+            # 如果超过最大条目数，移除最旧的 (它也是所属用户最旧的条目)
+            while len(self._entries) > self._max_entries:
+                oldest = self._entries.popleft()
+                user_entries = self._by_user[oldest.user_id]
+                user_entries.popleft()
+                if not user_entries:
+                    del self._by_user[oldest.user_id]
+                self._dropped += 1
         
         return entry
     
@@ -95,6 +163,7 @@ class AuditLogger:
             user_id=user_id,
             query_event=query_event,
             metadata=metadata or {},
+            entry_hash=_HASH_PENDING,
         )
         
         return self._add_entry(entry)
@@ -133,6 +202,7 @@ class AuditLogger:
             user_id=user_id,
             privacy_event=privacy_event,
             metadata=metadata or {},
+            entry_hash=_HASH_PENDING,
         )
         
         return self._add_entry(entry)
@@ -160,6 +230,7 @@ class AuditLogger:
             query_event=query_event,
             rejection_reason=rejection_reason,
             metadata=metadata or {},
+            entry_hash=_HASH_PENDING,
         )
         
         return self._add_entry(entry)
@@ -184,6 +255,7 @@ class AuditLogger:
                 "remaining_budget": remaining_budget,
                 **(metadata or {}),
             },
+            entry_hash=_HASH_PENDING,
         )
         
         return self._add_entry(entry)
@@ -206,6 +278,7 @@ class AuditLogger:
                 "reset_reason": reset_reason,
                 **(metadata or {}),
             },
+            entry_hash=_HASH_PENDING,
         )
         
         return self._add_entry(entry)
@@ -228,6 +301,7 @@ class AuditLogger:
                 "changes": changes,
                 **(metadata or {}),
             },
+            entry_hash=_HASH_PENDING,
         )
         
         return self._add_entry(entry)
@@ -252,20 +326,42 @@ class AuditLogger:
                 "query_id": query_id,
                 **(metadata or {}),
             },
+            entry_hash=_HASH_PENDING,
         )
         
         return self._add_entry(entry)
     
+    def _candidates(self, filter_criteria: AuditFilter) -> Sequence[AuditLogEntry]:
+        """可能匹配过滤条件的条目: 指定用户时为该用户的条目, 否则为全部条目 (调用方持有锁)"""
+        if filter_criteria.user_id:
+            return self._by_user.get(filter_criteria.user_id, ())
+        return self._entries
+    
     def filter_logs(self, filter_criteria: AuditFilter) -> List[AuditLogEntry]:
         """根据条件过滤日志"""
         with self._lock:
-            filtered = [e for e in self._entries if filter_criteria.matches(e)]
+            filtered = [e for e in self._candidates(filter_criteria) if filter_criteria.matches(e)]
             
             # 应用分页
             start = filter_criteria.offset
-            end = start + filter_criteria.limit
+            end = None if filter_criteria.limit is None else start + filter_criteria.limit
             return filtered[start:end]
     
+    def _iter_entries(self, filter_criteria: Optional[AuditFilter]) -> Iterator[AuditLogEntry]:
+        """
+        按条件逐条产出日志
+        
+        在锁内只复制条目引用, 过滤和分页在迭代时进行, 不构建过滤结果列表。
+        """
+        with self._lock:
+            if filter_criteria is None:
+                return iter(list(self._entries))
+            entries = list(self._candidates(filter_criteria))
+        
+        start = filter_criteria.offset
+        end = None if filter_criteria.limit is None else start + filter_criteria.limit
+        return islice(filter(filter_criteria.matches, entries), start, end)
+    
     def get_logs_by_user(self, user_id: str, limit: int = 100) -> List[AuditLogEntry]:
         """获取指定用户的日志"""
         filter_criteria = AuditFilter(user_id=user_id, limit=limit)
@@ -290,30 +386,43 @@ class AuditLogger:
         )
         return self.filter_logs(filter_criteria)
     
-    def verify_chain_integrity(self) -> bool:
-        """验证日志链的完整性"""
+    def verify_chain_integrity(self, incremental: bool = False) -> bool:
+        """
+        验证日志链的完整性
+        
+        在锁内取条目快照后在锁外逐条重算哈希, 验证期间不阻塞新日志的写入。
+        
+        Args:
+            incremental: 为 True 时只验证上次验证通过之后新增的条目 (及其与前一条目的链接),
+                不再重算已验证条目的哈希, 因此发现不了已验证条目在内存中被修改的情况
+        """
         with self._lock:
-            if not self._entries:
-                return True
-            
-            # 验证第一个条目
-            if not self._entries[0].verify_integrity():
+            entries = list(self._entries)
+            dropped = self._dropped
+        
+        start = max(0, self._verified_upto - dropped) if incremental else 0
+        if start >= len(entries):
+            return True
+        
+        # 验证第一个条目
+        if not entries[start].verify_integrity():
+            return False
+        if start > 0 and entries[start].previous_hash != entries[start - 1].entry_hash:
+            return False
+        
+        # 验证链
+        for previous, current in zip(entries[start:], entries[start + 1:]):
+            # 验证链接
+            if current.previous_hash != previous.entry_hash:
                 return False
             
-            # 验证链
-            for i in range(1, len(self._entries)):
-                current = self._entries[i]
-                previous = self._entries[i - 1]
-                
-                # 验证当前条目完整性
-                if not current.verify_integrity():
-                    return False
-                
-                # 验证链接
-                if current.previous_hash != previous.entry_hash:
-                    return False
-            
-            return True
+            # 验证当前条目完整性
+            if not current.verify_integrity():
+                return False
+        
+        with self._lock:
+            self._verified_upto = max(self._verified_upto, dropped + len(entries))
+        return True
     
     def export_json(self, filter_criteria: AuditFilter = None) -> str:
         """导出为JSON格式"""
@@ -341,34 +450,47 @@ class AuditLogger:
             with self._lock:
                 entries = list(self._entries)
         
-        lines = [
-            "entry_id,event_type,timestamp,user_id,query_id,privacy_method,epsilon,rejection_reason"
-        ]
+        lines = [_CSV_HEADER]
+        lines.extend(_csv_row(entry) for entry in entries)
+        return "\n".join(lines)
+    
+    def iter_export_csv(self, filter_criteria: AuditFilter = None) -> Iterator[str]:
+        """
+        分段导出CSV格式, 每段包含最多 _EXPORT_CHUNK_ENTRIES 行
         
-        for entry in entries:
-            query_id = ""
-            privacy_method = ""
-            epsilon = ""
-            
-            if entry.query_event:
-                query_id = entry.query_event.query_id
-            if entry.privacy_event:
-                query_id = entry.privacy_event.query_id
-                privacy_method = entry.privacy_event.privacy_method.value
-                epsilon = str(entry.privacy_event.epsilon) if entry.privacy_event.epsilon else ""
-            
-            rejection = entry.rejection_reason or ""
-            # 转义CSV特殊字符
-            rejection = rejection.replace('"', '""')
-            if ',' in rejection or '"' in rejection:
-                rejection = f'"{rejection}"'
-            
-            lines.append(
-                f"{entry.entry_id},{entry.event_type.value},{entry.timestamp.isoformat()},"
-                f"{entry.user_id},{query_id},{privacy_method},{epsilon},{rejection}"
-            )
+        列与转义规则同 export_csv, 用于流式响应, 不在内存中拼接整个文件。
         
-        return "\n".join(lines)
+        Args:
+            filter_criteria: 过滤条件 (None 表示全部日志)
+        
+        Yields:
+            CSV 文本片段, 每段为若干完整的行 (以换行结尾)
+        """
+        yield _CSV_HEADER + "\n"
+        for chunk in _chunks(self._iter_entries(filter_criteria)):
+            yield "".join([_csv_row(entry) + "\n" for entry in chunk])
+    
+    def iter_export_json(self, filter_criteria: AuditFilter = None) -> Iterator[str]:
+        """
+        分段导出JSON格式
+        
+        字段同 export_json (不带缩进), 条目边过滤边序列化产出, 不收集匹配结果;
+        total_entries 因此放在 entries 之后输出。
+        
+        Args:
+            filter_criteria: 过滤条件 (None 表示全部日志)
+        
+        Yields:
+            JSON 文本片段, 拼接后为完整的JSON文档
+        """
+        yield f'{{"export_timestamp": {json.dumps(datetime.now().isoformat())}, "entries": ['
+        
+        count = 0
+        for chunk in _chunks(self._iter_entries(filter_criteria)):
+            yield (", " if count else "") + ", ".join([entry.to_json() for entry in chunk])
+            count += len(chunk)
+        
+        yield f'], "total_entries": {count}}}'
     
     def export_compliance_report(
         self,
@@ -394,6 +516,11 @@ class AuditLogger:
             return self.export_csv(filter_criteria)
         return self.export_json(filter_criteria)
     
+    def get_entry_count(self) -> int:
+        """获取当前保留的日志条目数 (不遍历日志)"""
+        with self._lock:
+            return len(self._entries)
+    
     def get_statistics(
         self,
         start_time: datetime = None,
@@ -438,8 +565,16 @@ class AuditLogger:
         
         return stats
     
+    def close(self):
+        """关闭持久化输出, 等待已记录的条目写入完成"""
+        if self._sink is not None:
+            self._sink.close()
+    
     def clear(self):
         """清空日志（仅用于测试）"""
         with self._lock:
             self._entries.clear()
+            self._by_user.clear()
             self._last_hash = None
+            self._dropped = 0
+            self._verified_upto = 0
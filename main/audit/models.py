@@ -10,6 +10,8 @@ from typing import Any, Dict, List, Optional
 import hashlib
 import json
 
+from ..utils.compat import DATACLASS_SLOTS, orjson
+
 
 class EventType(Enum):
     """审计事件类型"""
@@ -32,7 +34,7 @@ class PrivacyMethod(Enum):
     NONE = "none"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class QueryEvent:
     """查询事件记录"""
     query_id: str
@@ -63,7 +65,7 @@ class QueryEvent:
         }
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class PrivacyEvent:
     """隐私保护事件记录"""
     query_id: str
@@ -92,7 +94,7 @@ class PrivacyEvent:
         }
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class AuditLogEntry:
     """审计日志条目"""
     entry_id: str
@@ -144,6 +146,17 @@ class AuditLogEntry:
             "previous_hash": self.previous_hash,
             "entry_hash": self.entry_hash,
         }
+    
+    def to_json(self) -> str:
+        """序列化为单行JSON文本 (orjson 可用时由其编码, 遇到其不支持的值时退回标准库)"""
+        data = self.to_dict()
+        if orjson is not None:
+            try:
+                return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+            except TypeError:
+                # orjson不支持的值 (如超过64位的整数) 交给标准库处理
+                pass
+        return json.dumps(data, ensure_ascii=False)
 
 
 @dataclass
@@ -156,7 +169,7 @@ class AuditFilter:
     query_id: Optional[str] = None
     privacy_method: Optional[PrivacyMethod] = None
     include_rejected: bool = True
-    limit: int = 100
+    limit: Optional[int] = 100  # None 表示不限制条数
     offset: int = 0
     
     def matches(self, entry: AuditLogEntry) -> bool:
@@ -0,0 +1,114 @@
+"""
+Audit File Sink (v3.0)
+
+将审计日志条目以 JSON Lines 格式追加到文件, 由后台线程批量写入。
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from typing import List, Optional, Union
+
+from .models import AuditLogEntry
+
+
+logger = logging.getLogger(__name__)
+
+# 队列中的关闭标记
+_CLOSE = object()
+
+
+class AuditFileSink:
+    """
+    审计日志文件输出
+
+    append() 只把条目放入队列即返回; 后台线程收到条目后继续收集, 直到攒满 max_batch 条
+    或距第一条已过 flush_interval 秒, 序列化后一次写入并 fsync, 写入和落盘的开销由整批条目分摊。
+    无法序列化的条目或写入失败的批次记录错误日志并计入 dropped, 后台线程继续处理后续条目。
+    """
+
+    def __init__(self, path: Union[str, Path], max_batch: int = 64, flush_interval: float = 0.0):
+        """
+        初始化文件输出
+
+        Args:
+            path: 日志文件路径 (追加写入, 不存在时创建)
+            max_batch: 每批写入的最大条目数
+            flush_interval: 每批最多等待的秒数 (0 表示只取队列中已有的条目)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._queue: SimpleQueue = SimpleQueue()
+        self._closed = False
+        self.dropped = 0  # 未能写入文件的条目数
+        self._thread = threading.Thread(target=self._run, name="audit-file-sink", daemon=True)
+        self._thread.start()
+
+    def append(self, entry: AuditLogEntry):
+        """将条目加入写入队列"""
+        if self._closed:
+            raise ValueError("AuditFileSink is closed")
+        self._queue.put(entry)
+
+    def _next_batch(self) -> Optional[List[AuditLogEntry]]:
+        """阻塞等待下一批条目, 收到关闭标记且队列已空时返回 None"""
+        item = self._queue.get()
+        if item is _CLOSE:
+            return None
+
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except Empty:
+                break
+            if item is _CLOSE:
+                # 先写完当前批次, 下一轮再结束
+                self._queue.put(_CLOSE)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """后台写入循环"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            lines = []
+            for entry in batch:
+                try:
+                    lines.append(entry.to_json() + "\n")
+                except Exception:
+                    logger.exception("Failed to serialize audit entry %s", entry.entry_id)
+                    self.dropped += 1
+            if not lines:
+                continue
+            try:
+                self._write("".join(lines).encode("utf-8"))
+            except Exception:
+                logger.exception("Failed to write %d audit entries to %s", len(lines), self.path)
+                self.dropped += len(lines)
+    
+    def _write(self, data: bytes):
+        """写入全部数据并落盘"""
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+        os.fsync(self._fd)
+
+    def close(self):
+        """写完队列中剩余的条目后关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        os.close(self._fd)
@@ -6,7 +6,7 @@ import threading
 import uuid
 import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from .models import (
     BudgetAccount,
@@ -44,7 +44,9 @@ class PrivacyBudgetManager:
         """
         self._accounts: Dict[str, BudgetAccount] = {}
         self._transactions: Dict[str, List[BudgetTransaction]] = {}
-        self._lock = threading.RLock()
+        # 全局锁只用于创建账户; 账户的读写使用各自的锁, 不同用户的查询互不阻塞
+        self._lock = threading.Lock()
+        self._account_locks: Dict[str, threading.Lock] = {}
         
         self.default_budget = default_budget
         # 使用传入的role_budgets或创建新的，确保default角色使用default_budget
@@ -64,6 +66,10 @@ class PrivacyBudgetManager:
         total_budget: Optional[float] = None
     ) -> BudgetAccount:
         """获取或创建用户预算账户"""
+        account = self._accounts.get(user_id)
+        if account is not None:
+            return account
+        
         with self._lock:
             if user_id not in self._accounts:
                 # 根据角色确定预算
@@ -80,11 +86,18 @@ class PrivacyBudgetManager:
                         timezone=self.default_reset_schedule.timezone
                     )
                 )
-                self._accounts[user_id] = account
                 self._transactions[user_id] = []
+                self._account_locks[user_id] = threading.Lock()
+                # 最后登记账户, 无锁读到账户时其锁和交易列表已就绪
+                self._accounts[user_id] = account
             
             return self._accounts[user_id]
     
+    def _locked_account(self, user_id: str) -> Tuple[BudgetAccount, threading.Lock]:
+        """获取 (必要时创建) 用户账户及保护它的锁"""
+        account = self.get_or_create_account(user_id)
+        return account, self._account_locks[user_id]
+    
     def check_budget(self, user_id: str, epsilon: float) -> BudgetCheckResult:
         """
         检查用户是否有足够的预算
@@ -96,9 +109,8 @@ class PrivacyBudgetManager:
         Returns:
             BudgetCheckResult对象
         """
-        with self._lock:
-            account = self.get_or_create_account(user_id)
-            
+        account, lock = self._locked_account(user_id)
+        with lock:
             # 检查是否需要重置预算
             self._check_and_reset_if_needed(account)
             
@@ -138,9 +150,8 @@ class PrivacyBudgetManager:
         Returns:
             是否成功消耗预算
         """
-        with self._lock:
-            account = self.get_or_create_account(user_id)
-            
+        account, lock = self._locked_account(user_id)
+        with lock:
             # 检查是否需要重置预算
             self._check_and_reset_if_needed(account)
             
@@ -169,15 +180,15 @@ class PrivacyBudgetManager:
     
     def get_remaining_budget(self, user_id: str) -> float:
         """获取用户剩余预算"""
-        with self._lock:
-            account = self.get_or_create_account(user_id)
+        account, lock = self._locked_account(user_id)
+        with lock:
             self._check_and_reset_if_needed(account)
             return account.remaining_budget
     
     def get_budget_status(self, user_id: str) -> Dict:
         """获取用户预算状态"""
-        with self._lock:
-            account = self.get_or_create_account(user_id)
+        account, lock = self._locked_account(user_id)
+        with lock:
             self._check_and_reset_if_needed(account)
             
             return {
@@ -193,32 +204,33 @@ class PrivacyBudgetManager:
     
     def get_budget_history(self, user_id: str, limit: int = 100) -> List[BudgetTransaction]:
         """获取用户预算历史"""
-        with self._lock:
-            if user_id not in self._transactions:
-                return []
-            
+        lock = self._account_locks.get(user_id)
+        if lock is None:
+            return []
+        
+        with lock:
             transactions = self._transactions[user_id]
             return sorted(transactions, key=lambda t: t.timestamp, reverse=True)[:limit]
     
     def reset_budget(self, user_id: str) -> None:
         """手动重置用户预算"""
-        with self._lock:
-            account = self.get_or_create_account(user_id)
+        account, lock = self._locked_account(user_id)
+        with lock:
             account.consumed_budget = 0.0
             account.last_reset = datetime.now()
             account.updated_at = datetime.now()
     
     def set_budget(self, user_id: str, total_budget: float) -> None:
         """设置用户总预算"""
-        with self._lock:
-            account = self.get_or_create_account(user_id)
+        account, lock = self._locked_account(user_id)
+        with lock:
             account.total_budget = total_budget
             account.updated_at = datetime.now()
     
     def set_reset_schedule(self, user_id: str, schedule: ResetSchedule) -> None:
         """设置用户预算重置计划"""
-        with self._lock:
-            account = self.get_or_create_account(user_id)
+        account, lock = self._locked_account(user_id)
+        with lock:
             account.reset_schedule = schedule
             account.updated_at = datetime.now()
     
@@ -6,6 +6,8 @@ from datetime import datetime, time
 from typing import List, Optional
 from enum import Enum
 
+from ..utils.compat import DATACLASS_SLOTS
+
 
 class ResetFrequency(Enum):
     """预算重置频率"""
@@ -74,7 +76,7 @@ class BudgetAccount:
         }
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class BudgetTransaction:
     """预算交易记录"""
     transaction_id: str
@@ -1,6 +1,7 @@
 # Core module - 核心控制器
 from .driver import QueryDriver
 from .context import QueryContext
+from .result import QueryDriverResult
 
-__all__ = ["QueryDriver", "QueryContext"]
+__all__ = ["QueryDriver", "QueryContext", "QueryDriverResult"]
 
@@ -6,8 +6,10 @@ from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 from datetime import datetime
 
+from ..utils.compat import DATACLASS_SLOTS
 
-@dataclass
+
+@dataclass(**DATACLASS_SLOTS)
 class QueryContext:
     """查询上下文"""
     
@@ -9,6 +9,7 @@ from ..policy import PolicyEngine
 from ..executor import QueryExecutor, ExecutionMode, DatabaseConnection
 from ..budget import PrivacyBudgetManager, BudgetCheckResult
 from .context import QueryContext
+from .result import QueryDriverResult
 
 
 class QueryDriver:
@@ -159,7 +160,7 @@ class QueryDriver:
             enable_budget_management=enable_budget_management,
         )
     
-    def process_query(self, original_sql: str, context: QueryContext = None) -> Dict[str, Any]:
+    def process_query(self, original_sql: str, context: QueryContext = None) -> QueryDriverResult:
         """
         处理查询的主入口
         
@@ -168,7 +169,7 @@ class QueryDriver:
             context: 查询上下文(可选)
             
         Returns:
-            包含隐私保护结果的字典
+            QueryDriverResult 包含隐私保护结果
         """
         context = context or QueryContext()
         
@@ -182,13 +183,14 @@ class QueryDriver:
         if self.enable_budget_management and self.budget_manager:
             budget_result = self._check_and_consume_budget(context, policy_decision)
             if not budget_result.allowed:
-                return {
-                    "success": False,
-                    "error": "insufficient_budget",
-                    "message": budget_result.message,
-                    "remaining_budget": budget_result.remaining_budget,
-                    "requested_budget": budget_result.requested_budget,
-                }
+                return QueryDriverResult(
+                    type="BUDGET_ERROR",
+                    original_query=original_sql,
+                    error="insufficient_budget",
+                    message=budget_result.message,
+                    remaining_budget=budget_result.remaining_budget,
+                    requested_budget=budget_result.requested_budget,
+                )
         
         # Step 3: Calculate Multi-Table Sensitivity (v2.0)
         if analysis_result.joins:
@@ -196,16 +198,16 @@ class QueryDriver:
             context.metadata["multi_table_sensitivity"] = sensitivity
         
         # Step 4: Execute & Apply Privacy Protection - 执行并应用隐私保护
-        protected_result = self.executor.execute(
+        protected_result = QueryDriverResult.from_dict(self.executor.execute(
             original_sql=original_sql,
             analysis_result=analysis_result,
             policy_decision=policy_decision,
             context=context,
-        )
+        ))
         
         # 添加v2.0元数据
         if self.enable_budget_management and self.budget_manager and context.user_id:
-            protected_result["budget_status"] = self.budget_manager.get_budget_status(context.user_id)
+            protected_result.budget_status = self.budget_manager.get_budget_status(context.user_id)
         
         return protected_result
     
@@ -0,0 +1,75 @@
+"""
+QueryDriverResult - 查询处理结果
+QueryDriver.process_query 的返回值 (旧版本返回字典, 字典式访问暂时保留并给出弃用警告)
+"""
+import warnings
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from ..utils.compat import DATACLASS_SLOTS
+
+
+@dataclass(**DATACLASS_SLOTS)
+class QueryDriverResult:
+    """查询处理结果"""
+
+    # 处理类型: DP / DeID / PASS / ERROR / BUDGET_ERROR
+    type: str = "UNKNOWN"
+    original_query: Optional[str] = None
+    protected_result: Any = None
+    privacy_info: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    # 预算不足时的说明 (v2.0)
+    message: Optional[str] = None
+    remaining_budget: Optional[float] = None
+    requested_budget: Optional[float] = None
+
+    # 启用预算管理时的用户预算状态 (v2.0)
+    budget_status: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, result: Dict[str, Any]) -> "QueryDriverResult":
+        """由执行器返回的结果字典构建"""
+        return cls(
+            type=result.get("type", "UNKNOWN"),
+            original_query=result.get("original_query"),
+            protected_result=result.get("protected_result"),
+            privacy_info=result.get("privacy_info"),
+            error=result.get("error"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典, 省略未设置的预算相关字段; 预算不足时同旧版字典带 success=False"""
+        data = {
+            "type": self.type,
+            "original_query": self.original_query,
+            "protected_result": self.protected_result,
+            "privacy_info": self.privacy_info,
+            "error": self.error,
+        }
+        for name in ("message", "remaining_budget", "requested_budget", "budget_status"):
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        if self.type == "BUDGET_ERROR":
+            data["success"] = False
+        return data
+    
+    def __getitem__(self, key: str) -> Any:
+        """按旧版字典的键取值 (已弃用, 将在下个版本移除; 未设置的预算字段同字典一样抛出KeyError)"""
+        warnings.warn(
+            "process_query 现在返回 QueryDriverResult, 请改用属性访问或 to_dict()",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self.to_dict()[key]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """按旧版字典的键取值, 不存在时返回default (已弃用, 将在下个版本移除)"""
+        warnings.warn(
+            "process_query 现在返回 QueryDriverResult, 请改用属性访问或 to_dict()",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self.to_dict().get(key, default)
@@ -6,7 +6,7 @@ QueryExecutor - 查询执行器
 1. ORM 模式: 使用 SQLModel 实体进行类型安全的查询
 2. SQL 模式: 执行原始 SQL 语句
 """
-from typing import Any, Dict, List, Optional, Type, TypeVar, Sequence, Union
+from typing import Any, Dict, List, Optional, Type, TypeVar, Sequence, Union, TYPE_CHECKING
 from enum import Enum
 from dataclasses import dataclass, field
 
@@ -15,10 +15,13 @@ from sqlmodel import SQLModel, select
 from ..analyzer import AnalysisResult
 from ..policy import PolicyDecision
 from ..privacy import DPRewriter, DeIDRewriter
-from ..core.context import QueryContext
 from .mock import MockDatabaseExecutor
 from .database import DatabaseConnection
 
+if TYPE_CHECKING:
+    # main.core.driver 导入本模块, 运行时导入会形成循环
+    from ..core.context import QueryContext
+
 # 泛型类型变量
 T = TypeVar("T", bound=SQLModel)
 
@@ -455,7 +458,7 @@ class QueryExecutor:
         sql: str,
         analysis_result: AnalysisResult,
         policy_decision: PolicyDecision,
-        context: QueryContext = None,
+        context: "QueryContext" = None,
     ) -> QueryResult:
         """
         执行查询并应用隐私保护
@@ -500,7 +503,7 @@ class QueryExecutor:
         original_sql: str,
         analysis_result: AnalysisResult,
         policy_decision: PolicyDecision,
-        context: QueryContext = None,
+        context: "QueryContext" = None,
     ) -> Dict[str, Any]:
         """
         执行查询并应用隐私保护 (兼容旧接口)
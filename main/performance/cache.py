@@ -34,6 +34,45 @@ class CacheEntry:
         self.access_count += 1
 
 
+class _CacheShard:
+    """缓存分片: 一个有序字典及其锁、内存占用和统计, 在分片内按LRU淘汰"""
+    
+    __slots__ = ("entries", "lock", "max_entries", "max_memory_bytes",
+                 "current_memory", "hits", "misses", "evictions")
+    
+    def __init__(self, max_entries: int, max_memory_bytes: int):
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.lock = Lock()
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.current_memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def evict_if_needed(self):
+        """如果需要则淘汰条目 (调用方持有锁)"""
+        # 淘汰过期条目
+        expired_keys = [k for k, v in self.entries.items() if v.is_expired()]
+        for key in expired_keys:
+            self.remove(key)
+        
+        # 如果仍然超过限制，使用LRU淘汰
+        while len(self.entries) >= self.max_entries:
+            self.remove(next(iter(self.entries)))
+        
+        # 检查内存限制
+        while self.current_memory > self.max_memory_bytes and self.entries:
+            self.remove(next(iter(self.entries)))
+    
+    def remove(self, key: str):
+        """移除缓存条目 (调用方持有锁)"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_memory -= entry.size_bytes
+            self.evictions += 1
+
+
 class QueryCache:
     """
     查询缓存
@@ -43,13 +82,20 @@ class QueryCache:
     - 敏感度计算复用
     - LRU淘汰策略
     - 内存限制
+    
+    条目按键分散到多个分片, 每个分片有自己的锁, 不同键的并发读写互不阻塞;
+    条目数和内存上限平分到各分片, LRU淘汰在分片内进行。
     """
     
+    # 每个分片至少容纳的条目数, 容量较小时减少分片数以保持LRU的准确性
+    MIN_SHARD_ENTRIES = 64
+    
     def __init__(
         self,
         max_entries: int = 1000,
         max_memory_mb: float = 50.0,
         default_ttl_seconds: float = 300.0,
+        num_shards: int = 16,
     ):
         """
         初始化查询缓存
@@ -58,25 +104,35 @@ class QueryCache:
             max_entries: 最大缓存条目数
             max_memory_mb: 最大内存使用(MB)
             default_ttl_seconds: 默认TTL(秒)
+            num_shards: 最大分片数
         """
-        self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
-        self._lock = Lock()
         self.max_entries = max_entries
         self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
         self.default_ttl_seconds = default_ttl_seconds
         
-        # 统计
-        self._hits = 0
-        self._misses = 0
-        self._evictions = 0
-        self._current_memory = 0
-    
-    def _generate_key(self, sql: str, context: Dict[str, Any] = None) -> str:
-        """生成缓存键"""
+        shard_count = max(1, min(num_shards, max_entries // self.MIN_SHARD_ENTRIES))
+        self._shards = [
+            _CacheShard(-(-max_entries // shard_count), self.max_memory_bytes // shard_count)
+            for _ in range(shard_count)
+        ]
+    
+    def make_key(self, sql: str, context: Dict[str, Any] = None) -> str:
+        """
+        生成缓存键
+        
+        同一请求需要先查后写时, 可先生成一次键, 再调用 get_by_key/set_by_key, 避免重复计算哈希。
+        """
         content = sql
         if context:
             content += str(sorted(context.items()))
-        return hashlib.sha256(content.encode()).hexdigest()[:32]
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+    
+    def _shard(self, key: str) -> _CacheShard:
+        """键所在的分片"""
+        shards = self._shards
+        if len(shards) == 1:
+            return shards[0]
+        return shards[hash(key) % len(shards)]
     
     def _estimate_size(self, value: Any) -> int:
         """估算值的大小"""
@@ -86,51 +142,30 @@ class QueryCache:
         except TypeError:
             return 1024  # 默认1KB
     
-    def _evict_if_needed(self):
-        """如果需要则淘汰条目"""
-        # 淘汰过期条目
-        expired_keys = [k for k, v in self._cache.items() if v.is_expired()]
-        for key in expired_keys:
-            self._remove(key)
-        
-        # 如果仍然超过限制，使用LRU淘汰
-        while len(self._cache) >= self.max_entries:
-            oldest_key = next(iter(self._cache))
-            self._remove(oldest_key)
-        
-        # 检查内存限制
-        while self._current_memory > self.max_memory_bytes and self._cache:
-            oldest_key = next(iter(self._cache))
-            self._remove(oldest_key)
-    
-    def _remove(self, key: str):
-        """移除缓存条目"""
-        if key in self._cache:
-            entry = self._cache.pop(key)
-            self._current_memory -= entry.size_bytes
-            self._evictions += 1
-    
     def get(self, sql: str, context: Dict[str, Any] = None) -> Optional[Any]:
         """获取缓存值"""
-        key = self._generate_key(sql, context)
+        return self.get_by_key(self.make_key(sql, context))
+    
+    def get_by_key(self, key: str) -> Optional[Any]:
+        """按 make_key 生成的键获取缓存值"""
+        shard = self._shard(key)
         
-        with self._lock:
-            if key not in self._cache:
-                self._misses += 1
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                shard.misses += 1
                 return None
             
-            entry = self._cache[key]
-            
             # 检查是否过期
             if entry.is_expired():
-                self._remove(key)
-                self._misses += 1
+                shard.remove(key)
+                shard.misses += 1
                 return None
             
             # 更新访问信息并移到末尾(LRU)
             entry.touch()
-            self._cache.move_to_end(key)
-            self._hits += 1
+            shard.entries.move_to_end(key)
+            shard.hits += 1
             
             return entry.value
     
@@ -142,58 +177,69 @@ class QueryCache:
         ttl_seconds: float = None,
     ):
         """设置缓存值"""
-        key = self._generate_key(sql, context)
+        self.set_by_key(self.make_key(sql, context), value, ttl_seconds)
+    
+    def set_by_key(self, key: str, value: Any, ttl_seconds: float = None):
+        """按 make_key 生成的键设置缓存值"""
         size = self._estimate_size(value)
+        shard = self._shard(key)
         
-        with self._lock:
+        with shard.lock:
             # 如果已存在，先移除
-            if key in self._cache:
-                self._remove(key)
+            shard.remove(key)
             
             # 淘汰旧条目
-            self._evict_if_needed()
+            shard.evict_if_needed()
             
             # 添加新条目
-            entry = CacheEntry(
+            shard.entries[key] = CacheEntry(
                 key=key,
                 value=value,
                 ttl_seconds=ttl_seconds or self.default_ttl_seconds,
                 size_bytes=size,
             )
-            
-            self._cache[key] = entry
-            self._current_memory += size
+            shard.current_memory += size
     
     def invalidate(self, sql: str, context: Dict[str, Any] = None):
         """使缓存失效"""
-        key = self._generate_key(sql, context)
+        key = self.make_key(sql, context)
+        shard = self._shard(key)
         
-        with self._lock:
-            self._remove(key)
+        with shard.lock:
+            shard.remove(key)
     
     def invalidate_all(self):
         """清空所有缓存"""
-        with self._lock:
-            self._cache.clear()
-            self._current_memory = 0
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.current_memory = 0
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取缓存统计"""
-        with self._lock:
-            total_requests = self._hits + self._misses
-            hit_rate = self._hits / total_requests if total_requests > 0 else 0
-            
-            return {
-                "entries": len(self._cache),
-                "max_entries": self.max_entries,
-                "memory_bytes": self._current_memory,
-                "max_memory_bytes": self.max_memory_bytes,
-                "memory_usage_percent": (self._current_memory / self.max_memory_bytes * 100) if self.max_memory_bytes > 0 else 0,
-                "hits": self._hits,
-                "misses": self._misses,
-                "hit_rate": hit_rate,
-                "evictions": self._evictions,
-            }
+        entries = memory = hits = misses = evictions = 0
+        for shard in self._shards:
+            with shard.lock:
+                entries += len(shard.entries)
+                memory += shard.current_memory
+                hits += shard.hits
+                misses += shard.misses
+                evictions += shard.evictions
+        
+        total_requests = hits + misses
+        hit_rate = hits / total_requests if total_requests > 0 else 0
+        
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "memory_bytes": memory,
+            "max_memory_bytes": self.max_memory_bytes,
+            "memory_usage_percent": (memory / self.max_memory_bytes * 100) if self.max_memory_bytes > 0 else 0,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hit_rate,
+            "evictions": evictions,
+        }
     
     def get_or_compute(
         self,
@@ -203,7 +249,8 @@ class QueryCache:
         ttl_seconds: float = None,
     ) -> Any:
         """获取缓存值，如果不存在则计算并缓存"""
-        value = self.get(sql, context)
+        key = self.make_key(sql, context)
+        value = self.get_by_key(key)
         if value is not None:
             return value
         
@@ -211,7 +258,7 @@ class QueryCache:
         value = compute_fn()
         
         # 缓存结果
-        self.set(sql, value, context, ttl_seconds)
+        self.set_by_key(key, value, ttl_seconds)
         
         return value
 
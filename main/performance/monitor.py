@@ -3,6 +3,7 @@ Performance Monitor (v3.0)
 
 查询性能监控和指标收集。
 """
+import threading
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -10,8 +11,10 @@ from typing import Any, Dict, List, Optional
 from threading import Lock
 from collections import deque
 
+from ..utils.compat import DATACLASS_SLOTS
 
-@dataclass
+
+@dataclass(**DATACLASS_SLOTS)
 class QueryMetrics:
     """查询性能指标"""
     query_id: str
@@ -60,18 +63,26 @@ class PerformanceMonitor:
         max_metrics: int = 10000,
         slow_query_threshold_ms: float = 1000.0,
         memory_limit_mb: float = 100.0,
+        buffer_size: int = 128,
     ):
         """
         初始化性能监控器
         
+        结束的查询先记入所在线程的缓冲区, 缓冲区满 buffer_size 条时才加锁批量汇总;
+        读取指标和统计前会先汇总所有线程缓冲区中的查询。
+        
         Args:
             max_metrics: 保留的最大指标数量
             slow_query_threshold_ms: 慢查询阈值(毫秒)
             memory_limit_mb: 内存限制(MB)
+            buffer_size: 每个线程缓冲区的最大条目数
         """
         self._metrics: deque = deque(maxlen=max_metrics)
         self._active_queries: Dict[str, QueryMetrics] = {}
         self._lock = Lock()
+        self._buffer_size = buffer_size
+        self._local = threading.local()
+        self._buffers: List[deque] = []
         self.slow_query_threshold_ms = slow_query_threshold_ms
         self.memory_limit_mb = memory_limit_mb
         
@@ -90,65 +101,90 @@ class PerformanceMonitor:
             start_time=datetime.now(),
         )
         
-        with self._lock:
-            self._active_queries[query_id] = metrics
+        # 单个查询的指标只由处理它的线程修改, 字典的读写本身是原子的, 无需加锁
+        self._active_queries[query_id] = metrics
         
         return metrics
     
     def record_analysis_time(self, query_id: str, time_ms: float):
         """记录分析时间"""
-        with self._lock:
-            if query_id in self._active_queries:
-                self._active_queries[query_id].analysis_time_ms = time_ms
+        metrics = self._active_queries.get(query_id)
+        if metrics is not None:
+            metrics.analysis_time_ms = time_ms
     
     def record_policy_time(self, query_id: str, time_ms: float):
         """记录策略评估时间"""
-        with self._lock:
-            if query_id in self._active_queries:
-                self._active_queries[query_id].policy_time_ms = time_ms
+        metrics = self._active_queries.get(query_id)
+        if metrics is not None:
+            metrics.policy_time_ms = time_ms
     
     def record_execution_time(self, query_id: str, time_ms: float):
         """记录执行时间"""
-        with self._lock:
-            if query_id in self._active_queries:
-                self._active_queries[query_id].execution_time_ms = time_ms
+        metrics = self._active_queries.get(query_id)
+        if metrics is not None:
+            metrics.execution_time_ms = time_ms
     
     def record_privacy_time(self, query_id: str, time_ms: float):
         """记录隐私处理时间"""
-        with self._lock:
-            if query_id in self._active_queries:
-                self._active_queries[query_id].privacy_time_ms = time_ms
+        metrics = self._active_queries.get(query_id)
+        if metrics is not None:
+            metrics.privacy_time_ms = time_ms
     
     def record_cache_hit(self, query_id: str, hit: bool):
         """记录缓存命中"""
-        with self._lock:
-            if query_id in self._active_queries:
-                self._active_queries[query_id].cache_hit = hit
+        metrics = self._active_queries.get(query_id)
+        if metrics is not None:
+            metrics.cache_hit = hit
     
     def record_result_size(self, query_id: str, size_bytes: int):
         """记录结果大小"""
-        with self._lock:
-            if query_id in self._active_queries:
-                self._active_queries[query_id].result_size_bytes = size_bytes
+        metrics = self._active_queries.get(query_id)
+        if metrics is not None:
+            metrics.result_size_bytes = size_bytes
     
     def record_error(self, query_id: str, error: str):
         """记录错误"""
-        with self._lock:
-            if query_id in self._active_queries:
-                self._active_queries[query_id].error = error
+        metrics = self._active_queries.get(query_id)
+        if metrics is not None:
+            metrics.error = error
     
     def end_query(self, query_id: str) -> Optional[QueryMetrics]:
         """结束查询跟踪"""
-        with self._lock:
-            if query_id not in self._active_queries:
-                return None
-            
-            metrics = self._active_queries.pop(query_id)
-            metrics.end_time = datetime.now()
-            
-            # 计算总时间
-            delta = metrics.end_time - metrics.start_time
-            metrics.total_time_ms = delta.total_seconds() * 1000
+        metrics = self._active_queries.pop(query_id, None)
+        if metrics is None:
+            return None
+        
+        metrics.end_time = datetime.now()
+        
+        # 计算总时间
+        delta = metrics.end_time - metrics.start_time
+        metrics.total_time_ms = delta.total_seconds() * 1000
+        
+        # 记入本线程缓冲区, 满了再加锁汇总
+        buffer = self._local_buffer()
+        buffer.append(metrics)
+        if len(buffer) >= self._buffer_size:
+            with self._lock:
+                self._drain(buffer)
+        
+        return metrics
+    
+    def _local_buffer(self) -> deque:
+        """获取当前线程的缓冲区, 首次使用时创建并登记"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = deque()
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+    
+    def _drain(self, buffer: deque):
+        """将缓冲区中的查询汇总到指标和聚合统计 (调用方持有锁)"""
+        while True:
+            try:
+                metrics = buffer.popleft()
+            except IndexError:
+                return
             
             # 更新聚合统计
             self._total_queries += 1
@@ -165,29 +201,36 @@ class PerformanceMonitor:
             
             # 保存指标
             self._metrics.append(metrics)
-            
-            return metrics
+    
+    def _flush(self):
+        """汇总所有线程缓冲区 (调用方持有锁)"""
+        for buffer in self._buffers:
+            self._drain(buffer)
     
     def get_metrics(self, limit: int = 100) -> List[QueryMetrics]:
         """获取最近的指标"""
         with self._lock:
+            self._flush()
             return list(self._metrics)[-limit:]
     
     def get_metrics_by_user(self, user_id: str, limit: int = 100) -> List[QueryMetrics]:
         """获取指定用户的指标"""
         with self._lock:
+            self._flush()
             user_metrics = [m for m in self._metrics if m.user_id == user_id]
             return user_metrics[-limit:]
     
     def get_slow_queries(self, limit: int = 100) -> List[QueryMetrics]:
         """获取慢查询"""
         with self._lock:
+            self._flush()
             slow = [m for m in self._metrics if m.total_time_ms > self.slow_query_threshold_ms]
             return slow[-limit:]
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取性能统计"""
         with self._lock:
+            self._flush()
             avg_time = self._total_time_ms / self._total_queries if self._total_queries > 0 else 0
             cache_hit_rate = self._cache_hits / self._total_queries if self._total_queries > 0 else 0
             error_rate = self._errors / self._total_queries if self._total_queries > 0 else 0
@@ -208,6 +251,7 @@ class PerformanceMonitor:
     def get_percentiles(self) -> Dict[str, float]:
         """获取响应时间百分位数"""
         with self._lock:
+            self._flush()
             if not self._metrics:
                 return {"p50": 0, "p90": 0, "p95": 0, "p99": 0}
             
@@ -228,6 +272,8 @@ class PerformanceMonitor:
     def clear(self):
         """清空指标（仅用于测试）"""
         with self._lock:
+            for buffer in self._buffers:
+                buffer.clear()
             self._metrics.clear()
             self._active_queries.clear()
             self._total_queries = 0
@@ -6,10 +6,12 @@ Rate Limiter (v3.0)
 import time
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from threading import Lock
 from collections import deque
 
+from ..utils.compat import DATACLASS_SLOTS
+
 
 @dataclass
 class RateLimitResult:
@@ -21,15 +23,54 @@ class RateLimitResult:
     message: str = ""
 
 
+@dataclass(**DATACLASS_SLOTS)
+class _TokenBucket:
+    """
+    令牌桶
+    
+    只保存令牌数和上次补充时间, 访问时按经过的时间惰性补充, 状态大小与请求数无关。
+    """
+    capacity: float  # 桶容量 (窗口内允许的请求数)
+    rate: float  # 每秒补充的令牌数
+    tokens: float  # 当前令牌数 (直接record时可为负)
+    updated: float  # 上次补充的单调时钟时间
+    
+    def refill(self, now: float) -> None:
+        """补充自上次访问以来的令牌, 不超过容量"""
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+    
+    def retry_after(self) -> float:
+        """距离补充出一个令牌的秒数"""
+        return max(0.0, (1.0 - self.tokens) / self.rate) if self.rate > 0 else float("inf")
+
+
+# 各令牌桶超限时的提示, 顺序同 RateLimiter._buckets 的返回值; 只在拒绝时格式化
+_LIMIT_MESSAGES = (
+    "Global rate limit exceeded (per second)",
+    "Global rate limit exceeded (per minute)",
+    "User rate limit exceeded for {user_id}",
+)
+
+
+def _new_bucket(limit: float, window_seconds: float, now: float) -> _TokenBucket:
+    """创建满令牌的桶: 窗口内最多limit个请求, 按limit/window匀速补充"""
+    return _TokenBucket(limit, limit / window_seconds, limit, now)
+
+
 class RateLimiter:
     """
     速率限制器
     
     提供:
-    - 滑动窗口速率限制
+    - 令牌桶速率限制 (每秒/每分钟全局限制, 每用户每分钟限制)
     - 用户级别限制
     - 全局限制
     - 突发流量处理
+    
+    每个限制对应一个令牌桶, 检查时按单调时钟惰性补充令牌, 不保存逐请求的时间戳。
     """
     
     def __init__(
@@ -53,157 +94,109 @@ class RateLimiter:
         self.burst_size = burst_size
         self.user_requests_per_minute = user_requests_per_minute
         
-        self._global_requests: deque = deque()
-        self._user_requests: Dict[str, deque] = {}
+        now = time.monotonic()
+        self._second_bucket = _new_bucket(requests_per_second, 1.0, now)
+        self._minute_bucket = _new_bucket(requests_per_minute, 60.0, now)
+        self._user_buckets: Dict[str, _TokenBucket] = {}
         self._lock = Lock()
         
         # 统计
         self._total_requests = 0
         self._rejected_requests = 0
     
-    def _clean_old_requests(self, requests: deque, window_seconds: float):
-        """清理过期的请求记录"""
-        now = time.time()
-        while requests and now - requests[0] > window_seconds:
-            requests.popleft()
-    
-    def _check_rate(
-        self,
-        requests: deque,
-        limit: float,
-        window_seconds: float,
-    ) -> tuple[bool, int, float]:
-        """检查速率限制"""
-        now = time.time()
-        self._clean_old_requests(requests, window_seconds)
+    def _buckets(self, user_id: Optional[str], now: float) -> Tuple[_TokenBucket, ...]:
+        """补充并返回本次请求涉及的令牌桶 (调用方持有锁)"""
+        if user_id:
+            bucket = self._user_buckets.get(user_id)
+            if bucket is None:
+                bucket = _new_bucket(self.user_requests_per_minute, 60.0, now)
+                self._user_buckets[user_id] = bucket
+            buckets = (self._second_bucket, self._minute_bucket, bucket)
+        else:
+            buckets = (self._second_bucket, self._minute_bucket)
         
-        count = len(requests)
-        remaining = max(0, int(limit - count))
-        
-        if count >= limit:
-            # 计算重试时间
-            if requests:
-                oldest = requests[0]
-                reset_time = oldest + window_seconds
-                retry_after = reset_time - now
-            else:
-                reset_time = now + window_seconds
-                retry_after = window_seconds
-            return False, remaining, retry_after
-        
-        return True, remaining, 0.0
+        for bucket in buckets:
+            bucket.refill(now)
+        return buckets
     
-    def check(self, user_id: str = None) -> RateLimitResult:
-        """
-        检查是否允许请求
-        
-        Args:
-            user_id: 用户ID (可选)
-            
-        Returns:
-            RateLimitResult
-        """
+    def _acquire(self, user_id: Optional[str], consume: bool) -> RateLimitResult:
+        """检查各令牌桶; consume为True且允许时在同一临界区内扣除令牌"""
         with self._lock:
-            now = time.time()
-            
-            # 检查全局每秒限制
-            allowed, remaining, retry_after = self._check_rate(
-                self._global_requests,
-                self.requests_per_second,
-                1.0,
-            )
-            
-            if not allowed:
-                self._rejected_requests += 1
-                return RateLimitResult(
-                    allowed=False,
-                    remaining=remaining,
-                    reset_time=now + retry_after,
-                    retry_after=retry_after,
-                    message="Global rate limit exceeded (per second)",
-                )
+            now = time.monotonic()
+            wall_now = time.time()
+            buckets = self._buckets(user_id, now)
             
-            # 检查全局每分钟限制
-            allowed, remaining, retry_after = self._check_rate(
-                self._global_requests,
-                self.requests_per_minute,
-                60.0,
-            )
-            
-            if not allowed:
-                self._rejected_requests += 1
-                return RateLimitResult(
-                    allowed=False,
-                    remaining=remaining,
-                    reset_time=now + retry_after,
-                    retry_after=retry_after,
-                    message="Global rate limit exceeded (per minute)",
-                )
-            
-            # 检查用户限制
-            if user_id:
-                if user_id not in self._user_requests:
-                    self._user_requests[user_id] = deque()
-                
-                user_requests = self._user_requests[user_id]
-                allowed, remaining, retry_after = self._check_rate(
-                    user_requests,
-                    self.user_requests_per_minute,
-                    60.0,
-                )
-                
-                if not allowed:
+            for index, bucket in enumerate(buckets):
+                if bucket.tokens < 1.0:
                     self._rejected_requests += 1
+                    retry_after = bucket.retry_after()
                     return RateLimitResult(
                         allowed=False,
-                        remaining=remaining,
-                        reset_time=now + retry_after,
+                        remaining=0,
+                        reset_time=wall_now + retry_after,
                         retry_after=retry_after,
-                        message=f"User rate limit exceeded for {user_id}",
+                        message=_LIMIT_MESSAGES[index].format(user_id=user_id),
                     )
             
+            remaining = max(0, int(buckets[-1].tokens))
+            if consume:
+                self._consume(buckets)
+            
             return RateLimitResult(
                 allowed=True,
                 remaining=remaining,
-                reset_time=now + 60.0,
+                reset_time=wall_now + 60.0,
                 message="Request allowed",
             )
     
+    def _consume(self, buckets: Tuple[_TokenBucket, ...]) -> None:
+        """从各令牌桶扣除一个令牌并计数 (调用方持有锁)"""
+        for bucket in buckets:
+            bucket.tokens -= 1.0
+        self._total_requests += 1
+    
+    def check(self, user_id: str = None) -> RateLimitResult:
+        """
+        检查是否允许请求 (不扣除令牌)
+        
+        Args:
+            user_id: 用户ID (可选)
+            
+        Returns:
+            RateLimitResult
+        """
+        return self._acquire(user_id, consume=False)
+    
     def record(self, user_id: str = None):
-        """记录请求"""
+        """记录请求 (无条件扣除令牌)"""
         with self._lock:
-            now = time.time()
-            self._global_requests.append(now)
-            self._total_requests += 1
-            
-            if user_id:
-                if user_id not in self._user_requests:
-                    self._user_requests[user_id] = deque()
-                self._user_requests[user_id].append(now)
+            self._consume(self._buckets(user_id, time.monotonic()))
     
     def check_and_record(self, user_id: str = None) -> RateLimitResult:
-        """检查并记录请求"""
-        result = self.check(user_id)
-        if result.allowed:
-            self.record(user_id)
-        return result
+        """检查并记录请求 (检查与扣除在同一次加锁内完成, 并发请求不会同时通过最后一个令牌)"""
+        return self._acquire(user_id, consume=True)
     
     def get_statistics(self) -> Dict:
         """获取统计信息"""
         with self._lock:
+            minute_bucket = self._minute_bucket
+            minute_bucket.refill(time.monotonic())
             return {
                 "total_requests": self._total_requests,
                 "rejected_requests": self._rejected_requests,
                 "rejection_rate": self._rejected_requests / self._total_requests if self._total_requests > 0 else 0,
-                "current_global_requests": len(self._global_requests),
-                "active_users": len(self._user_requests),
+                # 最近一分钟内尚未补充回来的令牌数, 近似窗口内的请求数
+                "current_global_requests": max(0, int(minute_bucket.capacity - minute_bucket.tokens)),
+                "active_users": len(self._user_buckets),
             }
     
     def reset(self):
         """重置限制器（仅用于测试）"""
         with self._lock:
-            self._global_requests.clear()
-            self._user_requests.clear()
+            now = time.monotonic()
+            self._second_bucket = _new_bucket(self.requests_per_second, 1.0, now)
+            self._minute_bucket = _new_bucket(self.requests_per_minute, 60.0, now)
+            self._user_buckets.clear()
             self._total_requests = 0
             self._rejected_requests = 0
 
@@ -6,6 +6,7 @@ from .mechanisms import (
     ExponentialMechanism,
     SparseVectorTechnique,
     add_laplace_noise,
+    add_laplace_noise_batch,
     add_gaussian_noise
 )
 from .sensitivity import SensitivityAnalyzer
@@ -17,6 +18,7 @@ __all__ = [
     "ExponentialMechanism",
     "SparseVectorTechnique",
     "add_laplace_noise",
+    "add_laplace_noise_batch",
     "add_gaussian_noise",
     "SensitivityAnalyzer",
 ]
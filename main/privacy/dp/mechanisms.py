@@ -3,7 +3,7 @@ Differential Privacy Mechanisms - 差分隐私噪声机制
 支持 Laplace 和 Gaussian 机制
 """
 import numpy as np
-from typing import Union
+from typing import Optional, Union
 
 
 def add_laplace_noise(
@@ -27,6 +27,30 @@ def add_laplace_noise(
     return value + noise
 
 
+def add_laplace_noise_batch(
+    values: np.ndarray,
+    epsilon: float,
+    sensitivity: float = 1.0,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    批量添加拉普拉斯噪声, 每个元素独立采样
+    
+    Args:
+        values: 原始值数组
+        epsilon: 隐私预算参数
+        sensitivity: 查询敏感度
+        rng: 随机数生成器 (默认使用全局随机数生成器)
+        
+    Returns:
+        加噪后的float64数组
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = sensitivity / epsilon
+    noise = (rng or np.random).laplace(0.0, scale, values.shape)
+    return values + noise
+
+
 def add_gaussian_noise(
     value: Union[int, float],
     epsilon: float,
@@ -53,13 +77,21 @@ def add_gaussian_noise(
 class LaplaceMechanism:
     """拉普拉斯机制"""
     
-    def __init__(self, epsilon: float, sensitivity: float = 1.0):
+    def __init__(
+        self,
+        epsilon: float,
+        sensitivity: float = 1.0,
+        rng: Optional[np.random.Generator] = None,
+    ):
         self.epsilon = epsilon
         self.sensitivity = sensitivity
         self.scale = sensitivity / epsilon
+        self._rng = rng
     
     def add_noise(self, value: Union[int, float]) -> float:
-        """添加噪声"""
+        """添加噪声 (未指定rng时使用全局随机数生成器)"""
+        if self._rng is not None:
+            return value + self._rng.laplace(0, self.scale)
         return add_laplace_noise(value, self.epsilon, self.sensitivity)
     
     def __repr__(self):
@@ -5,11 +5,13 @@ from .exceptions import (
     PolicyError,
     ExecutionError,
 )
+from .compat import DATACLASS_SLOTS
 
 __all__ = [
     "PrivacyEngineError",
     "SQLParseError", 
     "PolicyError",
     "ExecutionError",
+    "DATACLASS_SLOTS",
 ]
 
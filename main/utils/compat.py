@@ -0,0 +1,13 @@
+"""
+Compatibility Helpers - 版本兼容工具
+"""
+import sys
+
+# dataclass(slots=True) 需要 Python 3.10+, 旧版本退化为普通 dataclass
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# orjson 为可选依赖, 不可用时由调用方退回标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+构建时预生成 OpenAPI 规范
+
+生成 main/api/_openapi_prebuilt.json (紧凑 JSON) 及记录构建条件的 _openapi_prebuilt.meta.json。
+运行时设置 OPENAPI_USE_PREBUILT=1 后, OpenAPIExporter.export_json 导出服务应用的紧凑输出时
+直接复制该文件, 不再构建 schema; 应用标题、版本或 USE_MOCK_DB 等环境变量与构建时不一致时照常构建。
+路由变化后需重新生成。
+
+使用方法:
+    python scripts/build_openapi.py
+"""
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from main.api.server import app
+from main.api.export import PREBUILT_JSON_PATH, build_prebuilt
+
+
+def main():
+    """主函数"""
+    size = build_prebuilt(app)
+    print(f"✅ 预生成 OpenAPI 规范: {PREBUILT_JSON_PATH} ({size} 字节)")
+
+
+if __name__ == "__main__":
+    main()
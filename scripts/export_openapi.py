@@ -6,8 +6,10 @@
     python scripts/export_openapi.py --format json --output openapi.json
     python scripts/export_openapi.py --format yaml --output openapi.yaml
     python scripts/export_openapi.py --format both --output openapi
+    python scripts/export_openapi.py --format json --output openapi.json --pretty
 """
 import argparse
+import logging
 import sys
 from pathlib import Path
 
@@ -44,11 +46,22 @@ def main():
         "--indent",
         "-i",
         type=int,
-        default=2,
-        help="JSON 缩进空格数 (默认: 2)"
+        default=0,
+        help="JSON 缩进空格数 (默认: 0, 紧凑输出)"
+    )
+    
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="以 2 空格缩进输出便于阅读的 JSON (等同于 --indent 2)"
     )
     
     args = parser.parse_args()
+    if args.pretty:
+        args.indent = 2
+    
+    # 导出器通过 logging 报告写出的文件, 命令行下直接输出到终端
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     
     try:
         exporter = OpenAPIExporter(app)
@@ -68,7 +81,7 @@ def main():
         
         elif args.format == "both":
             base_path = args.output.replace(".json", "").replace(".yaml", "")
-            exporter.export_both(base_path)
+            exporter.export_both(base_path, indent=args.indent)
         
         print()
         print("✅ 导出成功！")
@@ -34,6 +34,14 @@ class TestPrivacyPreservingExporter:
         assert "name" in result
         assert "age" in result
     
+    def test_export_csv_missing_keys(self):
+        """测试CSV导出时缺失的键写为空值"""
+        data = [{"a": 1, "b": 2}, {"a": 3}]
+        config = ExportConfig(format=ExportFormat.CSV, add_noise_to_numeric=False)
+        result = self.exporter.export_data(data, config)
+        
+        assert result.splitlines() == ["a,b", "1,2", "3,"]
+    
     def test_export_json(self):
         """测试JSON导出"""
         config = ExportConfig(format=ExportFormat.JSON, add_noise_to_numeric=False)
@@ -42,6 +50,87 @@ class TestPrivacyPreservingExporter:
         assert "Alice" in result
         assert "Bob" in result
     
+    def test_export_json_datetime_format(self):
+        """测试JSON导出中datetime的格式与 json.dumps(default=str) 一致"""
+        import json
+        from datetime import datetime
+        
+        data = [{"id": 1, "created": datetime(2024, 1, 2, 3, 4, 5)}]
+        config = ExportConfig(format=ExportFormat.JSON, add_noise_to_numeric=False)
+        result = self.exporter.export_data(data, config)
+        
+        assert result == json.dumps(data, indent=2, ensure_ascii=False, default=str)
+        assert '"created": "2024-01-02 03:04:05"' in result
+    
+    def test_export_json_same_without_orjson(self, monkeypatch):
+        """测试数据类、枚举和numpy值的JSON导出与是否安装orjson无关"""
+        import numpy as np
+        from main.analytics import export
+        
+        data = [{
+            "format": ExportFormat.CSV,
+            "config": ExportConfig(),
+            "count": np.int64(3),
+            "values": np.array([1.5, 2.5]),
+        }]
+        config = ExportConfig(format=ExportFormat.JSON, add_noise_to_numeric=False)
+        result = self.exporter.export_data(data, config)
+        
+        monkeypatch.setattr(export, "orjson", None)
+        assert self.exporter.export_data(data, config) == result
+        assert '"format": "csv"' in result
+        assert '"count": 3' in result
+        assert f'"config": "{ExportConfig()}"' in result
+    
+    def test_export_parquet(self):
+        """测试Parquet导出"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        import io
+        
+        data = self.test_data + [{"id": 4, "name": "Dan", "age": "unknown"}]
+        config = ExportConfig(format=ExportFormat.PARQUET, add_noise_to_numeric=False)
+        result = self.exporter.export_data(data, config, identifier_columns=["name"])
+        
+        table = pq.read_table(io.BytesIO(result))
+        assert table.num_rows == 4
+        assert table.column("name").to_pylist()[0] == "A***e"
+        assert table.column("salary").to_pylist()[3] is None
+    
+    def test_export_data_streaming(self):
+        """测试分批流式导出与一次性导出结果一致"""
+        import json
+        
+        batches = [self.test_data[:2], [], self.test_data[2:]]
+        for fmt in (ExportFormat.CSV, ExportFormat.JSON):
+            config = ExportConfig(format=fmt, add_noise_to_numeric=False, max_rows=2)
+            streamed = "".join(self.exporter.export_data_streaming(batches, config))
+            expected = self.exporter.export_data(self.test_data, config)
+            
+            if fmt == ExportFormat.JSON:
+                assert json.loads(streamed) == json.loads(expected)
+            else:
+                assert streamed == expected
+    
+    def test_export_parquet_streaming_type_drift(self):
+        """测试Parquet流式导出时各批次列类型不同 (全空列、整数转浮点、字符串转整数)"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        import io
+        import pyarrow as pa
+        
+        batches = [
+            [{"a": None, "b": 1, "c": "x"}, {"a": None, "b": 2, "c": 3.5}],
+            [{"a": 7, "b": 2.5, "c": 4}],
+        ]
+        config = ExportConfig(format=ExportFormat.PARQUET, add_noise_to_numeric=False)
+        result = b"".join(self.exporter.export_data_streaming(batches, config))
+        
+        table = pq.read_table(io.BytesIO(result))
+        assert table.schema.field("a").type == pa.int64()
+        assert table.schema.field("b").type == pa.float64()
+        assert table.column("a").to_pylist() == [None, None, 7]
+        assert table.column("b").to_pylist() == [1.0, 2.0, 2.5]
+        assert table.column("c").to_pylist() == ["x", "3.5", "4"]
+    
     def test_mask_identifiers(self):
         """测试标识符脱敏"""
         config = ExportConfig(mask_identifiers=True, add_noise_to_numeric=False)
@@ -55,6 +144,14 @@ class TestPrivacyPreservingExporter:
         assert "Alice" not in result
         assert "A***e" in result or "A**e" in result
     
+    def test_mask_column_repeated_values(self):
+        """测试重复标识符脱敏结果一致, 不同类型的相等值分别处理"""
+        values = ["Alice", "Alice", 100, 100.0, True, None, ["x"]]
+        
+        masked = self.exporter._mask_column(values, missing=object())
+        
+        assert masked == ["A***e", "A***e", "1*0", "1***0", "T**e", None, "[***]"]
+    
     def test_add_noise_to_numeric(self):
         """测试数值噪声"""
         config = ExportConfig(add_noise_to_numeric=True, epsilon=0.1)
@@ -63,6 +160,29 @@ class TestPrivacyPreservingExporter:
         # 结果应该包含数据但值可能不同
         assert "age" in result or "salary" in result
     
+    def test_process_data_columnwise(self):
+        """测试按列处理: 混合类型列和缺失键"""
+        data = [
+            {"id": 1, "score": 10, "tag": "a"},
+            {"id": 2, "score": "n/a"},
+            {"id": 3, "score": 30, "tag": "c", "extra": 5},
+        ]
+        config = ExportConfig(add_noise_to_numeric=True, epsilon=1.0)
+        processed = self.exporter._process_data(data, config, ["tag"])
+        
+        assert [set(r) for r in processed] == [set(r) for r in data]
+        assert processed[1]["score"] == "n/a"
+        assert isinstance(processed[0]["score"], float)
+        assert processed[0]["tag"] == "*"
+    
+    def test_seeded_noise_reproducible(self):
+        """测试相同seed的导出器产生相同噪声"""
+        config = ExportConfig(format=ExportFormat.JSON, epsilon=0.5)
+        first = PrivacyPreservingExporter(seed=3).export_data(self.test_data, config)
+        second = PrivacyPreservingExporter(seed=3).export_data(self.test_data, config)
+        
+        assert first == second
+    
     def test_compute_statistics(self):
         """测试统计计算"""
         stats = self.exporter.compute_statistics(self.test_data, epsilon=1.0)
@@ -75,6 +195,28 @@ class TestPrivacyPreservingExporter:
         assert age_stat.data_type == "numeric"
         assert age_stat.mean is not None
     
+    def test_compute_statistics_mixed_columns(self):
+        """测试统计摘要: 空值计数与分类列"""
+        data = self.test_data + [{"id": 4, "name": None, "age": None, "salary": 1}]
+        stats = {s.column_name: s for s in self.exporter.compute_statistics(data)}
+        
+        assert stats["name"].data_type == "categorical"
+        assert stats["name"].null_count == 1
+        assert stats["name"].unique_count == 3
+        assert stats["age"].count == 4
+        assert stats["age"].is_noisy
+    
+    def test_export_with_statistics(self):
+        """测试include_statistics控制统计摘要输出"""
+        config = ExportConfig(format=ExportFormat.JSON, add_noise_to_numeric=False)
+        result = self.exporter.export_with_statistics(self.test_data, config)
+        
+        assert "Alice" in result["data"]
+        assert {s["column_name"] for s in result["statistics"]} == {"id", "name", "age", "salary"}
+        
+        config.include_statistics = False
+        assert self.exporter.export_with_statistics(self.test_data, config)["statistics"] == []
+    
     def test_export_for_ml(self):
         """测试ML格式导出"""
         result = self.exporter.export_for_ml(
@@ -86,6 +228,18 @@ class TestPrivacyPreservingExporter:
         assert "features" in result
         assert "target" in result
         assert len(result["features"]) == 3
+    
+    def test_export_for_ml_matrix(self):
+        """测试ML导出返回特征矩阵, 非数值特征为0"""
+        result = self.exporter.export_for_ml(
+            self.test_data,
+            target_column="salary",
+            feature_columns=["age", "name"],
+        )
+        
+        assert result["features"].shape == (3, 2)
+        assert (result["features"][:, 1] == 0).all()
+        assert result["target"].shape == (3,)
 
 
 class TestFederatedLearningAggregator:
@@ -120,6 +274,44 @@ class TestFederatedLearningAggregator:
         # client2应该有更大的权重
         assert result.total_samples == 400
     
+    def test_aggregate_without_noise(self):
+        """测试无噪声聚合为裁剪后权重的加权平均"""
+        aggregator = FederatedLearningAggregator(epsilon=1.0, clip_norm=10.0)
+        updates = [
+            ModelUpdate("client1", [1.0, 2.0], 100),
+            ModelUpdate("client2", [2.0, 4.0], 300),
+        ]
+        
+        result = aggregator.aggregate_updates(updates, add_noise=False)
+        
+        assert result.weights == pytest.approx([1.75, 3.5])
+        assert result.epsilon_used == 0
+    
+    def test_aggregate_clips_without_mutating_updates(self):
+        """测试聚合时裁剪到clip_norm且不修改原始更新"""
+        aggregator = FederatedLearningAggregator(epsilon=1.0, clip_norm=1.0)
+        updates = [
+            ModelUpdate("client1", [3.0, 4.0], 100),
+            ModelUpdate("client2", [0.3, 0.4], 100),
+        ]
+        
+        result = aggregator.aggregate_updates(updates, add_noise=False)
+        
+        assert result.weights == pytest.approx([0.45, 0.6])
+        assert updates[0].weights.tolist() == [3.0, 4.0]
+    
+    def test_aggregate_ragged_updates(self):
+        """测试长度不一的更新聚合, 缺失位置按0计"""
+        aggregator = FederatedLearningAggregator(epsilon=1.0, clip_norm=10.0)
+        updates = [
+            ModelUpdate("client1", [1.0, 2.0, 3.0], 100),
+            ModelUpdate("client2", [2.0], 300),
+        ]
+        
+        result = aggregator.aggregate_updates(updates, add_noise=False)
+        
+        assert result.weights == pytest.approx([1.75, 0.5, 0.75])
+    
     def test_secure_average(self):
         """测试安全平均"""
         values = [10.0, 20.0, 30.0]
@@ -193,6 +385,19 @@ class TestSyntheticDataGenerator:
         assert "income" in synthetic[0]
         assert "city" in synthetic[0]
     
+    def test_generate_columns(self):
+        """测试按列生成: 同一seed结果可复现, 数值裁剪到范围内"""
+        schemas = self.generator.learn_schema(self.test_data)
+        config = SyntheticDataConfig(num_rows=50, seed=7)
+        
+        columns = self.generator.generate_columns(schemas, config)
+        
+        assert set(columns) == {"age", "income", "city"}
+        assert all(len(c) == 50 for c in columns.values())
+        age_schema = next(s for s in schemas if s.name == "age")
+        assert columns["age"].max() <= round(age_schema.max_value, 2) + 0.01
+        assert self.generator.generate(schemas, config) == self.generator.generate(schemas, config)
+    
     def test_generate_from_data(self):
         """测试从数据直接生成"""
         config = SyntheticDataConfig(num_rows=5, seed=42)
@@ -1,6 +1,8 @@
 """
 SQL Analyzer 单元测试
 """
+import sys
+
 import pytest
 from main.analyzer import SQLAnalyzer, AnalysisResult
 
@@ -58,6 +60,17 @@ class TestSQLAnalyzer:
         sensitive_list = ["name", "email", "phone"]
         assert result.has_sensitive_columns(sensitive_list)
     
+    def test_has_sensitive_columns_prelowered_set(self):
+        """测试传入预先转小写的frozenset, 以及列重新赋值后缓存失效"""
+        result = self.analyzer.analyze("SELECT Name, Amount FROM users")
+        sensitive = frozenset({"name", "phone"})
+
+        assert result.has_sensitive_columns(sensitive)
+        assert result.has_sensitive_columns(["NAME"])
+
+        result.select_columns = ["amount"]
+        assert not result.has_sensitive_columns(sensitive)
+
     def test_extract_group_by(self):
         """测试GROUP BY提取"""
         sql = "SELECT department, COUNT(*) FROM employees GROUP BY department"
@@ -116,6 +129,13 @@ class TestSQLAnalyzer:
         assert "u.id = o.user_id" in result.joins[0].join_conditions
         assert "u.status = 'active'" in result.joins[0].join_conditions
     
+    def test_join_conditions_split_case_insensitive(self):
+        """测试JOIN条件按任意大小写的AND分割, 标识符中的and不受影响"""
+        sql = "SELECT * FROM users u JOIN orders o ON u.id = o.user_id and o.brand = u.band And o.x > 1"
+        result = self.analyzer.analyze(sql)
+
+        assert result.joins[0].join_conditions == ["u.id = o.user_id", "o.brand = u.band", "o.x > 1"]
+
     def test_analyze_joins_method(self):
         """测试analyze_joins公共方法"""
         sql = "SELECT * FROM users u RIGHT JOIN orders o ON u.id = o.user_id"
@@ -196,7 +216,16 @@ class TestSQLAnalyzer:
         
         assert len(subqueries) == 1
         assert "AVG" in subqueries[0].sql.upper()
-    
+
+    def test_extract_subqueries_max_count(self):
+        """测试max_subqueries限制提取数量, 保留最先出现的子查询"""
+        sql = ("SELECT * FROM users WHERE id IN (SELECT user_id FROM orders) "
+               "AND dept IN (SELECT id FROM depts) AND EXISTS (SELECT 1 FROM logs)")
+        subqueries = self.analyzer.extract_subqueries(sql, max_subqueries=2)
+
+        assert [sq.tables for sq in subqueries] == [["orders"], ["depts"]]
+        assert len(self.analyzer.extract_subqueries(sql)) == 3
+
     def test_extract_ctes_method(self):
         """测试extract_ctes公共方法"""
         sql = "WITH temp AS (SELECT * FROM users) SELECT * FROM temp"
@@ -204,7 +233,27 @@ class TestSQLAnalyzer:
         
         assert len(ctes) == 1
         assert ctes[0].name == "temp"
-    
+
+    def test_recursive_cte_ignores_name_in_string(self):
+        """测试定义体中字符串字面量里的同名文本不视为自引用"""
+        sql = ("WITH RECURSIVE tree AS (SELECT id FROM nodes WHERE kind = 'tree'), "
+               "walk AS (SELECT id FROM nodes UNION ALL SELECT n.id FROM nodes n JOIN Walk w ON n.parent = w.id) "
+               "SELECT * FROM walk")
+        ctes = self.analyzer.analyze(sql).ctes
+
+        assert [cte.is_recursive for cte in ctes] == [False, True]
+
+    def test_multiple_ctes_with_column_list(self):
+        """测试多个CTE及列名列表, 定义体中的括号和逗号不影响切分"""
+        sql = ("WITH totals (uid, total) AS (SELECT user_id, SUM(amount) FROM orders GROUP BY user_id), "
+               "top AS (SELECT uid FROM totals WHERE total IN (1, 2)) SELECT * FROM top")
+        ctes = self.analyzer.analyze(sql).ctes
+
+        assert [cte.name for cte in ctes] == ["totals", "top"]
+        assert ctes[0].columns == ["uid", "total"]
+        assert ctes[0].references == ["orders"]
+        assert ctes[1].sql == "SELECT uid FROM totals WHERE total IN (1, 2)"
+
     def test_analyze_row_number_window_function(self):
         """测试ROW_NUMBER窗口函数分析"""
         sql = "SELECT name, ROW_NUMBER() OVER (ORDER BY created_at) as row_num FROM users"
@@ -259,6 +308,205 @@ class TestSQLAnalyzer:
         assert window_funcs[0].function_name == "LAG"
         assert "salary" in window_funcs[0].arguments
 
+    def test_analyze_outer_join_conditions(self):
+        """测试LEFT OUTER JOIN的类型与条件边界"""
+        sql = ("SELECT * FROM users u JOIN orders o ON u.id = o.user_id "
+               "LEFT OUTER JOIN products p ON p.id = o.product_id WHERE u.age > 18")
+        result = self.analyzer.analyze(sql)
+
+        assert len(result.joins) == 2
+        assert result.joins[0].join_conditions == ["u.id = o.user_id"]
+        assert result.joins[1].join_type == "LEFT"
+        assert result.joins[1].join_conditions == ["p.id = o.product_id"]
+
+    def test_analyze_nested_subqueries(self):
+        """测试嵌套子查询按括号匹配提取"""
+        sql = "SELECT * FROM users WHERE age > (SELECT AVG(age) FROM users WHERE id IN (SELECT user_id FROM orders))"
+        result = self.analyzer.analyze(sql)
+
+        assert len(result.subqueries) == 2
+        assert result.subqueries[0].sql == "SELECT AVG(age) FROM users WHERE id IN (SELECT user_id FROM orders)"
+        assert result.subqueries[1].sql == "SELECT user_id FROM orders"
+        assert result.subqueries[1].subquery_type == "IN"
+
+    def test_keywords_inside_string_literal_ignored(self):
+        """测试字符串字面量中的关键字不被识别"""
+        sql = "SELECT name FROM users WHERE note = 'JOIN audit FROM archive'"
+        result = self.analyzer.analyze(sql)
+
+        assert result.tables == ["users"]
+        assert result.joins == []
+
+    def test_has_where_ignores_literals_and_identifiers(self):
+        """测试字符串或标识符中的where不算WHERE子句"""
+        result = self.analyzer.analyze("SELECT 'where' AS x, somewhere FROM users -- where")
+
+        assert result.has_where is False
+        assert self.analyzer.analyze("select 1 from t where a = 1").has_where is True
+
+    def test_extract_aggregations_order_and_case(self):
+        """测试聚合函数去重、忽略大小写并按固定顺序输出"""
+        sql = "select max(age), count(*), Count(id), 'sum(x)' as label from users"
+        result = self.analyzer.analyze(sql)
+
+        assert result.aggregations == ["COUNT", "MAX"]
+
+    def test_subquery_context_after_join(self):
+        """测试JOIN后的派生表不会被误判为IN子查询"""
+        sql = "SELECT * FROM users u JOIN (SELECT user_id FROM orders) o ON u.id = o.user_id"
+        result = self.analyzer.analyze(sql)
+
+        assert len(result.subqueries) == 1
+        assert result.subqueries[0].location == "FROM"
+        assert result.subqueries[0].subquery_type == "FROM"
+
+    def test_window_function_with_nested_call(self):
+        """测试参数含嵌套括号的窗口函数"""
+        sql = ("SELECT SUM(COALESCE(amount, 0)) OVER (PARTITION BY region "
+               "ORDER BY day RANGE BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) total FROM sales")
+        result = self.analyzer.analyze(sql)
+
+        assert len(result.window_functions) == 1
+        window = result.window_functions[0]
+        assert window.function_name == "SUM"
+        assert window.partition_by == ["region"]
+        assert window.order_by == ["day"]
+        assert window.window_frame == "RANGE BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW"
+        assert window.alias == "total"
+        assert window.arguments == ["COALESCE(amount, 0)"]
+
+    def test_select_columns_split_at_top_level(self):
+        """测试SELECT列和GROUP BY只在顶层逗号处分割"""
+        sql = ("SELECT COALESCE(name, 'a,b') AS label, CAST(age AS INT), SUM(a) total "
+               "FROM users GROUP BY COALESCE(name, 'a,b'), age")
+        result = self.analyzer.analyze(sql)
+
+        assert result.select_columns == ["label", "CAST(age AS INT)", "SUM(a) total"]
+        assert result.group_by_columns == ["COALESCE(name, 'a,b')", "age"]
+
+    def test_where_conditions_end_at_subquery_boundary(self):
+        """测试子查询内的WHERE条件不会越过右括号"""
+        sql = "SELECT * FROM users WHERE id IN (SELECT user_id FROM orders WHERE amount > 100) ORDER BY id"
+        result = self.analyzer.analyze(sql)
+
+        assert result.where_conditions == ["id IN (SELECT user_id FROM orders WHERE amount > 100)"]
+
+    def test_multiline_sql_with_line_comment(self):
+        """测试多行SQL中的行注释只作用到行尾, 不会吞掉后续语句"""
+        sql = "SELECT ssn -- x\nFROM customers\nWHERE id=1"
+        result = self.analyzer.analyze(sql)
+
+        assert result.tables == ["customers"]
+        assert result.select_columns == ["ssn"]
+        assert result.has_where is True
+        assert result.where_conditions == ["id=1"]
+
+    def test_comments_removed_before_normalize(self):
+        """测试标准化时去掉注释, 字符串中的注释符号保留"""
+        sql = "SELECT name /* c */, ssn\n-- note\nFROM t WHERE x = '--a' -- tail"
+        result = self.analyzer.analyze(sql)
+
+        assert result.tables == ["t"]
+        assert result.select_columns == ["name", "ssn"]
+        assert result.where_conditions == ["x = '--a'"]
+
+    def test_analyze_result_cache(self):
+        """测试重复SQL命中缓存且返回独立副本"""
+        first = self.analyzer.analyze("SELECT name FROM users")
+        first.tables.append("mutated")
+        second = self.analyzer.analyze("SELECT  name\n FROM users")
+
+        assert second is not first
+        assert second.tables == ["users"]
+        assert second.original_sql == "SELECT  name\n FROM users"
+        stats = self.analyzer.get_cache_statistics()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_analyze_cache_nested_copies(self):
+        """测试修改结果中JOIN/CTE等数据类的列表字段不影响下次分析同一SQL"""
+        sql = "WITH t AS (SELECT id FROM a) SELECT * FROM users u JOIN orders o ON u.id = o.user_id"
+        first = self.analyzer.analyze(sql)
+        first.joins[0].tables.append("POISON")
+        first.joins[0].join_type = "POISON"
+        first.ctes[0].references.append("POISON")
+
+        second = self.analyzer.analyze(sql)
+        assert "POISON" not in second.joins[0].tables
+        assert second.joins[0].join_type != "POISON"
+        assert "POISON" not in second.ctes[0].references
+
+    def test_analyze_cache_eviction(self):
+        """测试缓存超过容量时淘汰最久未使用的条目"""
+        analyzer = SQLAnalyzer(cache_size=2)
+        for table in ("a", "b", "c"):
+            analyzer.analyze(f"SELECT * FROM {table}")
+
+        assert analyzer.get_cache_statistics()["entries"] == 2
+        analyzer.analyze("SELECT * FROM a")
+        assert analyzer.get_cache_statistics()["misses"] == 4
+
+    def test_fields_extracted_on_demand(self):
+        """测试字段在首次访问时才提取, 且同一SQL只提取一次"""
+        sql = "SELECT name, email FROM users u JOIN orders o ON u.id = o.user_id"
+        result = self.analyzer.analyze(sql)
+
+        assert result.select_columns == ["name", "email"]
+        assert set(result._source._values) == {"select_columns"}
+
+        again = self.analyzer.analyze(sql)
+        assert again.select_columns == ["name", "email"]
+        assert again.select_columns is not result.select_columns
+
+    def test_constructed_result_defaults(self):
+        """测试直接构造的结果: 未传入字段为空, 聚合标志由aggregations推出"""
+        result = AnalysisResult(aggregations=["SUM"])
+
+        assert result.tables == []
+        assert result.has_where is False
+        assert result.is_aggregate_query is True
+        assert AnalysisResult(is_aggregate_query=False, aggregations=["SUM"]).is_aggregate_query is False
+
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass(slots=True) 需要 Python 3.10+")
+    def test_result_uses_slots(self):
+        """测试分析结果不带实例__dict__, 按需字段仍可赋值和比较"""
+        result = self.analyzer.analyze("SELECT id FROM users")
+
+        assert not hasattr(result, "__dict__")
+        result.tables = ["accounts"]
+        assert result.tables == ["accounts"]
+        assert AnalysisResult(tables=["t"]) == AnalysisResult(tables=["t"])
+        with pytest.raises(AttributeError):
+            result.unknown_field
+
+    def test_public_helpers_share_analysis(self):
+        """测试公共提取方法复用analyze()的词法单元与提取结果"""
+        sql = "SELECT * FROM users u JOIN orders o ON u.id = o.user_id WHERE u.id IN (SELECT id FROM vip)"
+        result = self.analyzer.analyze(sql)
+        joins = result.joins
+
+        assert self.analyzer.analyze_joins(sql) == joins
+        assert self.analyzer.extract_subqueries(sql) == result.subqueries
+        assert self.analyzer.extract_ctes(sql) == []
+        assert self.analyzer.get_cache_statistics()["misses"] == 1
+
+    def test_joins_reuse_extracted_tables(self):
+        """测试多个JOIN共用一次提取的主表列表"""
+        sql = ("SELECT * FROM users u JOIN orders o ON u.id = o.user_id "
+               "JOIN products p ON p.id = o.product_id")
+        result = self.analyzer.analyze(sql)
+
+        assert [join.tables for join in result.joins] == [["users", "orders", "products"]] * 2
+        assert "tables" in result._source._values
+
+    def test_correlation_columns_keep_order(self):
+        """测试关联列去重后保持出现顺序"""
+        sql = ("SELECT * FROM users u WHERE EXISTS (SELECT 1 FROM orders o "
+               "WHERE o.user_id = u.id AND u.status = 'x' AND u.id > 0)")
+        result = self.analyzer.analyze(sql)
+
+        assert result.subqueries[0].correlation_columns == ["u.id", "u.status", "o.user_id"]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,62 @@
+"""
+SQL词法分析单元测试
+"""
+import pytest
+from main.analyzer import tokenizer
+from main.analyzer.tokenizer import tokenize, strip_comments, KW, IDENT, STRING, LPAREN
+
+
+class TestTokenize:
+    """tokenize测试类"""
+
+    def test_keywords_and_identifiers(self):
+        """测试关键字统一为大写, 标识符保留原文"""
+        tokens = tokenize("select Name from Users")
+
+        assert [(t.kind, t.value) for t in tokens] == [
+            (KW, "SELECT"), (IDENT, "Name"), (KW, "FROM"), (IDENT, "Users"),
+        ]
+
+    def test_strings_and_comments(self):
+        """测试字符串字面量整体成为一个单元, 注释被跳过"""
+        sql = "SELECT 'it''s FROM' /* WHERE */ FROM t"
+        tokens = tokenize(sql)
+
+        assert [t.kind for t in tokens] == [KW, STRING, KW, IDENT]
+        assert sql[tokens[1].start:tokens[1].end] == "'it''s FROM'"
+
+    def test_strip_comments(self):
+        """测试去掉注释时保留字符串和换行后的内容"""
+        sql = "SELECT a -- x\nFROM t /* y */ WHERE b = '--'"
+
+        assert strip_comments(sql) == "SELECT a  \nFROM t   WHERE b = '--'"
+        assert strip_comments("SELECT a FROM t") == "SELECT a FROM t"
+
+    def test_offsets_point_into_sql(self):
+        """测试偏移量对应原SQL中的位置"""
+        sql = "SELECT COUNT( id )"
+        tokens = tokenize(sql)
+
+        assert tokens[2].kind == LPAREN
+        assert [sql[t.start:t.end] for t in tokens] == ["SELECT", "COUNT", "(", "id", ")"]
+
+    def test_trailing_whitespace_linear(self):
+        """测试大段末尾空白不会导致回溯 (平方级耗时时此测试会超时)"""
+        tokens = tokenize("SELECT a FROM t" + " " * 200000)
+
+        assert len(tokens) == 4
+
+    def test_scan_kernel_matches_regex(self, monkeypatch):
+        """测试numba扫描内核与正则切分结果一致"""
+        pytest.importorskip("numba")
+        sql = ("SELECT \"Full Name\", `id`, 3.14, 'a''b' -- note\n"
+               "FROM t /* c */ WHERE x <> 1 AND y || z != w::int ") * 100
+
+        kernel_tokens = tokenize(sql)
+        monkeypatch.setattr(tokenizer, "_SCAN_KERNEL_MIN_LENGTH", len(sql) + 1)
+
+        assert kernel_tokens == tokenize(sql)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
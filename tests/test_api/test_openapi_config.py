@@ -1,6 +1,9 @@
 """
 OpenAPI 配置模块的单元测试
 """
+import subprocess
+import sys
+
 import pytest
 
 
@@ -10,3 +13,74 @@ class TestOpenAPIConfig:
     def test_placeholder(self):
         """占位测试 - 将在实现 OpenAPIConfig 后添加实际测试"""
         assert True
+
+    def test_package_exports_load_lazily(self):
+        """测试main.api按需导入: 导入包本身不加载FastAPI, 访问导出符号时才加载"""
+        code = (
+            "import sys, main.api\n"
+            "assert 'fastapi' not in sys.modules\n"
+            "from main.api import OpenAPIConfig\n"
+            "assert OpenAPIConfig.__module__ == 'main.api.openapi_config'\n"
+            "assert 'fastapi' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_static_config_built_once(self):
+        """测试静态配置在模块加载时构建, 重复调用返回同一对象"""
+        from main.api.openapi_config import OpenAPIConfig
+
+        assert OpenAPIConfig.get_metadata() is OpenAPIConfig.get_metadata()
+        assert OpenAPIConfig.get_tags_metadata() is OpenAPIConfig.get_tags_metadata()
+        assert OpenAPIConfig.get_metadata()["description"].lstrip().startswith("## 差分隐私")
+
+    def test_static_config_is_read_only(self):
+        """测试静态配置为只读映射, thaw后得到可序列化的普通字典"""
+        import json
+        from main.api.openapi_config import OpenAPIConfig, thaw
+
+        metadata = OpenAPIConfig.get_metadata()
+        with pytest.raises(TypeError):
+            metadata["title"] = "x"
+        with pytest.raises(TypeError):
+            metadata["contact"]["name"] = "x"
+
+        tags = thaw(OpenAPIConfig.get_tags_metadata())
+        assert isinstance(tags, list) and isinstance(tags[0], dict)
+        assert json.loads(json.dumps(tags)) == tags
+
+    def test_descriptions_dedented(self):
+        """测试描述文本在加载时已去除公共缩进和首尾空白"""
+        from main.api.openapi_config import OpenAPIConfig
+
+        description = OpenAPIConfig.get_metadata()["description"]
+        assert description.startswith("## 差分隐私") and description == description.strip()
+        for tag in OpenAPIConfig.get_tags_metadata():
+            assert tag["description"].startswith("**")
+            assert not any(line.startswith(" ") for line in tag["description"].splitlines())
+
+    def test_servers_follow_environment(self, monkeypatch):
+        """测试服务器列表按环境变量缓存, 环境变量变化后结果随之更新"""
+        from main.api.openapi_config import OpenAPIConfig
+
+        monkeypatch.delenv("PRODUCTION_URL", raising=False)
+        monkeypatch.delenv("STAGING_URL", raising=False)
+        servers = OpenAPIConfig.get_servers()
+        assert [s["url"] for s in servers] == ["http://localhost:8000"]
+
+        # 修改返回值不影响缓存
+        servers[0]["url"] = "changed"
+        assert OpenAPIConfig.get_servers()[0]["url"] == "http://localhost:8000"
+
+        monkeypatch.setenv("PRODUCTION_URL", "https://api.example.com")
+        assert [s["description"] for s in OpenAPIConfig.get_servers()] == ["本地开发服务器", "生产环境"]
+
+    def test_default_servers_shared(self):
+        """测试未配置环境变量时直接复用冻结的默认服务器列表"""
+        from main.api.openapi_config import _DEFAULT_SERVERS, _compute_servers
+
+        assert _compute_servers(None, None) is _DEFAULT_SERVERS
+        assert _compute_servers("", None) is _DEFAULT_SERVERS
+        servers = _compute_servers("https://api.example.com", None)
+        assert servers[0] is _DEFAULT_SERVERS[0]
+        with pytest.raises(TypeError):
+            servers[1]["url"] = "x"
@@ -1,12 +1,237 @@
 """
 OpenAPI 导出功能的单元测试
 """
+import json
+
 import pytest
+import yaml
+from fastapi import FastAPI
+
+from main.api.export import OpenAPIExporter, OpenAPIExportError
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI(title="测试服务", version="1.0.0")
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    return app
 
 
 class TestOpenAPIExporter:
     """OpenAPI 导出器测试类"""
-    
-    def test_placeholder(self):
-        """占位测试 - 将在实现 OpenAPIExporter 后添加实际测试"""
-        assert True
+
+    def setup_method(self):
+        self.exporter = OpenAPIExporter(_make_app())
+
+    def test_export_json_matches_stdlib_format(self, tmp_path):
+        """测试默认导出紧凑JSON, indent=2时与json.dump(indent=2, ensure_ascii=False)逐字节一致"""
+        output = tmp_path / "openapi.json"
+        schema = self.exporter.get_schema()
+
+        self.exporter.export_json(str(output))
+        expected = json.dumps(schema, separators=(",", ":"), ensure_ascii=False)
+        assert output.read_text(encoding="utf-8") == expected
+
+        self.exporter.export_json(str(output), indent=2)
+        expected = json.dumps(schema, indent=2, ensure_ascii=False)
+        assert output.read_text(encoding="utf-8") == expected
+
+    def test_export_json_custom_indent(self, tmp_path):
+        """测试非默认缩进仍按指定空格数输出"""
+        output = tmp_path / "openapi.json"
+        self.exporter.export_json(str(output), indent=4)
+
+        assert output.read_text(encoding="utf-8").startswith('{\n    "openapi"')
+
+    def test_export_yaml_round_trip(self, tmp_path):
+        """测试导出的YAML可解析回与schema相同的字典, 且保持键顺序"""
+        output = tmp_path / "openapi.yaml"
+        self.exporter.export_yaml(str(output))
+
+        schema = self.exporter.get_schema()
+        loaded = yaml.safe_load(output.read_text(encoding="utf-8"))
+        assert loaded == schema
+        assert list(loaded) == list(schema)
+
+    def test_export_both_builds_schema_once(self, tmp_path, monkeypatch):
+        """测试export_both只构建一次schema, invalidate后重新构建"""
+        calls = []
+        build = self.exporter.app.openapi
+        monkeypatch.setattr(self.exporter.app, "openapi", lambda: calls.append(1) or build())
+
+        self.exporter.export_both(str(tmp_path / "openapi"))
+        assert len(calls) == 1
+        assert (tmp_path / "openapi.json").exists() and (tmp_path / "openapi.yaml").exists()
+
+        self.exporter.invalidate()
+        self.exporter.get_schema()
+        assert len(calls) == 2
+
+    def test_export_yaml_normalizes_to_json_types(self, tmp_path):
+        """测试YAML导出前转换为JSON类型: 共享子对象不产生锚点, 元组输出为列表"""
+        pytest.importorskip("orjson")
+        shared = {"type": "string"}
+        self.exporter._schema_cache = {"a": shared, "b": shared, "tags": ("x", "y")}
+        output = tmp_path / "openapi.yaml"
+        self.exporter.export_yaml(str(output))
+
+        text = output.read_text(encoding="utf-8")
+        assert "&id" not in text
+        assert yaml.safe_load(text) == {"a": shared, "b": shared, "tags": ["x", "y"]}
+
+    def test_export_both_matches_single_exports(self, tmp_path):
+        """测试export_both与分别导出的内容一致, fsync选项可用"""
+        self.exporter.export_both(str(tmp_path / "both"), fsync=True, indent=2)
+        self.exporter.export_json(str(tmp_path / "single.json"), indent=2)
+        self.exporter.export_yaml(str(tmp_path / "single.yaml"))
+
+        assert (tmp_path / "both.json").read_bytes() == (tmp_path / "single.json").read_bytes()
+        assert (tmp_path / "both.yaml").read_bytes() == (tmp_path / "single.yaml").read_bytes()
+
+    def test_export_both_writes_nothing_on_serialization_error(self, tmp_path):
+        """测试序列化失败时两个文件都不写入"""
+        self.exporter._schema_cache = {"bad": object()}
+
+        with pytest.raises(OpenAPIExportError):
+            self.exporter.export_both(str(tmp_path / "openapi"))
+        assert list(tmp_path.iterdir()) == []
+
+    def test_fsync_drops_page_cache(self, tmp_path, monkeypatch):
+        """测试fsync导出在刷盘后对每个文件调用posix_fadvise(DONTNEED)"""
+        import os
+
+        if not hasattr(os, "posix_fadvise"):
+            pytest.skip("平台不支持 posix_fadvise")
+        calls = []
+        fadvise = os.posix_fadvise
+        monkeypatch.setattr(
+            os, "posix_fadvise",
+            lambda fd, offset, length, advice: calls.append(advice) or fadvise(fd, offset, length, advice),
+        )
+
+        self.exporter.export_json(str(tmp_path / "openapi.json"))
+        assert calls == []
+
+        self.exporter.export_json(str(tmp_path / "openapi.json"), fsync=True)
+        self.exporter.export_yaml(str(tmp_path / "openapi.yaml"), fsync=True)
+        self.exporter.export_both(str(tmp_path / "both"), fsync=True)
+        assert calls == [os.POSIX_FADV_DONTNEED] * 4
+
+    def test_export_reports_through_logging(self, tmp_path, capsys, caplog):
+        """测试导出结果通过logging报告, 不再写入标准输出"""
+        import logging
+
+        output = tmp_path / "openapi.json"
+        with caplog.at_level(logging.INFO, logger="main.api.export"):
+            self.exporter.export_json(str(output))
+
+        assert capsys.readouterr().out == ""
+        assert caplog.records[-1].getMessage().endswith(str(output))
+
+    def test_export_both_accepts_path(self, tmp_path):
+        """测试export_both接受Path, 扩展名直接追加在基础路径之后"""
+        self.exporter.export_both(tmp_path / "sub" / "openapi.v2")
+
+        assert sorted(p.name for p in (tmp_path / "sub").iterdir()) == [
+            "openapi.v2.json", "openapi.v2.yaml",
+        ]
+
+    def test_schema_json_bytes_cached(self, tmp_path):
+        """测试JSON字节缓存与export_json输出一致, invalidate后重新生成"""
+        data = self.exporter.get_schema_json_bytes()
+        assert self.exporter.get_schema_json_bytes() is data
+        assert json.loads(data) == self.exporter.get_schema()
+
+        output = tmp_path / "openapi.json"
+        self.exporter.export_json(output)
+        assert output.read_bytes() == data
+
+        self.exporter.invalidate()
+        assert self.exporter.get_schema_json_bytes() is not data
+
+    def test_export_creates_missing_directories(self, tmp_path):
+        """测试目标目录不存在时自动创建, 覆盖导出时截断旧内容"""
+        output = tmp_path / "a" / "b" / "openapi.json"
+        self.exporter.export_json(output)
+        assert output.read_bytes() == self.exporter.get_schema_json_bytes()
+
+        output.write_bytes(b"x" * (len(output.read_bytes()) + 100))
+        self.exporter.export_json(output)
+        assert output.read_bytes() == self.exporter.get_schema_json_bytes()
+
+        self.exporter.export_yaml(tmp_path / "c" / "openapi.yaml")
+        assert yaml.safe_load((tmp_path / "c" / "openapi.yaml").read_text(encoding="utf-8"))
+
+    def _prebuild(self, tmp_path, monkeypatch):
+        """在临时目录生成预生成文件, 并把导出器的应用登记为服务应用"""
+        import sys
+        from types import SimpleNamespace
+        from main.api import export
+
+        monkeypatch.setattr(export, "PREBUILT_JSON_PATH", tmp_path / "prebuilt.json")
+        monkeypatch.setattr(export, "PREBUILT_META_PATH", tmp_path / "prebuilt.meta.json")
+        monkeypatch.setitem(sys.modules, "main.api.server", SimpleNamespace(app=self.exporter.app))
+        monkeypatch.setenv("USE_MOCK_DB", "true")
+        export.build_prebuilt(self.exporter.app)
+        (tmp_path / "prebuilt.json").write_bytes(b'{"prebuilt":true}')
+
+    def test_export_json_uses_prebuilt(self, tmp_path, monkeypatch):
+        """测试OPENAPI_USE_PREBUILT=1且构建条件一致时紧凑导出直接复制预生成文件, 不构建schema"""
+        self._prebuild(tmp_path, monkeypatch)
+        def build():
+            raise RuntimeError("不应构建schema")
+
+        monkeypatch.setattr(self.exporter.app, "openapi", build)
+        output = tmp_path / "openapi.json"
+
+        # 未启用时不读取预生成文件
+        monkeypatch.delenv("OPENAPI_USE_PREBUILT", raising=False)
+        with pytest.raises(OpenAPIExportError):
+            self.exporter.export_json(output)
+
+        monkeypatch.setenv("OPENAPI_USE_PREBUILT", "1")
+        self.exporter.export_json(output)
+        assert output.read_bytes() == b'{"prebuilt":true}'
+
+    def test_export_json_ignores_mismatched_prebuilt(self, tmp_path, monkeypatch):
+        """测试构建条件变化或导出其他应用时不使用预生成文件"""
+        self._prebuild(tmp_path, monkeypatch)
+        monkeypatch.setenv("OPENAPI_USE_PREBUILT", "1")
+        output = tmp_path / "openapi.json"
+
+        monkeypatch.setenv("USE_MOCK_DB", "false")
+        self.exporter.export_json(output)
+        assert output.read_bytes() == self.exporter.get_schema_json_bytes()
+
+        monkeypatch.setenv("USE_MOCK_DB", "true")
+        other = OpenAPIExporter(_make_app())
+        other.export_json(output)
+        assert output.read_bytes() == other.get_schema_json_bytes()
+
+        self.exporter.app.version = "2.0.0"
+        self.exporter.export_json(output)
+        assert output.read_bytes() != b'{"prebuilt":true}'
+
+
+class TestExportOpenAPISpec:
+    """export_openapi_spec 便捷函数测试类"""
+
+    def setup_method(self):
+        self.app = _make_app()
+
+    def test_dispatch_by_format(self, tmp_path):
+        """测试按格式分派导出, 格式不区分大小写并支持yml别名"""
+        from main.api.export import export_openapi_spec
+
+        export_openapi_spec(self.app, "JSON", tmp_path / "openapi.json")
+        export_openapi_spec(self.app, "yml", tmp_path / "openapi.yml")
+
+        assert json.loads((tmp_path / "openapi.json").read_text(encoding="utf-8"))["openapi"]
+        assert yaml.safe_load((tmp_path / "openapi.yml").read_text(encoding="utf-8"))["openapi"]
+
+        with pytest.raises(ValueError):
+            export_openapi_spec(self.app, "xml", tmp_path / "openapi.xml")
+        assert not (tmp_path / "openapi.xml").exists()
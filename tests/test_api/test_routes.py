@@ -88,6 +88,21 @@ class TestAPIRoutes:
         data = response.json()
         assert data["status"] == "success"
     
+    def test_protect_query_numeric_user_id(self):
+        """测试上下文中的数字user_id转为字符串, 其他字段原样保留"""
+        from main.api.schemas import QueryRequest
+        
+        request = QueryRequest(sql="SELECT 1", context={"user_id": 123, "session_id": 7})
+        assert request.context.user_id == "123"
+        assert request.context.session_id == 7
+        
+        response = self.client.post(
+            "/api/v1/protect-query",
+            json={"sql": "SELECT COUNT(*) FROM users", "context": {"user_id": 123}}
+        )
+        
+        assert response.status_code == 200
+    
     def test_protect_query_empty_sql(self):
         """测试空SQL应返回错误"""
         response = self.client.post(
@@ -109,8 +124,136 @@ class TestAPIRoutes:
         assert data["status"] == "success"
         # 非敏感字段，应该是 PASS
         assert data["data"]["type"] in ["PASS", "DeID", "DP"]
+    
+    def test_audit_export_streams_file(self):
+        """测试审计日志导出以流式文件返回 (CSV/JSON)"""
+        from main.api.routes import get_audit_logger
+        
+        audit_logger = get_audit_logger()
+        audit_logger.log_query_submitted(query_id="q1", user_id="export_user", original_sql="SELECT 1")
+        
+        response = self.client.get("/api/v1/audit/export", params={"format": "csv", "user_id": "export_user"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.splitlines()
+        assert lines[0].startswith("entry_id,") and len(lines) == 2
+        
+        response = self.client.get("/api/v1/audit/export", params={"user_id": "export_user", "limit": 1})
+        assert response.status_code == 200
+        assert response.json()["entries"][0]["user_id"] == "export_user"
+    
+    def test_audit_logs_serialized_like_to_dict(self):
+        """测试审计日志接口直接序列化数据类, 结果与to_dict一致"""
+        from main.api.routes import get_audit_logger
+        from main.audit import AuditFilter
+        
+        audit_logger = get_audit_logger()
+        audit_logger.log_query_submitted(query_id="q1", user_id="json_user", original_sql="SELECT 1")
+        
+        response = self.client.get("/api/v1/audit/logs", params={"user_id": "json_user"})
+        assert response.status_code == 200
+        logs = response.json()["data"]["logs"]
+        expected = audit_logger.filter_logs(AuditFilter(user_id="json_user"))
+        assert logs == [entry.to_dict() for entry in expected]
+    
+    def test_audit_logs_with_wide_int_metadata(self):
+        """测试元数据含orjson不支持的值 (超过64位的整数) 时交由FastAPI编码"""
+        from main.api.routes import get_audit_logger
+        
+        audit_logger = get_audit_logger()
+        audit_logger.log_query_submitted(
+            query_id="q1", user_id="wide_user", original_sql="SELECT 1", metadata={"n": 2**70}
+        )
+        
+        response = self.client.get("/api/v1/audit/logs", params={"user_id": "wide_user"})
+        assert response.status_code == 200
+        assert response.json()["data"]["logs"][0]["metadata"] == {"n": 2**70}
+    
+    def test_env_flags_cached_until_reset(self):
+        """测试环境变量配置首次读取后缓存, reset_query_driver后重新读取"""
+        from main.api.routes import _enable_budget_management
+        
+        with patch.dict(os.environ, {"ENABLE_BUDGET_MANAGEMENT": "false"}):
+            reset_query_driver()
+            assert _enable_budget_management() is False
+            
+            os.environ["ENABLE_BUDGET_MANAGEMENT"] = "true"
+            assert _enable_budget_management() is False
+            
+            reset_query_driver()
+            assert _enable_budget_management() is True
+        
+        reset_query_driver()
+        
+    def test_query_driver_created_once_under_concurrency(self):
+        """测试并发首次获取只创建一个 QueryDriver, reset 后重新创建"""
+        from concurrent.futures import ThreadPoolExecutor
+        from main.api.routes import get_query_driver
+        
+        reset_query_driver()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            drivers = list(pool.map(lambda _: get_query_driver(), range(32)))
+        
+        assert all(driver is drivers[0] for driver in drivers)
+        reset_query_driver()
+        assert get_query_driver() is not drivers[0]
+        
+    def test_protect_query_served_from_cache(self):
+        """测试去标识化结果缓存后直接返回, 差分隐私结果不缓存"""
+        from main.api.routes import get_query_cache
+        
+        cache = get_query_cache()
+        request = {"sql": "SELECT name, email FROM users", "context": {"user_id": "u1"}}
+        first = self.client.post("/api/v1/protect-query", json=request)
+        hits = cache.get_statistics()["hits"]
+        second = self.client.post("/api/v1/protect-query", json=request)
+        
+        assert second.json() == first.json()
+        assert cache.get_statistics()["hits"] == hits + 1
+        
+        self.client.post("/api/v1/protect-query", json={"sql": "SELECT COUNT(*) FROM users"})
+        assert cache.get("SELECT COUNT(*) FROM users") is None
+    
+    def test_protect_query_write_not_cached(self):
+        """测试重复提交的写语句每次都交给执行器执行, 并使已缓存的查询结果失效"""
+        from main.api.routes import get_query_cache, get_query_driver
+        
+        calls = []
+        
+        def execute(original_sql, **kwargs):
+            calls.append(original_sql)
+            return {
+                "type": "PASS",
+                "original_query": original_sql,
+                "protected_result": None,
+                "privacy_info": {"method": "None", "reason": "No protection required"},
+            }
+        
+        cache = get_query_cache()
+        cache.set("SELECT 1", b"{}")
+        with patch.object(get_query_driver().executor, "execute", side_effect=execute):
+            for _ in range(3):
+                response = self.client.post("/api/v1/protect-query", json={"sql": "UPDATE users SET age = 1"})
+                assert response.status_code == 200
+        
+        assert calls == ["UPDATE users SET age = 1"] * 3
+        assert cache.get("SELECT 1") is None
+    
+    def test_status_v3_component_stats_cached(self):
+        """测试 /status/v3 的组件统计在缓存时间内复用, reset后重新统计"""
+        from main.api.routes import get_audit_logger
+        
+        first = self.client.get("/api/v1/status/v3").json()
+        assert first["features"]["audit_logging"] is True
+        
+        get_audit_logger().log_query_submitted(query_id="q1", user_id="u1", original_sql="SELECT 1")
+        second = self.client.get("/api/v1/status/v3").json()
+        assert second["components"] == first["components"]
+        
+        reset_query_driver()
+        third = self.client.get("/api/v1/status/v3").json()
+        assert third["components"]["audit"]["total_entries"] == first["components"]["audit"]["total_entries"] + 1
 
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
-
@@ -120,6 +120,23 @@ class TestAuditFilter:
         assert len(entries) == 2
         assert all(e.event_type == EventType.QUERY_SUBMITTED for e in entries)
     
+    def test_filter_by_user_after_eviction(self):
+        """测试超出上限移除旧条目后, 按用户过滤只返回仍保留的条目"""
+        logger = AuditLogger(max_entries=4)
+        for i in range(6):
+            logger.log_query_submitted(query_id=f"q{i}", user_id=f"user{i % 2}", original_sql="SELECT 1")
+        
+        assert [e.query_event.query_id for e in logger.get_logs_by_user("user0")] == ["q2", "q4"]
+        page = AuditFilter(user_id="user1", limit=1, offset=1)
+        assert [e.query_event.query_id for e in logger.filter_logs(page)] == ["q5"]
+        assert [e.query_event.query_id for e in logger._iter_entries(page)] == ["q5"]
+        
+        logger.log_query_submitted(query_id="q6", user_id="user2", original_sql="SELECT 1")
+        logger.log_query_submitted(query_id="q7", user_id="user2", original_sql="SELECT 1")
+        logger.log_query_submitted(query_id="q8", user_id="user2", original_sql="SELECT 1")
+        assert logger.get_logs_by_user("user0") == []
+        assert logger.verify_chain_integrity() is True
+    
     def test_filter_exclude_rejected(self):
         """测试排除拒绝的查询"""
         filter_criteria = AuditFilter(include_rejected=False)
@@ -156,6 +173,49 @@ class TestAuditChainIntegrity:
         )
         
         assert entry.verify_integrity() is True
+    
+    def test_chain_detects_tampering(self):
+        """测试篡改条目内容或断开链接后验证失败, 条目哈希只在加入日志链时计算一次"""
+        from unittest import mock
+        from main.audit.models import AuditLogEntry
+        
+        logger = AuditLogger()
+        with mock.patch.object(
+            AuditLogEntry, "_calculate_hash", autospec=True,
+            side_effect=AuditLogEntry._calculate_hash,
+        ) as calculate:
+            first = logger.log_query_submitted(query_id="q1", user_id="user1", original_sql="SELECT 1")
+            second = logger.log_query_submitted(query_id="q2", user_id="user1", original_sql="SELECT 2")
+        assert calculate.call_count == 2
+        assert second.previous_hash == first.entry_hash
+        assert logger.verify_chain_integrity() is True
+        
+        second.query_event.original_sql = "SELECT 3"
+        assert logger.verify_chain_integrity() is False
+        
+        second.query_event.original_sql = "SELECT 2"
+        second.previous_hash = None
+        second.entry_hash = second._calculate_hash()
+        assert logger.verify_chain_integrity() is False
+    
+    def test_incremental_verification(self):
+        """测试增量验证只检查新条目, 条目被移出上限后仍能接续验证"""
+        logger = AuditLogger(max_entries=3)
+        first = logger.log_query_submitted(query_id="q1", user_id="user1", original_sql="SELECT 1")
+        assert logger.verify_chain_integrity(incremental=True) is True
+        
+        # 已验证的条目不再重算哈希, 完整验证仍能发现篡改
+        first.query_event.original_sql = "SELECT 9"
+        assert logger.verify_chain_integrity(incremental=True) is True
+        assert logger.verify_chain_integrity() is False
+        first.query_event.original_sql = "SELECT 1"
+        
+        for i in range(2, 6):
+            logger.log_query_submitted(query_id=f"q{i}", user_id="user1", original_sql=f"SELECT {i}")
+        newest = logger.log_query_submitted(query_id="q6", user_id="user1", original_sql="SELECT 6")
+        newest.previous_hash = None
+        newest.entry_hash = newest._calculate_hash()
+        assert logger.verify_chain_integrity(incremental=True) is False
 
 
 class TestAuditExport:
@@ -187,9 +247,122 @@ class TestAuditExport:
         assert "entry_id" in lines[0]
         assert "query_submitted" in lines[1]
     
+    def test_iter_export_csv_matches_export_csv(self):
+        """测试逐行CSV导出与export_csv内容一致, 过滤与分页生效"""
+        chunks = list(self.logger.iter_export_csv())
+        assert all(chunk.endswith("\n") for chunk in chunks)
+        assert "".join(chunks) == self.logger.export_csv() + "\n"
+        
+        page = AuditFilter(limit=1, offset=1)
+        assert "".join(self.logger.iter_export_csv(page)) == self.logger.export_csv(page) + "\n"
+    
+    def test_iter_export_json(self):
+        """测试分段JSON导出拼接后为完整文档, 不限制条数时导出全部"""
+        import json
+        
+        document = json.loads("".join(self.logger.iter_export_json(AuditFilter(limit=None))))
+        expected = json.loads(self.logger.export_json())
+        assert document["total_entries"] == 2
+        assert document["entries"] == expected["entries"]
+        
+        empty = json.loads("".join(self.logger.iter_export_json(AuditFilter(user_id="nobody"))))
+        assert empty["entries"] == [] and empty["total_entries"] == 0
+    
+    def test_iter_export_in_chunks(self):
+        """测试条目较多时分段产出, 拼接结果不变"""
+        import json
+        from main.audit.logger import _EXPORT_CHUNK_ENTRIES
+        
+        logger = AuditLogger()
+        for i in range(_EXPORT_CHUNK_ENTRIES + 10):
+            logger.log_query_submitted(query_id=f"q{i}", user_id="user1", original_sql="SELECT 1")
+        everything = AuditFilter(limit=None)
+        
+        chunks = list(logger.iter_export_csv(everything))
+        assert len(chunks) == 3
+        assert "".join(chunks) == logger.export_csv(everything) + "\n"
+        
+        document = json.loads("".join(logger.iter_export_json(everything)))
+        assert document["total_entries"] == _EXPORT_CHUNK_ENTRIES + 10
+        assert document["entries"][-1]["query_event"]["query_id"] == f"q{_EXPORT_CHUNK_ENTRIES + 9}"
+    
+    def test_entry_to_json(self):
+        """测试条目的JSON文本与to_dict一致"""
+        import json
+        
+        entry = self.logger.get_logs_by_user("user1")[0]
+        assert "\n" not in entry.to_json()
+        assert json.loads(entry.to_json()) == entry.to_dict()
+        
+        wide = self.logger.log_query_submitted(
+            query_id="q2", user_id="user1", original_sql="SELECT 1", metadata={"n": 2**70}
+        )
+        assert json.loads(wide.to_json())["metadata"] == {"n": 2**70}
+        assert json.loads("".join(self.logger.iter_export_json()))["total_entries"] == 3
+    
     def test_get_statistics(self):
         """测试统计信息"""
         stats = self.logger.get_statistics()
         assert stats["total_entries"] == 2
+        assert self.logger.get_entry_count() == stats["total_entries"]
         assert "query_submitted" in stats["by_event_type"]
         assert "privacy_applied" in stats["by_event_type"]
+    
+    def test_file_sink_appends_json_lines(self, tmp_path):
+        """测试文件输出按顺序写入每个条目, close后全部落盘"""
+        import json
+        from main.audit import AuditFileSink
+        
+        path = tmp_path / "audit" / "audit.jsonl"
+        logger = AuditLogger(sink=AuditFileSink(path, max_batch=4))
+        entries = [
+            logger.log_query_submitted(query_id=f"q{i}", user_id="user1", original_sql="SELECT 1")
+            for i in range(10)
+        ]
+        logger.close()
+        
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == [e.to_dict() for e in entries]
+    
+    def test_file_sink_survives_failed_entry(self, tmp_path):
+        """测试某个条目序列化失败时跳过该条目, 后台线程继续写入后续条目"""
+        import json
+        from unittest import mock
+        from main.audit import AuditFileSink
+        from main.audit.models import AuditLogEntry
+        
+        to_json = AuditLogEntry.to_json
+        
+        def failing_to_json(entry):
+            if entry.query_event.query_id == "bad":
+                raise TypeError("unserializable")
+            return to_json(entry)
+        
+        path = tmp_path / "audit.jsonl"
+        sink = AuditFileSink(path, max_batch=1)
+        logger = AuditLogger(sink=sink)
+        with mock.patch.object(AuditLogEntry, "to_json", failing_to_json):
+            logger.log_query_submitted(query_id="bad", user_id="user1", original_sql="SELECT 1")
+            for i in range(3):
+                logger.log_query_submitted(query_id=f"q{i}", user_id="user1", original_sql="SELECT 1")
+            logger.close()
+        
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["query_event"]["query_id"] for line in lines] == ["q0", "q1", "q2"]
+        assert sink.dropped == 1
+    
+    def test_file_sink_flushes_after_interval(self, tmp_path):
+        """测试未攒满一批时, 等待flush_interval后写入"""
+        import time
+        from main.audit import AuditFileSink
+        
+        path = tmp_path / "audit.jsonl"
+        logger = AuditLogger(sink=AuditFileSink(path, max_batch=100, flush_interval=0.05))
+        for i in range(3):
+            logger.log_query_submitted(query_id=f"q{i}", user_id="user1", original_sql="SELECT 1")
+        
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and len(path.read_text(encoding="utf-8").splitlines()) < 3:
+            time.sleep(0.01)
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 3
+        logger.close()
@@ -194,6 +194,21 @@ class TestPrivacyBudgetManager:
         status = self.manager.get_budget_status("user1")
         assert status["consumed_budget"] == 3.5
         assert status["remaining_budget"] == 1.5
+    
+    def test_concurrent_consume_never_overspends(self):
+        """测试多线程并发消耗预算时不超支, 每个用户独立计数"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        manager = PrivacyBudgetManager(default_budget=1.0)
+        users = [f"user{i}" for i in range(4)]
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: manager.consume_budget(users[i % 4], 0.1), range(80)))
+        
+        assert sum(results) == 40
+        for user_id in users:
+            assert manager.get_budget_status(user_id)["consumed_budget"] == pytest.approx(1.0)
+            assert len(manager.get_budget_history(user_id)) == 10
 
 
 class TestBudgetResetSchedule:
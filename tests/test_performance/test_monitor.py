@@ -2,6 +2,7 @@
 Tests for Performance Monitor (v3.0)
 """
 import pytest
+import threading
 import time
 
 from main.performance import PerformanceMonitor, QueryMetrics, QueryCache, RateLimiter
@@ -77,6 +78,29 @@ class TestPerformanceMonitor:
         assert stats["total_queries"] == 2
         assert stats["cache_hits"] == 1
         assert stats["cache_hit_rate"] == 0.5
+    
+    def test_buffered_metrics_from_threads(self):
+        """测试各线程缓冲的查询在读取时全部汇总"""
+        monitor = PerformanceMonitor(buffer_size=8)
+        
+        def run(worker):
+            for i in range(20):
+                query_id = f"q{worker}_{i}"
+                monitor.start_query(query_id, f"user{worker}")
+                monitor.end_query(query_id)
+        
+        threads = [threading.Thread(target=run, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert monitor.get_statistics()["total_queries"] == 80
+        assert len(monitor.get_metrics(limit=1000)) == 80
+        assert len(monitor.get_metrics_by_user("user2")) == 20
+        
+        monitor.clear()
+        assert monitor.get_statistics()["total_queries"] == 0
 
 
 class TestQueryCache:
@@ -149,6 +173,39 @@ class TestQueryCache:
         assert stats["hits"] == 1
         assert stats["misses"] == 1
         assert stats["hit_rate"] == 0.5
+    
+    def test_get_and_set_by_key(self):
+        """测试按预先生成的键读写, 与按SQL和上下文读写一致"""
+        context = {"user_id": "user1"}
+        key = self.cache.make_key("SELECT 1", context)
+        self.cache.set_by_key(key, 1)
+        
+        assert self.cache.get("SELECT 1", context) == 1
+        assert self.cache.get_by_key(key) == 1
+        assert self.cache.get_by_key(self.cache.make_key("SELECT 1")) is None
+    
+    def test_sharded_cache_under_threads(self):
+        """测试分片缓存在多线程读写下的命中和统计"""
+        cache = QueryCache(max_entries=4096)
+        
+        def run(worker):
+            for i in range(100):
+                sql = f"SELECT {worker * 100 + i}"
+                cache.set(sql, i)
+                assert cache.get(sql) == i
+        
+        threads = [threading.Thread(target=run, args=(w,)) for w in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        stats = cache.get_statistics()
+        assert stats["entries"] == 800
+        assert stats["hits"] == 800
+        
+        cache.invalidate_all()
+        assert cache.get_statistics()["entries"] == 0
 
 
 class TestRateLimiter:
@@ -197,3 +254,37 @@ class TestRateLimiter:
         
         assert stats["total_requests"] >= 1
         assert "rejected_requests" in stats
+    
+    def test_tokens_refill_over_time(self, monkeypatch):
+        """测试令牌按经过的时间补充, 拒绝后等待retry_after即可再次通过"""
+        clock = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+        limiter = RateLimiter(requests_per_second=2.0)
+        
+        assert limiter.check_and_record().allowed
+        assert limiter.check_and_record().allowed
+        rejected = limiter.check_and_record()
+        assert rejected.allowed is False
+        assert rejected.retry_after == pytest.approx(0.5)
+        
+        clock[0] += 0.5
+        assert limiter.check_and_record().allowed
+        assert limiter.check_and_record().allowed is False
+    
+    def test_concurrent_check_and_record(self):
+        """测试并发检查并记录时通过的请求数不超过限制"""
+        limiter = RateLimiter(requests_per_second=1000.0, requests_per_minute=50.0)
+        results = []
+        
+        def worker():
+            for _ in range(20):
+                results.append(limiter.check_and_record("user1").allowed)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert sum(results) == 50
+        assert limiter.get_statistics()["total_requests"] == 50
@@ -7,6 +7,7 @@ from main.privacy.dp import (
     LaplaceMechanism, 
     GaussianMechanism,
     add_laplace_noise,
+    add_laplace_noise_batch,
     DPRewriter,
 )
 
@@ -45,6 +46,25 @@ class TestLaplaceMechanism:
         
         # 高epsilon的scale更小
         assert mech_high_eps.scale < mech_low_eps.scale
+    
+    def test_add_noise_with_rng(self):
+        """测试使用指定随机数生成器时噪声可复现"""
+        first = LaplaceMechanism(epsilon=1.0, rng=np.random.default_rng(5))
+        second = LaplaceMechanism(epsilon=1.0, rng=np.random.default_rng(5))
+        
+        assert first.add_noise(10) == second.add_noise(10)
+    
+    def test_add_laplace_noise_batch(self):
+        """测试批量噪声: 逐元素独立采样且尺度为 sensitivity/epsilon"""
+        values = np.zeros(20000)
+        noised = add_laplace_noise_batch(
+            values, epsilon=2.0, sensitivity=1.0, rng=np.random.default_rng(0)
+        )
+        
+        assert noised.shape == values.shape
+        assert len(np.unique(noised)) == len(values)
+        # Laplace(b) 的平均绝对值为 b
+        assert abs(np.mean(np.abs(noised)) - 0.5) < 0.05
 
 
 class TestDPRewriter: